@@ -0,0 +1,194 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+"""
+Offline benchmarks against a MockYNABServer serving synthetic budgets.
+
+    python benchmarks/bench_ynab.py --sizes 1000 50000 --output after.json --compare before.json
+
+Every case reports the best wall time of --repeat runs, the peak traced memory of
+one extra run and the number of HTTP requests the case made.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import ynab  # noqa: E402
+
+
+def make_client(server: ynab.MockYNABServer, budget_id: str, **kwargs) -> ynab.YNABBudgetClient:
+    return ynab.YNABBudgetClient(
+        budget_id=budget_id,
+        pat_token="benchmark",
+        base_url=server.url,
+        # The real limit would make the benchmark measure sleeping
+        rate_limiter=ynab.RateLimiter(bucket=ynab.TokenBucket(capacity=10 ** 9)),
+        **kwargs,
+    )
+
+
+def measure(name: str, server: ynab.MockYNABServer, setup: Callable, run: Callable, repeat: int) -> dict:
+    """
+    :param setup: Called before every run, untimed - its result is passed to run
+    """
+    times = []
+    requests = 0
+
+    for _ in range(repeat):
+        state = setup()
+        before = server.request_total
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+        requests = server.request_total - before
+
+    state = setup()
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"case": name, "seconds": min(times), "peak_mb": peak / 2 ** 20, "requests": requests}
+
+
+def available_codecs() -> List[ynab.JSONCodec]:
+    codecs = []
+
+    for name in ("json", "orjson", "msgspec"):
+        try:
+            codecs.append(ynab.default_codec(name))
+        except ImportError:
+            pass
+
+    return codecs
+
+
+def cases(server: ynab.MockYNABServer, budget: ynab.SyntheticBudget, writes: int) -> Dict[str, tuple]:
+    account = budget.accounts[0]
+    category = budget.category_groups[0]["categories"][0]
+    raw = json.dumps({"data": {"transactions": budget.get_transactions()}}).encode("utf-8")
+    payload = {"transactions": [ynab.Transaction.from_dict(r).save_transaction for r in budget.get_transactions()]}
+
+    def client(**kwargs):
+        return lambda: make_client(server, budget.id, **kwargs)
+
+    def new_rows():
+        return [
+            ynab.Transaction(account_id=account["id"], date="2024-01-01", amount=-1000 - i,
+                             payee_name=f"Benchmark {i}", cleared="uncleared")
+            for i in range(writes)
+        ]
+
+    def batched_account_loop(c):
+        with c.transactions.batched():
+            return [a.get_transactions() for a in c.accounts.get_all()]
+
+    def synced_client():
+        c = make_client(server, budget.id)
+        c.sync.sync_accounts()
+        c.sync.sync_categories()
+        return c
+
+    return {
+        "get_all": (client(), lambda c: c.transactions.get_all()),
+        "get_all[compact]": (client(compact_models=True), lambda c: c.transactions.get_all()),
+        "iter_all": (client(), lambda c: sum(1 for _ in c.transactions.iter_all())),
+        "get_by_account": (client(), lambda c: c.transactions.get_by_account(account["id"])),
+        "account_loop": (client(), lambda c: [a.get_transactions() for a in c.accounts.get_all()]),
+        "account_loop[batched]": (client(), batched_account_loop),
+        **{
+            f"decode[{codec.name}]": (lambda: raw, codec.loads)
+            for codec in available_codecs()
+        },
+        **{
+            f"encode[{codec.name}]": (lambda: payload, codec.dumps)
+            for codec in available_codecs()
+        },
+        "from_dict": (
+            lambda: json.loads(raw)["data"]["transactions"],
+            lambda rows: [ynab.Transaction.from_dict(r) for r in rows],
+        ),
+        "from_dict[compact]": (
+            lambda: json.loads(raw)["data"]["transactions"],
+            lambda rows: [ynab.CompactTransaction.from_dict(r) for r in rows],
+        ),
+        "save_many": (lambda: (make_client(server, budget.id), new_rows()), lambda s: s[0].transactions.save_many(s[1])),
+        "accounts.get_by_name[cold]": (client(), lambda c: c.accounts.get_by_name(account["name"])),
+        "accounts.get_by_name[warm]": (synced_client, lambda c: c.accounts.get_by_name(account["name"])),
+        "categories.get_by_name[cold]": (client(), lambda c: c.categories.get_by_name(category["name"])),
+        "categories.get_by_name[warm]": (synced_client, lambda c: c.categories.get_by_name(category["name"])),
+    }
+
+
+def run(sizes: List[int], split_ratio: float, writes: int, repeat: int, only: Optional[List[str]]) -> List[dict]:
+    results = []
+
+    for size in sizes:
+        budget = ynab.SyntheticBudget(transactions=size, split_ratio=split_ratio)
+
+        with ynab.MockYNABServer(budget) as server:
+            for name, (setup, case) in cases(server, budget, writes).items():
+                if only and not any(o in name for o in only):
+                    continue
+
+                result = measure(name, server, setup, case, repeat)
+                result["size"] = size
+                results.append(result)
+                print(format_row(result), flush=True)
+
+    return results
+
+
+def format_row(result: dict, baseline: Optional[dict] = None) -> str:
+    row = (
+        f"{result['size']:>9}  {result['case']:<30} {result['seconds'] * 1000:>10.1f} ms"
+        f" {result['peak_mb']:>9.1f} MB {result['requests']:>6} req"
+    )
+
+    if baseline:
+        row += f"   x{result['seconds'] / baseline['seconds']:.2f} time, x{result['peak_mb'] / max(baseline['peak_mb'], 1e-9):.2f} memory"
+
+    return row
+
+
+def compare(results: List[dict], path: str) -> None:
+    with open(path) as f:
+        baseline = {(r["size"], r["case"]): r for r in json.load(f)}
+
+    print(f"\nCompared with {path}:")
+    for result in results:
+        print(format_row(result, baseline.get((result["size"], result["case"]))))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 50000], help="Transactions per budget")
+    parser.add_argument("--split-ratio", type=float, default=0.05, help="Share of split transactions")
+    parser.add_argument("--writes", type=int, default=1000, help="Transactions created by save_many")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case")
+    parser.add_argument("--only", nargs="+", help="Only run cases whose name contains one of these")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.split_ratio, args.writes, args.repeat, args.only)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,5 +9,6 @@ setup(
     author='Erik Zwiefel',
     author_email='erik.zwiefel@live.com',
     description='YNAB API',
-    install_requires=['requests>=2.31.0']
+    install_requires=['requests>=2.31.0'],
+    extras_require={'frame': ['numpy'], 'fast': ['orjson'], 'arrow': ['pyarrow']}
 )
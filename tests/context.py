@@ -7,10 +7,15 @@ import os
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import json
 from dataclasses import dataclass
+from typing import List, Optional
+from urllib.parse import urlsplit
 
 import pytest
 from environs import Env
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter
 
 import ynab
 
@@ -35,4 +40,54 @@ def ynab_env() -> Environment:
         token=env.str("YNAB_PAT"),
         budget_id=env.str('TEST_BUDGET_ID'),
         account=env.str('ACCOUNT_NAME')
-    )
\ No newline at end of file
+    )
+
+class FakeTransport(BaseAdapter):
+    """
+    Offline transport adapter - serves canned JSON responses and records every request
+    """
+
+    def __init__(self, routes: Optional[dict] = None):
+        super().__init__()
+        self.routes = routes or {}
+        self.requests: List[PreparedRequest] = []
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        self.requests.append(request)
+        path = urlsplit(request.url).path.replace("/v1/budgets/test-budget/", "", 1)
+        handler = self.routes.get((request.method, path.rstrip("/")))
+
+        if handler is None:
+            status, body, headers = 404, {"error": {"id": "404", "name": "not_found"}}, []
+        elif callable(handler):
+            status, body, *headers = handler(request)
+        else:
+            status, body, headers = 200, handler, []
+
+        resp = Response()
+        resp.status_code = status
+        resp._content = json.dumps(body).encode("utf-8")
+        resp._content_consumed = True
+        resp.headers["Content-Type"] = "application/json"
+        resp.headers.update(headers[0] if headers else {})
+        resp.url = request.url
+        resp.request = request
+        return resp
+
+    def close(self):
+        pass
+
+
+@pytest.fixture()
+def transport() -> FakeTransport:
+    return FakeTransport()
+
+
+@pytest.fixture()
+def offline_client(transport) -> ynab.YNABBudgetClient:
+    return ynab.YNABBudgetClient(
+        budget_id="test-budget",
+        pat_token="test-token",
+        transport=transport,
+        rate_limiter=ynab.RateLimiter(),
+    )
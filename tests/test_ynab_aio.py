@@ -0,0 +1,66 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import asyncio
+import threading
+
+from context import ynab, transport
+
+ACCOUNTS = {"data": {"accounts": [{"id": "a1", "name": "Checking"}, {"id": "a2", "name": "Savings"}]}}
+
+
+def account_transactions(account_id):
+    return {"data": {"transactions": [{"id": f"{account_id}-t", "account_id": account_id, "amount": 100}]}}
+
+
+def test_async_client_returns_shared_models(transport):
+    transport.routes[("GET", "accounts")] = ACCOUNTS
+
+    async def main():
+        async with ynab.AsyncYNABBudgetClient("test-budget", "t", transport=transport, rate_limiter=ynab.RateLimiter()) as client:
+            return await client.accounts.get_all()
+
+    accounts = asyncio.run(main())
+
+    assert all(isinstance(a, ynab.Account) for a in accounts)
+
+
+def test_gather_by_account(transport):
+    transport.routes[("GET", "accounts")] = ACCOUNTS
+    transport.routes[("GET", "transactions")] = {
+        "data": {"transactions": [t for a in ("a1", "a2") for t in account_transactions(a)["data"]["transactions"]]}
+    }
+
+    async def main():
+        async with ynab.AsyncYNABBudgetClient("test-budget", "t", transport=transport, rate_limiter=ynab.RateLimiter()) as client:
+            accounts = await client.accounts.get_all()
+            return await client.transactions.gather_by_account([a.id for a in accounts])
+
+    by_account = asyncio.run(main())
+
+    assert by_account["a1"][0].id == "a1-t"
+    assert by_account["a2"][0].id == "a2-t"
+    assert isinstance(by_account["a2"][0], ynab.Transaction)
+    # Accounts, then one budget-wide transactions request
+    assert len(transport.requests) == 2
+
+
+def test_generator_methods_stream_on_the_executor(transport):
+    threads = []
+
+    def route(request):
+        threads.append(threading.current_thread())
+        return 200, {"data": {"transactions": [{"id": f"t{i}", "amount": i} for i in range(600)]}}
+
+    transport.routes[("GET", "transactions")] = route
+
+    async def main():
+        async with ynab.AsyncYNABBudgetClient("test-budget", "t", transport=transport, rate_limiter=ynab.RateLimiter()) as client:
+            return [t.id async for t in client.transactions.iter_all()]
+
+    ids = asyncio.run(main())
+
+    assert ids == [f"t{i}" for i in range(600)]
+    assert threads and threading.main_thread() not in threads
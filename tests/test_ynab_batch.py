@@ -0,0 +1,120 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import threading
+from urllib.parse import urlsplit
+
+from context import ynab, transport, offline_client
+
+ACCOUNT_IDS = [f"a{i}" for i in range(40)]
+
+ACCOUNTS = {"data": {"accounts": [{"id": a, "name": f"Account {a}"} for a in ACCOUNT_IDS]}}
+
+TRANSACTIONS = {
+    "data": {
+        "transactions": [
+            {"id": f"t{i}", "date": f"2024-01-{i % 28 + 1:02d}", "amount": -i, "account_id": f"a{i % 39}", "subtransactions": []}
+            for i in range(200)
+        ],
+        "server_knowledge": 9,
+    }
+}
+
+
+def paths(transport):
+    return [urlsplit(r.url).path for r in transport.requests]
+
+
+def test_get_by_accounts_partitions_one_fetch(transport, offline_client):
+    transport.routes[("GET", "transactions")] = TRANSACTIONS
+
+    by_account = offline_client.transactions.get_by_accounts(["a1", "a2", "a39"])
+
+    assert len(transport.requests) == 1
+    assert list(by_account) == ["a1", "a2", "a39"]
+    assert all(t.account_id == "a1" for t in by_account["a1"])
+    assert [t.id for t in by_account["a2"]] == [f"t{i}" for i in range(200) if i % 39 == 2]
+    # Requested accounts without transactions are still present
+    assert by_account["a39"] == []
+
+
+def test_get_by_accounts_without_ids_returns_every_account(transport, offline_client):
+    transport.routes[("GET", "transactions")] = TRANSACTIONS
+    loaded = []
+    offline_client.transactions.subscribe(loaded.extend)
+
+    by_account = offline_client.transactions.get_by_accounts(since_date="2024-01-01")
+
+    assert len(by_account) == 39
+    assert sum(len(ts) for ts in by_account.values()) == 200
+    assert len(loaded) == 200
+    assert "since_date=2024-01-01" in transport.requests[0].url
+
+
+def test_batched_account_loop_makes_one_transactions_request(transport, offline_client):
+    transport.routes[("GET", "accounts")] = ACCOUNTS
+    transport.routes[("GET", "transactions")] = TRANSACTIONS
+
+    with offline_client.transactions.batched():
+        by_account = {a.id: a.get_transactions() for a in offline_client.accounts.get_all()}
+
+    assert paths(transport) == ["/v1/budgets/test-budget/accounts", "/v1/budgets/test-budget/transactions/"]
+    assert len(by_account) == 40
+    assert [t.id for t in by_account["a5"]] == [f"t{i}" for i in range(200) if i % 39 == 5]
+    assert by_account["a39"] == []
+
+
+def test_batch_is_fetched_per_since_date_and_dropped_after_block(transport, offline_client):
+    transport.routes[("GET", "transactions")] = TRANSACTIONS
+    transport.routes[("GET", "accounts/a1/transactions")] = TRANSACTIONS
+
+    with offline_client.transactions.batched():
+        offline_client.transactions.get_by_account("a1")
+        offline_client.transactions.get_by_account("a2")
+        offline_client.transactions.get_by_account("a1", since_date="2024-01-10")
+
+    assert len(transport.requests) == 2
+
+    offline_client.transactions.get_by_account("a1")
+
+    assert paths(transport)[-1] == "/v1/budgets/test-budget/accounts/a1/transactions"
+
+
+def test_writes_drop_the_batch(transport, offline_client):
+    transport.routes[("GET", "transactions")] = TRANSACTIONS
+    transport.routes[("POST", "transactions")] = lambda request: (201, {"data": {"transaction": TRANSACTIONS["data"]["transactions"][0]}})
+
+    with offline_client.transactions.batched():
+        offline_client.transactions.get_by_account("a1")
+        offline_client.transactions.create_transaction(ynab.Transaction(account_id="a1", amount=-1))
+        offline_client.transactions.get_by_account("a1")
+
+    assert [r.method for r in transport.requests] == ["GET", "POST", "GET"]
+
+
+def test_import_drops_the_batch(transport, offline_client):
+    transport.routes[("GET", "transactions")] = TRANSACTIONS
+    transport.routes[("POST", "transactions/import")] = {"data": {"transaction_ids": []}}
+
+    with offline_client.transactions.batched():
+        offline_client.transactions.get_by_account("a1")
+        offline_client.transactions.import_all()
+        offline_client.transactions.get_by_account("a1")
+
+    assert [r.method for r in transport.requests] == ["GET", "POST", "GET"]
+
+
+def test_batch_is_per_thread(transport, offline_client):
+    transport.routes[("GET", "transactions")] = TRANSACTIONS
+    transport.routes[("GET", "accounts/a1/transactions")] = {"data": {"transactions": []}}
+
+    with offline_client.transactions.batched():
+        assert len(offline_client.transactions.get_by_account("a1")) > 0
+
+        other = threading.Thread(target=offline_client.transactions.get_by_account, args=("a1",))
+        other.start()
+        other.join()
+
+    assert paths(transport)[-1] == "/v1/budgets/test-budget/accounts/a1/transactions"
@@ -0,0 +1,59 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import json
+
+import pytest
+
+from context import ynab, transport, offline_client
+
+
+def echo(request):
+    rows = json.loads(request.body)["transactions"]
+
+    if any(r["memo"] == "bad" for r in rows):
+        return 400, {"error": {"id": "400", "name": "bad_request", "detail": "invalid memo"}}
+
+    saved = [dict(r, id=r.get("id") or f"new-{r['amount']}") for r in rows]
+    return 200, {"data": {"transactions": saved}}
+
+
+@pytest.fixture()
+def bulk_transport(transport):
+    transport.routes[("PATCH", "transactions")] = echo
+    transport.routes[("POST", "transactions")] = echo
+    return transport
+
+
+def make(count, bad=(), with_id=False):
+    return [
+        ynab.Transaction(
+            id=f"t{i}" if with_id else None, amount=i, account_id="a1", date="2024-01-01",
+            memo="bad" if i in bad else "ok",
+        )
+        for i in range(count)
+    ]
+
+
+def test_batches_split_into_chunks(offline_client, bulk_transport):
+    saved = offline_client.transactions.save_many(make(10, with_id=True) + make(5), chunk_size=4)
+
+    assert len(saved) == 15
+    assert sorted(r.method for r in bulk_transport.requests) == ["PATCH"] * 3 + ["POST"] * 2
+
+
+def test_bad_row_isolated(offline_client, bulk_transport):
+    result = offline_client.transactions.bulk_save(make(8, bad={5}), chunk_size=8)
+
+    assert [e.transaction.amount for e in result.errors] == [5]
+    assert len(result.saved) == 7
+    assert result.chunks[0].requests == 7
+
+
+def test_save_many_raises_after_saving_good_rows(offline_client, bulk_transport):
+    with pytest.raises(ynab.BulkWriteError) as error:
+        offline_client.transactions.save_many(make(6, bad={0}), chunk_size=2)
+
+    assert len(error.value.result.saved) == 5
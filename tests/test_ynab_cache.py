@@ -0,0 +1,147 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import pytest
+
+from context import ynab, transport
+
+CATEGORIES = {
+    "data": {
+        "category_groups": [
+            {"name": "Bills", "categories": [{"id": f"c{i}", "name": f"Category {i}"} for i in range(200)]}
+        ],
+        "server_knowledge": 5,
+    }
+}
+
+
+def categories_route(request):
+    if "last_knowledge_of_server" in request.url:
+        return 200, {"data": {"category_groups": [], "server_knowledge": 5}}
+
+    return 200, CATEGORIES
+
+
+class FakeClock(object):
+    now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_client(transport, cache) -> ynab.YNABBudgetClient:
+    return ynab.YNABBudgetClient(
+        "test-budget", "t", transport=transport, rate_limiter=ynab.RateLimiter(), cache=cache
+    )
+
+
+@pytest.fixture(params=["memory", "disk"])
+def cache(request, tmp_path) -> ynab.ResponseCache:
+    if request.param == "memory":
+        return ynab.MemoryCache()
+    return ynab.DiskCache(str(tmp_path / "cache.sqlite"))
+
+
+def test_repeated_lookups_use_one_request(transport, cache):
+    transport.routes[("GET", "categories")] = categories_route
+    client = make_client(transport, cache)
+
+    for i in range(200):
+        assert client.categories.get_by_name(f"Category {i}").id == f"c{i}"
+
+    assert len(transport.requests) == 1
+
+
+def test_writes_invalidate_budget(transport, cache):
+    transport.routes[("GET", "categories")] = CATEGORIES
+    transport.routes[("POST", "transactions")] = {"data": {"transaction": {"id": "t1"}}}
+    client = make_client(transport, cache)
+
+    client.categories.get_all()
+    client.transactions.create_transaction(ynab.Transaction(amount=100))
+    client.categories.get_all()
+
+    assert [r.method for r in transport.requests] == ["GET", "POST", "GET"]
+
+
+def test_cache_is_scoped_to_server_and_token(transport, cache):
+    transport.routes[("GET", "categories")] = CATEGORIES
+    clients = [
+        make_client(transport, cache),
+        ynab.YNABBudgetClient("test-budget", "other", transport=transport, rate_limiter=ynab.RateLimiter(), cache=cache),
+        ynab.YNABBudgetClient(
+            "test-budget", "t", base_url="http://other", transport=transport, rate_limiter=ynab.RateLimiter(), cache=cache
+        ),
+    ]
+
+    for client in clients:
+        client.categories.get_all()
+    clients[0].categories.get_all()
+
+    assert len(transport.requests) == 3
+    assert cache.hits == 1
+
+
+def test_ttl_expiry(transport):
+    clock = FakeClock()
+    transport.routes[("GET", "categories")] = CATEGORIES
+    client = make_client(transport, ynab.MemoryCache(ttl=10, clock=clock))
+
+    client.categories.get_all()
+    clock.now = 11
+    client.categories.get_all()
+
+    assert len(transport.requests) == 2
+
+
+def test_lru_eviction(transport):
+    cache = ynab.MemoryCache(maxsize=1)
+    transport.routes[("GET", "categories")] = CATEGORIES
+    transport.routes[("GET", "accounts")] = {"data": {"accounts": []}}
+    client = make_client(transport, cache)
+
+    client.categories.get_all()
+    client.accounts.get_all()
+    client.categories.get_all()
+
+    assert len(cache) == 1
+    assert len(transport.requests) == 3
+
+
+def test_read_racing_a_write_is_not_cached(transport, cache):
+    client = make_client(transport, cache)
+
+    def categories_during_write(request):
+        # The write lands while this read is in flight
+        cache.invalidate("budgets/test-budget")
+        return 200, CATEGORIES
+
+    transport.routes[("GET", "categories")] = categories_during_write
+    client.categories.get_all()
+    transport.routes[("GET", "categories")] = CATEGORIES
+    client.categories.get_all()
+
+    assert len(transport.requests) == 2
+
+
+def test_read_during_write_is_dropped_after_it(transport, cache):
+    client = make_client(transport, cache)
+    transport.routes[("GET", "categories")] = CATEGORIES
+
+    def post_transaction(request):
+        # A read sent while the write is processed sees pre-write data
+        client.categories.get_all()
+        return 201, {"data": {"transaction": {"id": "t1"}}}
+
+    transport.routes[("POST", "transactions")] = post_transaction
+    client.transactions.create_transaction(ynab.Transaction(amount=100))
+    client.categories.get_all()
+
+    assert [r.method for r in transport.requests] == ["POST", "GET", "GET"]
+
+
+def test_response_cache_is_abstract():
+    with pytest.raises(TypeError):
+        ynab.ResponseCache()
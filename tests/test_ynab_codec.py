@@ -0,0 +1,65 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import json
+
+import pytest
+
+from context import ynab, transport
+
+DATA = {"data": {"transactions": [{"id": "t1", "memo": "café ☕", "amount": -1500, "approved": True}]}}
+
+
+def codecs():
+    available = []
+
+    for name in ("json", "orjson", "msgspec"):
+        try:
+            available.append(ynab.default_codec(name))
+        except ImportError:
+            pass
+
+    return available
+
+
+@pytest.mark.parametrize("codec", codecs(), ids=lambda c: c.name)
+def test_round_trip(codec):
+    encoded = codec.dumps(DATA)
+
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded) == DATA
+    assert codec.loads(json.dumps(DATA).encode("utf-8")) == DATA
+
+
+def test_default_prefers_installed_backend():
+    pytest.importorskip("orjson")
+
+    assert isinstance(ynab.default_codec(), ynab.OrjsonCodec)
+
+    with pytest.raises(ValueError):
+        ynab.default_codec("yaml")
+
+
+@pytest.mark.parametrize("codec", codecs(), ids=lambda c: c.name)
+def test_client_uses_codec(transport, codec):
+    def echo(request):
+        assert request.headers["Content-Type"] == "application/json"
+        sent = json.loads(request.body)["transactions"]
+        return 201, {"data": {"transactions": [dict(t, id=f"new-{i}") for i, t in enumerate(sent)]}}
+
+    transport.routes[("POST", "transactions")] = echo
+    client = ynab.YNABBudgetClient(
+        "test-budget", "t", transport=transport, rate_limiter=ynab.RateLimiter(), codec=codec
+    )
+
+    split = ynab.Transaction(account_id="a1", date="2024-01-01", memo="café", subtransactions=[
+        ynab.Subtransaction(amount=-1000, category_id="c1"), ynab.Subtransaction(amount=-500, category_id="c2"),
+    ])
+    saved = client.transactions.create_transaction([split])
+
+    assert client.transactions.codec is codec
+    assert saved[0].id == "new-0"
+    assert saved[0].amount == -1500 and saved[0].category_id is None
+    assert saved[0].memo == "café"
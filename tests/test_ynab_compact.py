@@ -0,0 +1,64 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import pytest
+
+from context import ynab, transport
+
+TRANSACTION = {
+    "id": "t1", "date": "2024-01-01", "amount": -3000, "payee_name": "Cafe", "flag_name": "Red",
+    "subtransactions": [
+        {"id": "s1", "transaction_id": "t1", "amount": -1000, "category_id": "c1", "debt_type": None},
+        {"id": "s2", "transaction_id": "t1", "amount": -2000, "category_id": "c2", "debt_type": None},
+    ],
+}
+
+
+def test_compact_matches_dataclass():
+    regular = ynab.Transaction.from_dict(dict(TRANSACTION))
+    compact = ynab.CompactTransaction.from_dict(dict(TRANSACTION))
+
+    assert not hasattr(compact, "__dict__")
+    assert compact.save_transaction == regular.save_transaction
+    assert compact.meta == regular.meta == {"flag_name": "Red"}
+    assert repr(compact) == repr(regular)
+    assert isinstance(compact.subtransactions[0], ynab.CompactSubtransaction)
+    assert compact.subtransactions[0].meta == {"debt_type": None}
+
+
+def test_meta_keys_shared_between_objects():
+    first = ynab.CompactTransaction.from_dict(dict(TRANSACTION))
+    second = ynab.CompactTransaction.from_dict(dict(TRANSACTION, id="t2"))
+
+    assert first._meta_keys is second._meta_keys
+
+
+def test_from_dict_leaves_input_untouched():
+    data = dict(TRANSACTION)
+
+    ynab.Transaction.from_dict(data)
+
+    assert "subtransactions" in data
+
+
+def test_slots_reject_unknown_attributes():
+    account = ynab.CompactAccount.from_dict(api=None, data={"id": "a1", "name": "Checking"})
+
+    with pytest.raises(AttributeError):
+        account.nickname = "Main"
+
+
+def test_client_parses_into_compact_models(transport):
+    transport.routes[("GET", "accounts")] = {"data": {"accounts": [{"id": "a1", "name": "Checking"}]}}
+    transport.routes[("GET", "transactions")] = {"data": {"transactions": [TRANSACTION]}}
+    client = ynab.YNABBudgetClient(
+        "test-budget", "t", transport=transport, rate_limiter=ynab.RateLimiter(), compact_models=True
+    )
+
+    account = client.accounts.get_all()[0]
+
+    assert isinstance(account, ynab.CompactAccount)
+    assert account.api is client.accounts
+    assert isinstance(next(client.transactions.iter_all()), ynab.CompactTransaction)
@@ -0,0 +1,89 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import json
+
+from context import ynab, transport, offline_client
+
+EXISTING = [
+    ynab.Transaction(id="t1", account_id="a1", date="2024-01-02", amount=-5000, payee_name="Cafe",
+                     import_id="YNAB:-5000:2024-01-02:1"),
+    ynab.Transaction(id="t2", account_id="a1", date="2024-01-03", amount=-1200, payee_name="Bakery"),
+]
+
+
+def row(amount, date, payee, import_id=None):
+    return ynab.Transaction(account_id="a1", date=date, amount=amount, payee_name=payee, import_id=import_id)
+
+
+def test_import_id_and_fingerprint_duplicates():
+    index = ynab.DedupIndex(EXISTING)
+    batch = [
+        row(-5000, "2024-01-02", "Cafe", "YNAB:-5000:2024-01-02:1"),
+        row(-5000, "2024-01-02", "Cafe", "YNAB:-5000:2024-01-02:2"),
+        row(-1200, "2024-01-03", "BAKERY"),
+        row(-1200, "2024-01-03", "Bakery"),
+    ]
+
+    to_save, duplicates, updates = index.resolve(batch)
+
+    assert [t.import_id for t in duplicates] == ["YNAB:-5000:2024-01-02:1", None]
+    assert [t.import_id for t in to_save] == ["YNAB:-5000:2024-01-02:2", None]
+    assert updates == []
+
+
+def test_duplicates_converted_to_updates():
+    existing = ynab.Transaction.from_dict({
+        "id": "t2", "account_id": "a1", "date": "2024-01-03", "amount": -1200, "payee_name": "Bakery",
+        "category_id": "c1", "memo": "bread", "cleared": "reconciled", "flag_color": "red", "import_id": "i1",
+    })
+    # The bank corrected the amount of a row it already exported
+    to_save, duplicates, updates = ynab.DedupIndex([existing]).resolve(
+        [row(-1250, "2024-01-03", "BAKERY", "i1")], on_duplicate="update"
+    )
+
+    assert to_save == updates
+    assert duplicates == []
+    # Only the imported amount changed - category, memo, cleared and flag are kept
+    assert updates[0].update_payload == {"id": "t2", "amount": -1250}
+    assert existing.amount == -1200
+
+
+def test_bulk_save_reports_converted_rows(offline_client, transport):
+    transport.routes[("PATCH", "transactions")] = lambda request: (
+        200, {"data": {"transactions": json.loads(request.body)["transactions"]}}
+    )
+    index = ynab.DedupIndex(EXISTING)
+
+    result = offline_client.transactions.bulk_save(
+        [row(-5000, "2024-01-02", "Cafe", "YNAB:-5000:2024-01-02:1"), row(-1200, "2024-01-03", "Bakery")],
+        dedup=index,
+        on_duplicate="update",
+    )
+
+    assert result.skipped == []
+    assert [t.id for t in result.converted] == ["t1", "t2"]
+    # Neither import differs from the transaction it duplicates
+    assert [t.id for t in result.unchanged] == ["t1", "t2"]
+    assert transport.requests == []
+
+
+def test_index_follows_api_responses(offline_client, transport):
+    def created(request):
+        rows = json.loads(request.body)["transactions"]
+        return 200, {"data": {"transactions": [dict(r, id=f"n{i}") for i, r in enumerate(rows)]}}
+
+    transport.routes[("GET", "transactions")] = {"data": {"transactions": [], "server_knowledge": 1}}
+    transport.routes[("POST", "transactions")] = created
+    index = ynab.DedupIndex.from_api(offline_client.transactions)
+    batch = [row(-300, "2024-02-01", "Deli", "YNAB:-300:2024-02-01:1")]
+
+    offline_client.transactions.save_many(batch, dedup=index)
+    result = offline_client.transactions.bulk_save(batch, dedup=index)
+
+    assert len(index) == 1
+    assert result.saved == []
+    assert result.skipped == batch
+    assert [r.method for r in transport.requests] == ["GET", "POST"]
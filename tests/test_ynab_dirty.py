@@ -0,0 +1,79 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import json
+
+import pytest
+
+from context import ynab, transport, offline_client
+
+ROWS = [
+    {"id": f"t{i}", "date": "2024-01-01", "amount": -1000 * i, "account_id": "a1", "payee_id": "p1",
+     "payee_name": "Grocer", "category_id": "c1", "cleared": "uncleared", "subtransactions": []}
+    for i in range(10)
+]
+
+
+@pytest.fixture()
+def sent(transport):
+    bodies = []
+
+    def patch(request):
+        body = json.loads(request.body)["transactions"]
+        bodies.append(body)
+        return 200, {"data": {"transactions": [dict(ROWS[int(t["id"][1:])], **t) for t in body]}}
+
+    transport.routes[("GET", "transactions")] = {"data": {"transactions": ROWS, "server_knowledge": 1}}
+    transport.routes[("PATCH", "transactions")] = patch
+    return bodies
+
+
+@pytest.mark.parametrize("model", [ynab.Transaction, ynab.CompactTransaction])
+def test_loaded_transactions_track_changes(model):
+    transaction = model.from_dict(dict(ROWS[1], subtransactions=[{"id": "s1", "amount": -1000, "category_id": "c2"}]))
+
+    assert not transaction.is_dirty
+    assert transaction.update_payload == {"id": "t1"}
+
+    transaction.memo = "checked"
+    transaction.subtransactions[0].category_id = "c3"
+
+    assert transaction.dirty_fields == {"memo", "subtransactions"}
+    assert transaction.update_payload == {
+        "id": "t1", "memo": "checked", "amount": -1000, "category_id": None,
+        "subtransactions": [{"amount": -1000, "payee_id": None, "category_id": "c3", "memo": None}],
+    }
+
+
+def test_new_transactions_are_dirty():
+    transaction = ynab.Transaction(id="t1", amount=-5)
+
+    assert transaction.is_dirty
+    assert transaction.update_payload == transaction.save_transaction
+
+
+def test_save_many_sends_only_changed_rows(offline_client, sent):
+    transactions = offline_client.transactions.get_all()
+    transactions[2].category_id = "c2"
+    transactions[5].payee_name = "Bakery"
+    transactions[5].payee_id = None
+
+    result = offline_client.transactions.bulk_save(transactions)
+
+    assert sent == [[{"id": "t2", "category_id": "c2"}, {"id": "t5", "payee_name": "Bakery"}]]
+    assert len(result.saved) == 2 and len(result.unchanged) == 8
+    assert not transactions[2].is_dirty
+
+    assert offline_client.transactions.save_many(transactions) == []
+    assert len(sent) == 1
+
+
+def test_only_dirty_off_sends_everything(offline_client, sent):
+    transactions = offline_client.transactions.get_all()
+
+    offline_client.transactions.save_many(transactions, only_dirty=False)
+
+    assert len(sent[0]) == 10
+    assert sent[0][0] == transactions[0].save_transaction
@@ -0,0 +1,129 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import csv
+import json
+import tracemalloc
+
+import pytest
+
+from context import ynab, transport, offline_client
+
+TRANSACTIONS = {
+    "data": {
+        "transactions": [
+            {
+                "id": "t1", "date": "2024-01-02", "amount": -3000, "memo": "weekly", "cleared": "cleared",
+                "approved": True, "account_id": "a1", "payee_name": "Grocer", "category_id": "split",
+                "debt_transaction_type": None, "subtransactions": [
+                    {"id": "s1", "amount": -2000, "category_id": "c1", "memo": None},
+                    {"id": "s2", "amount": -1000, "category_id": "c2", "payee_name": "Pharmacy"},
+                    {"id": "s3", "amount": -5, "category_id": "c3", "deleted": True},
+                ],
+            },
+            {"id": "t2", "date": "2024-01-03", "amount": 500, "account_id": "a1", "category_id": "c1", "subtransactions": []},
+        ]
+    }
+}
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_export_transactions_to_csv_flattens_splits(transport, offline_client, tmp_path):
+    transport.routes[("GET", "transactions")] = TRANSACTIONS
+
+    stats = offline_client.transactions.export(tmp_path / "transactions.csv", batch_size=2)
+    rows = read_csv(tmp_path / "transactions.csv")
+
+    assert (stats.format, stats.rows, stats.batches) == ("csv", 3, 2)
+    assert [(r["id"], r["subtransaction_id"], r["amount"], r["category_id"]) for r in rows] == [
+        ("t1", "s1", "-2000", "c1"),
+        ("t1", "s2", "-1000", "c2"),
+        ("t2", "", "500", "c1"),
+    ]
+    # Splits keep the parent's memo and payee unless they have their own
+    assert [r["memo"] for r in rows] == ["weekly", "weekly", ""]
+    assert [r["payee_name"] for r in rows] == ["Grocer", "Pharmacy", ""]
+    assert rows[0]["date"] == "2024-01-02" and rows[0]["approved"] == "True"
+    assert "meta" not in rows[0]
+
+
+def test_export_without_expanding_splits_with_meta(transport, offline_client, tmp_path):
+    transport.routes[("GET", "transactions")] = TRANSACTIONS
+
+    stats = offline_client.transactions.export(tmp_path / "out.csv", expand_splits=False, include_meta=True)
+    rows = read_csv(tmp_path / "out.csv")
+
+    assert stats.rows == 2
+    assert json.loads(rows[0]["meta"]) == {"debt_transaction_type": None}
+    assert rows[0]["amount"] == "-3000"
+
+
+def test_export_accounts_and_categories(tmp_path):
+    budget = ynab.SyntheticBudget(transactions=10, accounts=3, category_groups=2, categories_per_group=4)
+
+    with ynab.MockYNABServer(budget) as server:
+        client = ynab.YNABBudgetClient(budget.id, "t", base_url=server.url, rate_limiter=ynab.RateLimiter())
+        accounts = client.accounts.export(tmp_path / "accounts.csv")
+        categories = client.categories.export(tmp_path / "categories.csv")
+
+    assert accounts.rows == 3
+    assert [r["id"] for r in read_csv(tmp_path / "accounts.csv")] == [a["id"] for a in budget.accounts]
+    assert categories.rows == 8
+    first = read_csv(tmp_path / "categories.csv")[0]
+    assert first["category_group_name"] == budget.category_groups[0]["name"]
+
+
+def test_export_memory_is_bounded(tmp_path):
+    budget = ynab.SyntheticBudget(transactions=5000)
+
+    with ynab.MockYNABServer(budget) as server:
+        client = ynab.YNABBudgetClient(budget.id, "t", base_url=server.url, rate_limiter=ynab.RateLimiter())
+        # Warm the server's response cache so only the client is measured
+        client.transactions.export(tmp_path / "warm.csv")
+
+        tracemalloc.start()
+        client.transactions.get_all()
+        _, loaded = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        stats = client.transactions.export(tmp_path / "transactions.csv", batch_size=200)
+        _, exported = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    assert stats.rows >= 5000
+    assert exported * 4 < loaded
+
+
+def test_resolve_format(tmp_path):
+    assert ynab.__export.resolve_format("x.csv") == "csv"
+
+    with pytest.raises(ValueError):
+        ynab.__export.resolve_format("x", "xlsx")
+
+    if ynab.__export.pa is None:
+        assert ynab.__export.resolve_format("export") == "csv"
+        with pytest.raises(ImportError):
+            ynab.__export.resolve_format("x.parquet")
+
+
+@pytest.mark.parametrize("name", ["transactions.parquet", "transactions.arrow"])
+def test_export_columnar(transport, offline_client, tmp_path, name):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    transport.routes[("GET", "transactions")] = TRANSACTIONS
+    path = tmp_path / name
+
+    stats = offline_client.transactions.export(path, include_meta=True)
+    table = pq.read_table(path) if stats.format == "parquet" else ynab.read_arrow(path)
+
+    assert table.num_rows == 3
+    assert table.column("amount").to_pylist() == [-2000, -1000, 500]
+    assert str(table.schema.field("date").type) == "date32[day]"
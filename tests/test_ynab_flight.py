@@ -0,0 +1,137 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from context import ynab, transport, offline_client
+
+CALLERS = 8
+
+TRANSACTIONS = {
+    "data": {
+        "transactions": [
+            {"id": "t1", "date": "2024-01-01", "amount": -1000, "account_id": "a1", "subtransactions": []},
+            {"id": "t2", "date": "2024-01-02", "amount": -2000, "account_id": "a2", "subtransactions": []},
+        ],
+        "server_knowledge": 3,
+    }
+}
+
+
+def held_route(flight: ynab.SingleFlight, waiters: int, status: int = 200):
+    """
+    Holds the request until waiters callers have joined the flight
+    """
+    def route(request):
+        deadline = time.monotonic() + 5
+        while flight.shared < waiters and time.monotonic() < deadline:
+            time.sleep(0.001)
+        return status, TRANSACTIONS
+
+    return route
+
+
+def test_concurrent_identical_gets_send_one_request(transport, offline_client):
+    transport.routes[("GET", "transactions")] = held_route(offline_client.single_flight, CALLERS - 1)
+
+    with ThreadPoolExecutor(max_workers=CALLERS) as executor:
+        results = list(executor.map(lambda _: offline_client.transactions.get_all(), range(CALLERS)))
+
+    assert len(transport.requests) == 1
+    assert offline_client.single_flight.shared == CALLERS - 1
+    assert offline_client.single_flight.in_flight == 0
+    assert all(r == results[0] for r in results)
+    # Models are mutable - every caller builds its own from the shared response
+    assert results[0][0] is not results[1][0]
+
+
+def test_waiters_receive_leader_exception(transport, offline_client):
+    transport.routes[("GET", "transactions")] = held_route(offline_client.single_flight, CALLERS - 1, status=400)
+
+    def call(_):
+        try:
+            offline_client.transactions.get_all()
+        except requests.exceptions.HTTPError as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=CALLERS) as executor:
+        errors = list(executor.map(call, range(CALLERS)))
+
+    assert len(transport.requests) == 1
+    assert all(isinstance(e, requests.exceptions.HTTPError) for e in errors)
+
+
+def test_different_keys_run_concurrently(offline_client):
+    release = threading.Event()
+    flight = offline_client.single_flight
+
+    def fetch(since_date):
+        return flight.do(("other", since_date), lambda: release.wait(5) and since_date)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(fetch, d) for d in ("2024-01-01", "2024-02-01")]
+        deadline = time.monotonic() + 5
+        while flight.in_flight < 2 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert flight.in_flight == 2
+        release.set()
+
+    assert [f.result() for f in futures] == ["2024-01-01", "2024-02-01"]
+    assert flight.shared == 0
+
+
+def test_sequential_gets_are_not_cached(transport, offline_client):
+    transport.routes[("GET", "transactions")] = TRANSACTIONS
+
+    offline_client.transactions.get_all()
+    offline_client.transactions.get_all()
+
+    assert len(transport.requests) == 2
+
+
+def test_async_callers_share_request(transport):
+    client = ynab.AsyncYNABBudgetClient(
+        "test-budget", "t", transport=transport, rate_limiter=ynab.RateLimiter(), max_workers=CALLERS
+    )
+    transport.routes[("GET", "transactions")] = held_route(client.client.single_flight, CALLERS - 1)
+
+    async def main():
+        return await asyncio.gather(*[client.transactions.get_all() for _ in range(CALLERS)])
+
+    results = asyncio.run(main())
+
+    assert len(transport.requests) == 1
+    assert all(len(r) == 2 for r in results)
+
+
+def test_coalescing_can_be_disabled(transport):
+    client = ynab.YNABBudgetClient(
+        "test-budget", "t", transport=transport, rate_limiter=ynab.RateLimiter(), coalesce=False
+    )
+    transport.routes[("GET", "transactions")] = TRANSACTIONS
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda _: client.transactions.get_all(), range(4)))
+
+    assert client.single_flight is None
+    assert len(transport.requests) == 4
+
+
+@pytest.mark.parametrize("coalesce", [True, False])
+def test_manager_shares_single_flight(transport, coalesce):
+    with ynab.YNABClientManager("t", ["b1", "b2"], transport=transport, coalesce=coalesce) as manager:
+        flights = {id(manager[b].single_flight) for b in ("b1", "b2")}
+
+        if coalesce:
+            assert flights == {id(manager.single_flight)}
+            assert manager.budgets.single_flight is manager.single_flight
+        else:
+            assert manager.single_flight is None and flights == {id(None)}
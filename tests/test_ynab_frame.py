@@ -0,0 +1,70 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import pytest
+
+from context import ynab, transport, offline_client
+
+np = pytest.importorskip("numpy")
+
+ROWS = [
+    {"id": "t1", "date": "2024-01-03", "amount": -5000, "account_id": "a1", "category_id": "food",
+     "payee_id": "p1", "payee_name": "Grocer"},
+    {"id": "t2", "date": "2024-01-20", "amount": -7000, "account_id": "a2", "category_id": None,
+     "payee_id": "p2", "subtransactions": [
+         {"id": "s1", "amount": -3000, "category_id": "food"},
+         {"id": "s2", "amount": -4000, "category_id": "fun", "payee_id": "p3"},
+     ]},
+    {"id": "t3", "date": "2024-02-01", "amount": -1000, "account_id": "a1", "category_id": "fun", "payee_id": "p1"},
+    {"id": "t4", "date": "2024-02-02", "amount": -9999, "account_id": "a1", "category_id": "fun", "deleted": True},
+]
+
+
+def test_sum_by_month_and_category():
+    frame = ynab.TransactionFrame.from_rows(ROWS)
+
+    assert frame.sum_by("month", "category") == {
+        ("2024-01", "food"): -8000,
+        ("2024-01", "fun"): -4000,
+        ("2024-02", "fun"): -1000,
+    }
+    assert frame.amount.dtype == np.int64
+    assert frame.total() == -13000
+
+
+def test_splits_inherit_parent_payee_and_account():
+    frame = ynab.TransactionFrame.from_rows(ROWS)
+
+    assert frame.sum_by("payee") == {("p1",): -6000, ("p2",): -3000, ("p3",): -4000}
+    assert frame.sum_by("account") == {("a1",): -6000, ("a2",): -7000}
+
+
+def test_unexpanded_splits():
+    frame = ynab.TransactionFrame.from_rows(ROWS, expand_splits=False)
+
+    assert len(frame) == 3
+    assert frame.sum_by("category")[(None,)] == -7000
+
+
+def test_date_range():
+    frame = ynab.TransactionFrame.from_rows(ROWS).between("2024-01-10", "2024-01-31")
+
+    assert list(frame.ids) == ["s1", "s2"]
+    assert list(frame.column("account")) == ["a2", "a2"]
+
+
+def test_from_transactions_matches_rows():
+    transactions = [ynab.Transaction.from_dict(dict(r)) for r in ROWS]
+
+    assert ynab.TransactionFrame.from_transactions(transactions).sum_by("month", "payee") == \
+        ynab.TransactionFrame.from_rows(ROWS).sum_by("month", "payee")
+
+
+def test_to_frame_streams_from_api(offline_client, transport):
+    transport.routes[("GET", "transactions")] = {"data": {"transactions": ROWS, "server_knowledge": 1}}
+
+    frame = offline_client.transactions.to_frame()
+
+    assert len(frame) == 4
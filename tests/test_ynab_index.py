@@ -0,0 +1,97 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import pytest
+
+from context import ynab, transport, offline_client
+
+
+def category_groups(request, delete_on_delta=False):
+    if "last_knowledge_of_server" in request.url:
+        deleted = [{"id": "c3", "name": "Gifts", "deleted": True}] if delete_on_delta else []
+        groups = [{"name": "Savings", "categories": deleted}]
+    else:
+        groups = [
+            {"name": "Bills", "categories": [{"id": "c1", "name": "Gifts"}, {"id": "c2", "name": "Rent"}]},
+            {"name": "Savings", "categories": [{"id": "c3", "name": "Gifts"}]},
+        ]
+
+    return 200, {"data": {"category_groups": groups, "server_knowledge": 2}}
+
+
+def test_lookup_by_id_and_name():
+    index = ynab.NameIndex()
+    index.update([ynab.Account(id="a1", name="Checking"), ynab.Account(id="a2", name="Savings")])
+
+    assert index.get("a2").name == "Savings"
+    assert index.get_by_name("checking", case_sensitive=False).id == "a1"
+    assert index.get_by_name("checking") is None
+
+
+def test_update_replaces_and_removes():
+    index = ynab.NameIndex()
+    index.update([ynab.Account(id="a1", name="Checking")])
+    index.update([ynab.Account(id="a1", name="Joint Checking")])
+
+    assert index.get_by_name("Checking") is None
+    assert index.get_by_name("Joint Checking").id == "a1"
+
+    index.update([ynab.Account(id="a1", name="Joint Checking", deleted=True)])
+    assert len(index) == 0
+
+
+def test_category_names_scoped_by_group(offline_client, transport):
+    transport.routes[("GET", "categories")] = category_groups
+
+    with pytest.raises(ynab.AmbiguousNameError):
+        offline_client.categories.get_by_name("Gifts")
+
+    assert offline_client.categories.get_by_name("Gifts", group_name="Savings").id == "c3"
+    assert offline_client.categories.get_by_name("RENT", case_sensitive=False).id == "c2"
+
+
+def test_index_follows_deltas(offline_client, transport):
+    transport.routes[("GET", "categories")] = lambda r: category_groups(r, delete_on_delta=True)
+    offline_client.sync.sync_categories()
+    offline_client.sync.sync_categories()
+
+    # The delta deletes the second "Gifts", which makes the name unique again
+    assert offline_client.categories.get_by_name("Gifts").id == "c1"
+
+
+def test_lookups_refresh_on_miss_age_or_request(offline_client, transport):
+    transport.routes[("GET", "categories")] = category_groups
+    clock = [0.0]
+    offline_client.sync._clock = lambda: clock[0]
+    offline_client.sync.max_age = 60
+
+    offline_client.categories.get_by_name("Rent")
+    offline_client.categories.get_by_name("Rent")
+    assert len(transport.requests) == 1
+
+    # A name that isn't indexed pulls one delta before giving up
+    assert offline_client.categories.get_by_name("Groceries") is None
+    assert len(transport.requests) == 2
+
+    offline_client.categories.get_by_name("Rent", refresh=True)
+    assert len(transport.requests) == 3
+
+    clock[0] = 61
+    offline_client.categories.get_by_name("Rent")
+    offline_client.categories.get_by_name("Rent")
+    assert len(transport.requests) == 4
+
+
+def test_payees_indexed_from_transactions(offline_client, transport):
+    transport.routes[("GET", "transactions")] = {
+        "data": {
+            "transactions": [{"id": "t1", "payee_id": "p1", "payee_name": "Grocer", "account_id": "a1"}],
+            "server_knowledge": 1,
+        }
+    }
+
+    offline_client.sync.sync_transactions()
+
+    assert offline_client.sync.index.payees.get_by_name("Grocer").id == "p1"
@@ -0,0 +1,109 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import logging
+import time
+
+import pytest
+
+from context import ynab, transport
+from ynab.__instrument import endpoint_template
+
+TRANSACTIONS = {"data": {"transactions": [{"id": f"t{i}", "amount": -i} for i in range(5)], "server_knowledge": 1}}
+
+
+@pytest.fixture()
+def instrumented(transport):
+    metrics, spans = ynab.MetricsCollector(), ynab.SpanRecorder()
+    client = ynab.YNABBudgetClient(
+        "test-budget", "t",
+        transport=transport,
+        rate_limiter=ynab.RateLimiter(sleep=lambda seconds: None),
+        instrumentation=ynab.Instrumentation(metrics, spans),
+    )
+    return client, metrics, spans
+
+
+def test_endpoint_template():
+    assert endpoint_template("/v1/budgets/b1/accounts/a1/transactions") == "budgets/{id}/accounts/{id}/transactions"
+    assert endpoint_template("/v1/budgets/b1/transactions/") == "budgets/{id}/transactions"
+
+
+def test_requests_retries_and_parse_time(transport, instrumented):
+    client, metrics, _ = instrumented
+    responses = [(503, {}), (200, TRANSACTIONS)]
+    transport.routes[("GET", "transactions")] = lambda request: responses.pop(0)
+
+    client.transactions.get_all()
+
+    key = ("GET", "budgets/{id}/transactions")
+    assert metrics.latency[key].count == 2
+    assert metrics.retries[key] == 1
+    assert metrics.responses[key + ("503",)] == 1 and metrics.responses[key + ("200",)] == 1
+    assert metrics.response_bytes[key] > 0
+    assert metrics.parsed_items[("transactions", "build")] == 5
+    assert metrics.parse_time[("budgets/{id}/transactions", "decode")].count == 1
+    assert metrics.snapshot()["requests"]["GET budgets/{id}/transactions"]["retries"] == 1
+
+
+def test_prometheus_text(transport, instrumented):
+    client, metrics, _ = instrumented
+    transport.routes[("GET", "transactions")] = TRANSACTIONS
+
+    client.transactions.get_all()
+    text = metrics.to_prometheus()
+
+    assert "# TYPE ynab_request_duration_seconds histogram" in text
+    assert 'ynab_request_duration_seconds_bucket{method="GET",endpoint="budgets/{id}/transactions",le="+Inf"} 1' in text
+    assert 'ynab_parsed_items_total{resource="transactions",stage="build"} 5' in text
+
+
+def test_parse_spans_are_children_of_the_request(transport, instrumented):
+    client, _, spans = instrumented
+    transport.routes[("GET", "transactions")] = TRANSACTIONS
+
+    client.transactions.get_all()
+    request, decode, build = spans.spans
+
+    assert request["name"] == "GET budgets/{id}/transactions"
+    assert request["attributes"]["http.response.status_code"] == 200
+    assert decode["parent_span_id"] == build["parent_span_id"] == request["span_id"]
+    assert decode["trace_id"] == request["trace_id"]
+    assert build["attributes"]["ynab.items"] == 5
+
+
+def test_parse_spans_cover_the_parse(transport, instrumented):
+    client, _, spans = instrumented
+    transport.routes[("GET", "transactions")] = {
+        "data": {"transactions": [{"id": f"t{i}", "amount": -i} for i in range(20000)]}
+    }
+
+    started = time.time()
+    client.transactions.get_all()
+    finished = time.time()
+    request, decode, build = spans.spans
+
+    # Start times are taken before the work, so the spans end before get_all returns
+    assert int(started * 1e9) <= decode["start_time_unix_nano"] <= build["start_time_unix_nano"]
+    assert build["end_time_unix_nano"] <= (finished + 0.001) * 1e9
+
+
+def test_failing_hook_does_not_fail_requests(transport, caplog):
+    class Broken(ynab.Hook):
+        def post_response(self, event):
+            raise RuntimeError("boom")
+
+    transport.routes[("GET", "accounts")] = {"data": {"accounts": [{"id": "a1"}]}}
+    client = ynab.YNABBudgetClient(
+        "test-budget", "t", transport=transport, rate_limiter=ynab.RateLimiter(),
+        instrumentation=ynab.Instrumentation(Broken(), ynab.LoggingHook(level=logging.INFO)),
+    )
+
+    with caplog.at_level(logging.INFO, logger="ynab"):
+        assert client.accounts.get_all()[0].id == "a1"
+
+    assert "failed in post_response" in caplog.text
+    assert "GET budgets/{id}/accounts -> 200" in caplog.text
+    assert "accounts build: 1 item(s)" in caplog.text
@@ -0,0 +1,69 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import asyncio
+
+import pytest
+import requests
+
+from context import ynab
+
+
+@pytest.fixture()
+def server():
+    budgets = [ynab.SyntheticBudget(transactions=20 * (i + 1), budget_id=f"budget-{i}", seed=i) for i in range(3)]
+
+    with ynab.MockYNABServer(*budgets) as server:
+        yield server
+
+
+@pytest.fixture()
+def manager(server):
+    with ynab.YNABClientManager(
+        "mock-token", base_url=server.url, rate_limiter=ynab.RateLimiter(), max_workers=4, cache=ynab.MemoryCache()
+    ) as manager:
+        yield manager
+
+
+def test_clients_share_resources(manager):
+    manager.discover()
+    first, second = manager["budget-0"], manager["budget-1"]
+
+    assert manager.budget_ids == ["budget-0", "budget-1", "budget-2"]
+    assert first.session is second.session is manager.session
+    assert first.rate_limiter is second.rate_limiter
+    assert first.cache is manager.cache
+    assert manager.add("budget-0") is first
+    assert manager.session_config.pool_maxsize >= 4
+
+
+def test_fan_out(manager, server):
+    manager.discover()
+
+    transactions = manager.get_all_transactions()
+    changes = manager.sync_all(["budget-2"])
+
+    assert {b: len(t) for b, t in transactions.items()} == {"budget-0": 20, "budget-1": 40, "budget-2": 60}
+    assert len(changes["budget-2"]["transactions"].created) == 60
+    # The first sync of budget-2 is served from the shared cache
+    assert server.requests[("GET", "transactions")] == 3
+
+
+def test_errors_are_collected(manager):
+    manager.add("budget-0")
+    manager.add("missing")
+
+    results = manager.map(lambda c: c.accounts.get_all(), return_exceptions=True)
+
+    assert len(results["budget-0"]) == 10
+    assert isinstance(results["missing"], requests.exceptions.HTTPError)
+    with pytest.raises(requests.exceptions.HTTPError):
+        manager.map(lambda c: c.accounts.get_all())
+
+
+def test_amap(manager):
+    results = asyncio.run(manager.amap(lambda c: c.budget_id, ["budget-0", "budget-1"]))
+
+    assert results == {"budget-0": "budget-0", "budget-1": "budget-1"}
@@ -0,0 +1,93 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import os
+import runpy
+
+import pytest
+import requests
+
+from context import ynab
+
+
+@pytest.fixture()
+def server():
+    budget = ynab.SyntheticBudget(transactions=300, accounts=3, split_ratio=0.2)
+
+    with ynab.MockYNABServer(budget) as server:
+        yield server
+
+
+@pytest.fixture()
+def client(server):
+    return ynab.YNABBudgetClient(
+        budget_id="mock-budget", pat_token="mock-token", base_url=server.url, rate_limiter=ynab.RateLimiter()
+    )
+
+
+def test_synthetic_budget_is_deterministic():
+    first, second = ynab.SyntheticBudget(transactions=50, seed=3), ynab.SyntheticBudget(transactions=50, seed=3)
+
+    assert first.get_transactions() == second.get_transactions()
+    assert any(t["subtransactions"] for t in ynab.SyntheticBudget(transactions=200, split_ratio=0.5).get_transactions())
+
+
+def test_reads(server, client):
+    transactions = client.transactions.get_all()
+    by_account = client.transactions.get_by_account("account-1")
+
+    assert len(transactions) == 300
+    assert any(t.subtransactions for t in transactions)
+    assert {t.account_id for t in by_account} == {"account-1"}
+    assert client.accounts.get_by_name("Account 2").id == "account-2"
+    assert client.categories.get_by_name("Category 1.1").category_group_name == "Group 1"
+    assert server.requests[("GET", "transactions")] == 1
+
+
+def test_writes_show_up_in_deltas(client):
+    client.sync.sync_transactions()
+
+    saved = client.transactions.save_many(
+        [ynab.Transaction(account_id="account-0", date="2024-01-01", amount=-100 * i, payee_name="New")
+         for i in range(3)],
+    )
+    saved[0].memo = "changed"
+    client.transactions.save(saved[0])
+    changes = client.sync.sync_transactions()
+
+    assert len(saved) == 3 and all(t.id for t in saved)
+    assert len(changes.created) == 3
+    assert client.transactions.get_all()[-3].memo == "changed"
+
+
+def test_unknown_budget(server):
+    client = ynab.YNABBudgetClient(
+        budget_id="missing", pat_token="mock-token", base_url=server.url, rate_limiter=ynab.RateLimiter()
+    )
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.accounts.get_all()
+
+
+def test_benchmark_smoke(capsys):
+    path = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "bench_ynab.py")
+    bench = runpy.run_path(path)
+
+    bench["main"](["--sizes", "50", "--repeat", "1", "--writes", "5"])
+
+    assert "get_all" in capsys.readouterr().out
+
+
+def test_minimal_patch_keeps_splits(server, client):
+    split = next(t for t in client.transactions.get_all() if t.subtransactions)
+    split.cleared = "uncleared" if split.cleared == "cleared" else "cleared"
+
+    client.transactions.save_many([split])
+    saved = next(t for t in client.transactions.get_all() if t.id == split.id)
+
+    assert server.requests[("PATCH", "transactions")] == 1
+    assert saved.cleared == split.cleared
+    assert len(saved.subtransactions) == len(split.subtransactions)
+    assert saved.category_name == "Split"
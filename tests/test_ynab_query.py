@@ -0,0 +1,85 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import pytest
+
+from context import ynab, transport, offline_client
+from ynab import Where
+
+ROWS = [
+    {"id": f"t{i}", "date": f"2024-01-{i % 28 + 1:02d}", "amount": -1000 * i, "account_id": "a1",
+     "payee_name": "Grocer" if i % 10 == 0 else "Cafe", "category_id": "food",
+     "cleared": "reconciled" if i < 50 else "uncleared", "approved": i % 2 == 0, "subtransactions": []}
+    for i in range(200)
+]
+ROWS.append(
+    {"id": "split", "date": "2024-02-01", "amount": -9000, "account_id": "a1", "payee_name": "Market",
+     "category_id": None, "subtransactions": [{"id": "s1", "amount": -9000, "category_id": "fun",
+                                               "payee_name": "Grocer"}]}
+)
+
+
+@pytest.fixture()
+def built(offline_client, transport, monkeypatch):
+    transport.routes[("GET", "transactions")] = {"data": {"transactions": ROWS, "server_knowledge": 1}}
+    transport.routes[("GET", "accounts/a1/transactions")] = {"data": {"transactions": ROWS, "server_knowledge": 1}}
+    transport.routes[("GET", "accounts")] = {"data": {"accounts": [{"id": "a1", "name": "Checking"}]}}
+
+    api = offline_client.transactions
+    count = []
+
+    class Counting(ynab.Transaction):
+        @classmethod
+        def from_dict(cls, data):
+            count.append(data["id"])
+            return super().from_dict(data)
+
+    monkeypatch.setattr(api, "_model", Counting)
+    return count
+
+
+def test_predicates_compose():
+    row = ROWS[10]
+
+    assert Where.payee("Grocer")(row)
+    assert Where.payee("grocer", case_sensitive=False)(row)
+    assert (Where.payee("Grocer") & Where.approved())(row)
+    assert not (Where.payee("Grocer") & ~Where.approved())(row)
+    assert (Where.payee("Nobody") | Where.cleared())(row)
+    assert Where.between("2024-01-11", "2024-01-11")(row)
+    assert not Where.between(end="2024-01-10")(row)
+    assert Where.category("fun")(ROWS[-1]) and not Where.category("food")(ROWS[-1])
+
+
+def test_query_builds_only_matches(offline_client, built):
+    result = list(offline_client.transactions.query(Where.payee("Grocer") & Where.cleared("uncleared")))
+
+    assert [t.id for t in result] == [f"t{i}" for i in range(50, 200, 10)]
+    assert built == [t.id for t in result]
+
+
+def test_query_limit_stops_early(offline_client, built):
+    result = list(offline_client.transactions.query(Where.payee("Grocer"), limit=3))
+
+    assert [t.id for t in result] == ["t0", "t10", "t20"]
+    assert len(built) == 3
+
+
+def test_latest_is_newest_first(offline_client, built):
+    result = offline_client.transactions.latest(2, Where.payee("Grocer"), account_id="a1")
+
+    assert [t.id for t in result] == ["t110", "t80"]
+    assert len(built) == 2
+
+
+def test_account_iterators(offline_client, transport, built):
+    account = offline_client.accounts.get_all()[0]
+
+    first = next(account.iter_transactions(Where.approved(False)))
+    by_payee = account.get_transactions_by_payee("Grocer")
+
+    assert first.id == "t1"
+    assert len(by_payee) == 20
+    assert all(r.url.endswith("accounts/a1/transactions") for r in transport.requests[1:])
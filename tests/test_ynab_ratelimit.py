@@ -0,0 +1,103 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import pytest
+import requests
+
+from context import ynab, transport
+
+ACCOUNTS = {"data": {"accounts": [{"id": "a1", "name": "Checking"}]}}
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_client(transport, limiter) -> ynab.YNABBudgetClient:
+    return ynab.YNABBudgetClient("test-budget", "t", transport=transport, rate_limiter=limiter)
+
+
+def test_bucket_queues_instead_of_failing():
+    clock = FakeClock()
+    limiter = ynab.RateLimiter(ynab.TokenBucket(capacity=2, period=10, clock=clock), sleep=clock.sleep)
+
+    for _ in range(3):
+        limiter.acquire()
+
+    assert clock.sleeps == [pytest.approx(5.0)]
+    assert limiter.metrics()["requests"] == 3
+
+
+def test_429_retried_honoring_retry_after(transport):
+    clock = FakeClock()
+    limiter = ynab.RateLimiter(ynab.TokenBucket(clock=clock), sleep=clock.sleep)
+    responses = [(429, {}, {"Retry-After": "30"}), (200, ACCOUNTS, {"X-Rate-Limit": "150/200"})]
+    transport.routes[("GET", "accounts")] = lambda request: responses.pop(0)
+
+    accounts = make_client(transport, limiter).accounts.get_all()
+
+    assert accounts[0].id == "a1"
+    assert clock.sleeps[0] >= 30
+    metrics = limiter.metrics()
+    assert metrics["retries"] == 1
+    assert metrics["throttled"] == 1
+    assert metrics["server_remaining"] == 50
+    assert metrics["remaining"] <= 50
+
+
+def test_429_wait_is_not_stacked_on_the_bucket(transport):
+    clock = FakeClock()
+    limiter = ynab.RateLimiter(ynab.TokenBucket(clock=clock), sleep=clock.sleep)
+    responses = [(429, {}, {"Retry-After": "5"}), (200, ACCOUNTS)]
+    transport.routes[("GET", "accounts")] = lambda request: responses.pop(0)
+
+    make_client(transport, limiter).accounts.get_all()
+
+    # Retry-After once - not Retry-After and then the refill of a drained bucket
+    assert sum(clock.sleeps) == pytest.approx(5)
+
+
+@pytest.mark.parametrize("method, call", [
+    ("POST", lambda api: api.create_transaction(ynab.Transaction(amount=1))),
+    ("PATCH", lambda api: api.update_transaction([ynab.Transaction(id="t1", amount=1)])),
+])
+def test_writes_not_retried_on_server_error(transport, method, call):
+    clock = FakeClock()
+    limiter = ynab.RateLimiter(ynab.TokenBucket(clock=clock), sleep=clock.sleep)
+    transport.routes[(method, "transactions")] = lambda request: (503, {})
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        call(make_client(transport, limiter).transactions)
+
+    assert len(transport.requests) == 1
+
+
+def test_retries_exhausted(transport):
+    clock = FakeClock()
+    limiter = ynab.RateLimiter(
+        ynab.TokenBucket(clock=clock), ynab.RetryPolicy(max_retries=2), sleep=clock.sleep
+    )
+    transport.routes[("GET", "accounts")] = lambda request: (502, {})
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        make_client(transport, limiter).accounts.get_all()
+
+    assert len(transport.requests) == 3
+
+
+def test_limiter_shared_per_token():
+    first = ynab.YNABBudgetClient("b1", "shared-token")
+    second = ynab.YNABBudgetClient("b2", "shared-token")
+
+    assert first.transactions.rate_limiter is second.accounts.rate_limiter
@@ -0,0 +1,125 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import json
+
+import pytest
+
+from context import ynab, transport, offline_client
+
+
+def transaction(id, account_id, date, amount, cleared="uncleared", **kwargs) -> ynab.Transaction:
+    return ynab.Transaction.from_dict(
+        {"id": id, "account_id": account_id, "date": date, "amount": amount, "cleared": cleared, **kwargs}
+    )
+
+
+@pytest.fixture()
+def reconciler() -> ynab.Reconciler:
+    return ynab.Reconciler(
+        [
+            transaction("t1", "a1", "2024-01-03", -5000),
+            transaction("t2", "a1", "2024-01-10", -5000),
+            transaction("t3", "a1", "2024-01-12", -12000, cleared="reconciled"),
+            transaction("t4", "a1", "2024-01-20", -800),
+            transaction("t5", "a1", "2024-02-20", -800),
+            transaction("t6", "a2", "2024-01-05", 100000),
+            transaction("t7", "a1", "2024-01-04", -5000, deleted=True),
+        ],
+        date_tolerance=3,
+    )
+
+
+def test_match_missing_and_extra(reconciler):
+    result = reconciler.match([
+        {"account_id": "a1", "date": "2024-01-11", "amount": -5000, "payee_name": "Gym"},
+        ynab.StatementRow("a1", "2024-01-05", -5000),
+        ynab.StatementRow("a1", "2024-01-13", -12000),
+        ynab.StatementRow("a1", "2024-01-15", -4000),
+    ])
+
+    assert {(m.row.date, m.transaction.id, m.days) for m in result.matched} == {
+        ("2024-01-05", "t1", 2),
+        ("2024-01-11", "t2", 1),
+        ("2024-01-13", "t3", 1),
+    }
+    assert [r.amount for r in result.missing] == [-4000]
+    # Only a1 transactions within the statement's dates are extra
+    assert result.extra == []
+    assert not result.ok
+
+
+def test_equal_rows_claim_one_transaction_each(reconciler):
+    reconciler.date_tolerance = 5
+    result = reconciler.match([ynab.StatementRow("a1", "2024-01-07", -5000)] * 3)
+
+    assert [m.transaction.id for m in result.matched] == ["t1", "t2"]
+    assert len(result.missing) == 1
+
+
+def test_earlier_row_leaves_later_row_its_only_candidate():
+    reconciler = ynab.Reconciler(
+        [transaction("t1", "a1", "2024-01-01", -100), transaction("t2", "a1", "2024-01-06", -100)],
+        date_tolerance=3,
+    )
+
+    result = reconciler.match([ynab.StatementRow("a1", "2024-01-04", -100), ynab.StatementRow("a1", "2024-01-07", -100)])
+
+    assert [(m.row.date, m.transaction.id) for m in result.matched] == [("2024-01-04", "t1"), ("2024-01-07", "t2")]
+    assert result.missing == []
+
+
+def test_rows_outside_tolerance_are_missing(reconciler):
+    result = reconciler.match([ynab.StatementRow("a1", "2024-01-25", -800)], since_date="2024-01-01", until_date="2024-01-31")
+
+    assert result.matched == []
+    assert len(result.missing) == 1
+    assert [t.id for t in result.extra] == ["t1", "t2", "t3", "t4"]
+
+
+def test_tolerance_is_configurable(reconciler):
+    reconciler.date_tolerance = 5
+
+    assert len(reconciler.match([ynab.StatementRow("a1", "2024-01-25", -800)]).matched) == 1
+
+
+def test_clear_skips_reconciled(reconciler):
+    result = reconciler.match([ynab.StatementRow("a1", "2024-01-03", -5000), ynab.StatementRow("a1", "2024-01-12", -12000)])
+
+    changed = result.clear()
+
+    assert [t.id for t in changed] == ["t1"]
+    assert changed[0].cleared == "cleared"
+    assert result.clear() == []
+    with pytest.raises(ValueError):
+        result.clear("uncleared")
+
+
+def test_update_replaces_and_removes(reconciler):
+    reconciler.update([transaction("t1", "a1", "2024-01-03", -5000, deleted=True), transaction("t8", "a3", "2024-03-01", 1)])
+
+    assert len(reconciler) == 6
+    assert reconciler.match([ynab.StatementRow("a3", "2024-03-02", 1)]).matched[0].transaction.id == "t8"
+
+
+def test_from_api_and_save(transport, offline_client):
+    transport.routes[("GET", "transactions")] = {
+        "data": {
+            "transactions": [
+                {"id": "t1", "account_id": "a1", "date": "2024-01-03", "amount": -5000, "cleared": "uncleared"},
+                {"id": "t2", "account_id": "a2", "date": "2024-01-03", "amount": -5000, "cleared": "uncleared"},
+            ]
+        }
+    }
+    transport.routes[("PATCH", "transactions")] = lambda request: (
+        200, {"data": {"transactions": json.loads(request.body)["transactions"]}}
+    )
+
+    reconciler = ynab.Reconciler.from_api(offline_client.transactions, account_ids=["a1"])
+    result = reconciler.match([ynab.StatementRow("a1", "2024-01-04", -5000)])
+    result.save(offline_client.transactions)
+
+    assert len(reconciler) == 1
+    assert json.loads(transport.requests[-1].body) == {"transactions": [{"id": "t1", "cleared": "cleared"}]}
@@ -0,0 +1,64 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import json
+
+from context import ynab, transport, offline_client
+
+ROWS = [
+    {"id": "t1", "date": "2024-01-05", "amount": -5000, "account_id": "a1", "category_id": "food", "payee_id": "p1"},
+    {"id": "t2", "date": "2024-01-20", "amount": -2000, "account_id": "a2", "category_id": "food", "payee_id": "p2"},
+    {"id": "t3", "date": "2024-02-01", "amount": -9000, "account_id": "a1", "category_id": None, "payee_id": "p1",
+     "subtransactions": [{"id": "s1", "amount": -6000, "category_id": "food"},
+                         {"id": "s2", "amount": -3000, "category_id": "fun", "payee_id": "p3"}]},
+]
+
+
+def test_totals_and_splits():
+    rollup = ynab.BudgetRollup(ynab.Transaction.from_dict(r) for r in ROWS)
+
+    assert rollup.by_month_category() == {
+        ("2024-01", "food"): -7000, ("2024-02", "food"): -6000, ("2024-02", "fun"): -3000,
+    }
+    assert rollup.by_month_account("2024-01") == {("2024-01", "a1"): -5000, ("2024-01", "a2"): -2000}
+    assert rollup.by_payee() == {"p1": -11000, "p2": -2000, "p3": -3000}
+    assert rollup.months() == ["2024-01", "2024-02"]
+
+
+def test_updates_and_deletions_only_touch_changed_rows():
+    rollup = ynab.BudgetRollup(ynab.Transaction.from_dict(r) for r in ROWS)
+
+    rollup.update([ynab.Transaction.from_dict(dict(ROWS[0], amount=-1000, category_id="fun"))])
+    rollup.update([ynab.Transaction.from_dict(dict(ROWS[1], deleted=True))])
+
+    assert rollup.category_total("2024-01", "food") == 0
+    assert ("2024-01", "food") not in rollup.by_month_category()
+    assert rollup.category_total("2024-01", "fun") == -1000
+    assert rollup.account_total("2024-01", "a2") == 0
+    assert "p2" not in rollup.by_payee()
+    assert len(rollup) == 2
+
+
+def test_kept_current_from_api(offline_client, transport):
+    def save_route(request):
+        saved = json.loads(request.body)["transaction"]
+        return 200, {"data": {"transaction": dict(ROWS[0], **saved)}}
+
+    transport.routes[("GET", "transactions")] = {"data": {"transactions": ROWS, "server_knowledge": 1}}
+    transport.routes[("PUT", "transactions/t1")] = save_route
+
+    rollup = ynab.BudgetRollup.from_api(offline_client.transactions)
+    transaction = offline_client.transactions.get_all()[0]
+    transaction.amount = -8000
+    offline_client.transactions.save(transaction)
+
+    assert rollup.category_total("2024-01", "food") == -10000
+
+    transport.routes[("GET", "transactions")] = {
+        "data": {"transactions": [dict(ROWS[2], deleted=True)], "server_knowledge": 2}
+    }
+    offline_client.sync.sync_transactions()
+
+    assert rollup.months() == ["2024-01"]
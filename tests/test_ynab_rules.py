@@ -0,0 +1,162 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import json
+import sys
+
+import pytest
+
+from context import ynab, transport, offline_client
+
+
+@pytest.fixture()
+def rules() -> ynab.RuleSet:
+    rules = ynab.RuleSet()
+    rules.add("groceries", "Whole Foods", kind="prefix")
+    rules.add("groceries-365", "Whole Foods 365", kind="prefix")
+    rules.add("coffee", r"starbucks|peet'?s", kind="regex")
+    rules.add("amazon", r"^AMZN\s*Mktp", kind="regex", case_sensitive=True)
+    rules.add("rent", "Landlord LLC")
+    rules.add("gifts", "birthday", kind="regex", field="memo")
+    return rules
+
+
+@pytest.mark.parametrize(
+    "payee, memo, category",
+    [
+        ("landlord llc", None, "rent"),
+        ("Whole Foods Market #12", None, "groceries"),
+        ("WHOLE FOODS 365 #3", None, "groceries-365"),
+        ("SQ *Starbucks 0042", None, "coffee"),
+        ("Peets Coffee", None, "coffee"),
+        ("AMZN Mktp US*1A2B", None, "amazon"),
+        ("amzn mktp us", None, None),
+        ("Book Store", "Birthday present", "gifts"),
+        ("Landlord LLC", "birthday", "rent"),
+        (None, None, None),
+    ],
+)
+def test_match(rules, payee, memo, category):
+    rule = rules.match(payee, memo)
+    assert (rule.category_id if rule else None) == category
+
+
+def test_first_rule_wins():
+    rules = ynab.RuleSet([
+        ynab.Rule("first", "shop", kind="regex"),
+        ynab.Rule("second", "coffee shop", kind="regex"),
+        ynab.Rule("exact-first", "Cafe"),
+        ynab.Rule("exact-second", "cafe"),
+    ])
+
+    assert rules.match("The Coffee Shop").category_id == "first"
+    assert rules.match("CAFE").category_id == "exact-first"
+
+
+def test_regex_without_literal_is_still_tested():
+    rules = ynab.RuleSet([ynab.Rule("numbers", r"^\d+$", kind="regex")])
+
+    assert rules.match("12345").category_id == "numbers"
+    assert rules.match("12a45") is None
+
+
+def test_required_literal():
+    rules_module = sys.modules["ynab.__rules"]
+
+    assert rules_module.required_literal(r"^AMZN\s*Mktp") == "amzn"
+    assert rules_module.required_literal(r"(coffee) shop\d") == "coffee shop"
+    assert rules_module.required_literal(r"starbucks|peet'?s") == ""
+
+
+def test_unreadable_parse_tree_leaves_rules_unindexed(monkeypatch):
+    class BrokenParser(object):
+        @staticmethod
+        def parse(pattern):
+            raise AttributeError("internals changed")
+
+    monkeypatch.setattr(sys.modules["ynab.__rules"], "sre_parse", BrokenParser)
+    rules = ynab.RuleSet([ynab.Rule("coffee", "starbucks", kind="regex")]).compile()
+
+    assert rules.match("SQ *Starbucks").category_id == "coffee"
+    assert len(rules._matchers["payee"].unindexed) == 1
+
+
+def test_rules_are_recompiled_after_add():
+    rules = ynab.RuleSet()
+    assert rules.match("Shell") is None
+
+    rules.add("fuel", "Shell")
+
+    assert rules.match("shell").category_id == "fuel"
+
+
+def test_invalid_rules():
+    with pytest.raises(ValueError):
+        ynab.Rule("c", "x", kind="glob")
+    with pytest.raises(ValueError):
+        ynab.Rule("c", "x", field="account")
+    with pytest.raises(Exception):
+        ynab.Rule("c", "(unclosed", kind="regex")
+
+
+def test_apply_skips_categorized_transfers_and_deleted(rules):
+    rows = [
+        ynab.Transaction(id="t1", payee_name="Starbucks"),
+        ynab.Transaction(id="t2", payee_name="Starbucks", category_id="dining"),
+        ynab.Transaction(id="t3", payee_name="Starbucks", transfer_account_id="a2"),
+        ynab.Transaction(id="t4", payee_name="Starbucks", deleted=True),
+        ynab.Transaction(id="t5", payee_name="Unknown"),
+    ]
+
+    assert [t.id for t in rules.apply(rows)] == ["t1"]
+    assert rows[0].category_id == "coffee"
+    assert [t.id for t in rules.apply(rows, overwrite=True)] == ["t2"]
+    assert rules.hits[rules.rules[2]] == 2
+
+
+def test_apply_categorizes_new_splits(rules):
+    split = ynab.Transaction.from_dict({
+        "payee_name": "Whole Foods Market",
+        "subtransactions": [
+            {"amount": -1000, "memo": "birthday cake"},
+            {"amount": -2000},
+            {"amount": -500, "category_id": "household"},
+        ],
+    })
+
+    assert rules.apply(iter([split])) == [split]
+    assert [s.category_id for s in split.subtransactions] == ["groceries", "groceries", "household"]
+
+
+def test_apply_skips_saved_splits(rules):
+    split = ynab.Transaction.from_dict({
+        "id": "t1",
+        "payee_name": "Whole Foods Market",
+        "category_id": "split-category",
+        "subtransactions": [{"id": "s1", "amount": -1000}, {"id": "s2", "amount": -2000}],
+    })
+
+    assert rules.apply([split]) == []
+    assert [s.category_id for s in split.subtransactions] == [None, None]
+    assert not split.is_dirty
+
+
+def test_categorize_saves_only_changed_fields(transport, offline_client, rules):
+    transport.routes[("GET", "transactions")] = {
+        "data": {
+            "transactions": [
+                {"id": "t1", "account_id": "a1", "date": "2024-01-01", "amount": -100, "payee_name": "Starbucks"},
+                {"id": "t2", "account_id": "a1", "date": "2024-01-02", "amount": -200, "payee_name": "Unknown"},
+            ]
+        }
+    }
+    transport.routes[("PATCH", "transactions")] = lambda request: (
+        200, {"data": {"transactions": json.loads(request.body)["transactions"]}}
+    )
+
+    saved = rules.categorize(offline_client.transactions)
+
+    assert [t.id for t in saved] == ["t1"]
+    assert json.loads(transport.requests[-1].body) == {"transactions": [{"id": "t1", "category_id": "coffee"}]}
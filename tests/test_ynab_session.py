@@ -0,0 +1,59 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import pytest
+import requests
+
+from context import ynab, transport, offline_client
+
+
+ACCOUNTS = {"data": {"accounts": [{"id": "a1", "name": "Checking", "type": "checking"}]}}
+
+
+def test_sub_apis_share_one_session(offline_client):
+    assert offline_client.accounts.session is offline_client.session
+    assert offline_client.transactions.session is offline_client.session
+    assert offline_client.categories.session is offline_client.session
+
+
+def test_custom_transport_receives_requests(offline_client, transport):
+    transport.routes[("GET", "accounts")] = ACCOUNTS
+
+    accounts = offline_client.accounts.get_all()
+
+    assert accounts[0].name == "Checking"
+    assert len(transport.requests) == 1
+    assert transport.requests[0].headers["Authorization"] == "Bearer test-token"
+
+
+def test_injected_session_is_shared_across_clients(transport):
+    session = ynab.create_session(transport=transport)
+    first = ynab.YNABBudgetClient(budget_id="b1", pat_token="t", session=session)
+    second = ynab.YNABBudgetClient(budget_id="b2", pat_token="t", session=session)
+
+    assert first.accounts.session is second.categories.session
+
+
+def test_session_config_headers():
+    session = ynab.create_session(
+        ynab.SessionConfig(keep_alive=False, compression=False)
+    )
+
+    assert session.headers["Connection"] == "close"
+    assert session.headers["Accept-Encoding"] == "identity"
+
+
+def test_json_header_does_not_leak_into_get(offline_client, transport):
+    transport.routes[("GET", "accounts")] = ACCOUNTS
+
+    assert "Content-Type" in offline_client.accounts.json_header
+    offline_client.accounts.get_all()
+
+    assert "Content-Type" not in transport.requests[0].headers
+
+
+def test_http_errors_raised(offline_client):
+    with pytest.raises(requests.exceptions.HTTPError):
+        offline_client.accounts.get_all()
@@ -0,0 +1,105 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from context import ynab, FakeTransport
+
+TRANSACTIONS = [
+    {"id": "t1", "date": "2024-01-02", "amount": -5000, "account_id": "a1", "payee_name": "Grocer",
+     "approved": True, "flag_name": "red"},
+    {"id": "t2", "date": "2024-01-05", "amount": -7000, "account_id": "a1", "payee_name": "Cafe",
+     "subtransactions": [
+         {"id": "s1", "transaction_id": "t2", "amount": -3000, "category_id": "c1"},
+         {"id": "s2", "transaction_id": "t2", "amount": -4000, "category_id": "c2"},
+     ]},
+    {"id": "t3", "date": "2024-02-01", "amount": -1000, "account_id": "a1", "payee_name": "Grocer"},
+]
+
+
+def build_transport() -> FakeTransport:
+    def transactions(request):
+        knowledge = parse_qs(urlsplit(request.url).query).get("last_knowledge_of_server")
+        rows = [] if knowledge else TRANSACTIONS
+        return 200, {"data": {"transactions": rows, "server_knowledge": 7}}
+
+    return FakeTransport({
+        ("GET", "transactions"): transactions,
+        ("GET", "accounts"): {"data": {"accounts": [{"id": "a1", "name": "Checking"}], "server_knowledge": 3}},
+        ("GET", "categories"): {"data": {"category_groups": [], "server_knowledge": 3}},
+    })
+
+
+@pytest.fixture()
+def db_path(tmp_path) -> str:
+    return str(tmp_path / "budget.sqlite")
+
+
+def make_client(db_path, transport) -> ynab.YNABBudgetClient:
+    return ynab.YNABBudgetClient(
+        budget_id="test-budget",
+        pat_token="t",
+        transport=transport,
+        storage=ynab.SQLiteStore(db_path),
+        rate_limiter=ynab.RateLimiter(),
+    )
+
+
+def test_payee_lookup_served_from_store(db_path):
+    client = make_client(db_path, build_transport())
+    account = client.accounts.get_by_name("Checking")
+
+    grocer = account.get_transactions_by_payee("Grocer")
+
+    assert [t.id for t in grocer] == ["t1", "t3"]
+    assert grocer[0].approved is True
+    assert grocer[0].meta == {"flag_name": "red"}
+    assert [t.id for t in account.get_transactions_by_payee("Grocer", since_date="2024-01-15")] == ["t3"]
+
+
+def test_subtransactions_round_trip(db_path):
+    client = make_client(db_path, build_transport())
+    client.sync.sync_transactions()
+
+    split = client.storage.get_transactions(payee_name="Cafe")[0]
+
+    assert sorted(s.amount for s in split.subtransactions) == [-4000, -3000]
+    assert not split.is_dirty
+
+
+def test_cold_start_resumes_from_knowledge(db_path):
+    make_client(db_path, build_transport()).sync.sync()
+
+    transport = build_transport()
+    client = make_client(db_path, transport)
+    client.sync.sync_transactions()
+
+    query = parse_qs(urlsplit(transport.requests[0].url).query)
+    assert query["last_knowledge_of_server"] == ["7"]
+    assert len(client.sync.transactions) == 3
+
+
+def test_deleted_rows_removed(db_path):
+    store = ynab.SQLiteStore(db_path)
+    store.merge("transactions", [ynab.Transaction.from_dict(dict(t)) for t in TRANSACTIONS])
+
+    changes = store.merge("transactions", [ynab.Transaction(id="t2", deleted=True)])
+
+    assert [t.id for t in changes.deleted] == ["t2"]
+    assert sorted(store.load("transactions")) == ["t1", "t3"]
+    assert store._subtransactions_for(["t2"]) == []
+
+
+def test_store_refuses_another_budget(db_path):
+    make_client(db_path, build_transport()).sync.sync()
+
+    with pytest.raises(ValueError):
+        ynab.YNABBudgetClient("other-budget", "t", storage=ynab.SQLiteStore(db_path))
+
+    assert ynab.SQLiteStore(db_path).budget_id == "test-budget"
+    assert ynab.SQLiteStore(db_path, budget_id="test-budget").budget_id == "test-budget"
+
@@ -0,0 +1,83 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import json
+
+import pytest
+
+from context import ynab, transport, offline_client
+from ynab.__stream import iter_json_array
+
+PAYLOAD = {
+    "data": {
+        "transactions": [
+            {"id": f"t{i}", "amount": -12345 * i, "memo": "café \"quoted\" ]}", "deleted": False,
+             "subtransactions": []}
+            for i in range(50)
+        ],
+        "server_knowledge": 1234567,
+    }
+}
+
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64, 100000])
+def test_items_and_extras_across_chunk_boundaries(size):
+    extras = {}
+    body = json.dumps(PAYLOAD, indent=1).encode("utf-8")
+
+    items = list(iter_json_array(chunked(body, size), ("data", "transactions"), extras))
+
+    assert items == PAYLOAD["data"]["transactions"]
+    assert extras == {"server_knowledge": 1234567}
+
+
+def test_empty_array():
+    body = b'{"data": {"transactions": [], "server_knowledge": 3}}'
+
+    assert list(iter_json_array(chunked(body, 2), ("data", "transactions"))) == []
+
+
+def test_iter_all_yields_transactions(offline_client, transport):
+    transport.routes[("GET", "transactions")] = PAYLOAD
+
+    transactions = offline_client.transactions.iter_all(chunk_size=128)
+
+    first = next(transactions)
+    assert isinstance(first, ynab.Transaction)
+    assert first.id == "t0"
+    assert len(list(transactions)) == 49
+
+
+def test_iter_by_account(offline_client, transport):
+    transport.routes[("GET", "accounts/a1/transactions")] = PAYLOAD
+
+    ids = [t.id for t in offline_client.transactions.iter_by_account("a1")]
+
+    assert ids == [f"t{i}" for i in range(50)]
+
+
+def test_streamed_responses_closed_before_retry(transport):
+    responses = [(503, {}), (200, PAYLOAD)]
+    transport.routes[("GET", "transactions")] = lambda request: responses.pop(0)
+    sent, closed = [], []
+    send = transport.send
+
+    def tracking_send(request, **kwargs):
+        resp = send(request, **kwargs)
+        resp.close = lambda: closed.append(resp)
+        sent.append(resp)
+        return resp
+
+    transport.send = tracking_send
+    client = ynab.YNABBudgetClient(
+        "test-budget", "t", transport=transport, rate_limiter=ynab.RateLimiter(sleep=lambda seconds: None)
+    )
+
+    assert len(list(client.transactions.iter_all())) == 50
+    assert closed[0] is sent[0]
@@ -0,0 +1,73 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+from urllib.parse import parse_qs, urlsplit
+
+from context import ynab, transport, offline_client
+
+
+def transaction(id, amount, deleted=False):
+    return {"id": id, "date": "2024-01-01", "amount": amount, "account_id": "a1", "deleted": deleted}
+
+
+def knowledge_of(request):
+    return parse_qs(urlsplit(request.url).query).get("last_knowledge_of_server", [None])[0]
+
+
+def delta_route(request):
+    if knowledge_of(request) is None:
+        transactions = [transaction("t1", 1000), transaction("t2", 2000)]
+    else:
+        transactions = [transaction("t1", 1500), transaction("t2", 0, deleted=True), transaction("t3", 3000)]
+
+    return 200, {"data": {"transactions": transactions, "server_knowledge": 10}}
+
+
+def test_first_sync_loads_everything(offline_client, transport):
+    transport.routes[("GET", "transactions")] = delta_route
+
+    changes = offline_client.sync.sync_transactions()
+
+    assert len(changes.created) == 2
+    assert offline_client.sync.server_knowledge["transactions"] == 10
+
+
+def test_delta_merges_updates_and_deletions(offline_client, transport):
+    transport.routes[("GET", "transactions")] = delta_route
+    offline_client.sync.sync_transactions()
+
+    changes = offline_client.sync.sync_transactions()
+
+    assert knowledge_of(transport.requests[-1]) == "10"
+    assert [t.id for t in changes.created] == ["t3"]
+    assert [t.id for t in changes.updated] == ["t1"]
+    assert [t.id for t in changes.deleted] == ["t2"]
+    assert sorted(offline_client.sync.transactions) == ["t1", "t3"]
+    assert offline_client.sync.transactions["t1"].amount == 1500
+
+
+def test_empty_delta(offline_client, transport):
+    transport.routes[("GET", "accounts")] = {"data": {"accounts": [], "server_knowledge": 4}}
+
+    changes = offline_client.sync.sync_accounts()
+
+    assert not changes
+    assert offline_client.sync.server_knowledge["accounts"] == 4
+
+
+def test_deleted_category_group(offline_client, transport):
+    transport.routes[("GET", "categories")] = {
+        "data": {
+            "category_groups": [
+                {"name": "Bills", "deleted": True, "categories": [{"id": "c1", "name": "Rent"}]}
+            ],
+            "server_knowledge": 2,
+        }
+    }
+
+    categories = offline_client.categories.get_all()
+
+    assert categories[0].deleted
+    assert categories[0].category_group_name == "Bills"
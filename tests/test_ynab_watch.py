@@ -0,0 +1,107 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import asyncio
+import threading
+
+import pytest
+
+from context import ynab, transport, offline_client
+
+
+def transactions_route(state):
+    def route(request):
+        knowledge = "last_knowledge_of_server" in request.url
+        rows = state["delta"] if knowledge else state["full"]
+        return 200, {"data": {"transactions": rows, "server_knowledge": state["knowledge"]}}
+
+    return route
+
+
+@pytest.fixture()
+def state(transport):
+    state = {"full": [{"id": "t1", "amount": -1}, {"id": "t2", "amount": -2}], "delta": [], "knowledge": 1}
+    transport.routes[("GET", "transactions")] = transactions_route(state)
+    return state
+
+
+def test_callbacks_receive_deltas(offline_client, state):
+    watcher = ynab.BudgetWatcher(offline_client, endpoints=["transactions"])
+    events = []
+    watcher.on("transactions.created", events.append)
+    watcher.on("*.deleted", events.append)
+
+    watcher.poll()
+    assert events == []
+    assert set(offline_client.sync.transactions) == {"t1", "t2"}
+
+    state["delta"] = [{"id": "t3", "amount": -3}, {"id": "t1", "amount": -1, "deleted": True}]
+    watcher.poll()
+
+    assert [(e.endpoint, e.kind, [i.id for i in e.items]) for e in events] == [
+        ("transactions", "created", ["t3"]),
+        ("transactions", "deleted", ["t1"]),
+    ]
+    assert set(offline_client.sync.transactions) == {"t2", "t3"}
+
+
+def test_polls_bypass_the_response_cache(transport, state):
+    client = ynab.YNABBudgetClient(
+        "test-budget", "t", transport=transport, rate_limiter=ynab.RateLimiter(), cache=ynab.MemoryCache(ttl=300)
+    )
+    watcher = ynab.BudgetWatcher(client, endpoints=["transactions"])
+    created = []
+    watcher.on("transactions.created", created.append)
+
+    watcher.poll()
+    watcher.poll()
+    state["delta"] = [{"id": "t3", "amount": -3}]
+    watcher.poll()
+
+    assert [[i.id for i in e.items] for e in created] == [["t3"]]
+    assert len(transport.requests) == 3
+
+
+def test_notify_initial_and_errors(offline_client, state):
+    watcher = ynab.BudgetWatcher(offline_client, endpoints=["transactions", "accounts"], notify_initial=True)
+    created, errors = [], []
+    watcher.on("transactions", created.append)
+    watcher.on_error(lambda budget_id, e: errors.append(budget_id))
+
+    # accounts fails, transactions still reports the initial load
+    assert list(watcher.poll()["test-budget"]) == ["transactions"]
+    assert errors == ["test-budget"]
+    assert [len(e.items) for e in created] == [2]
+
+    with pytest.raises(ValueError):
+        watcher.on("payees.created", print)
+
+
+def test_background_thread(offline_client, state):
+    polled = threading.Event()
+    watcher = ynab.BudgetWatcher(offline_client, interval=0.01, endpoints=["transactions"])
+    watcher.on("transactions.updated", lambda event: polled.set())
+
+    with watcher:
+        state["delta"] = [{"id": "t2", "amount": -20}]
+        assert polled.wait(2)
+
+    assert not watcher.running
+    assert watcher.polls >= 2
+
+
+def test_asyncio_task(offline_client, state):
+    watcher = ynab.BudgetWatcher(offline_client, interval=0.01, endpoints=["transactions"])
+
+    async def main():
+        task = asyncio.create_task(watcher.run())
+        while watcher.polls < 3:
+            await asyncio.sleep(0.01)
+        watcher.stop()
+        await asyncio.wait_for(task, 1)
+
+    asyncio.run(main())
+
+    assert watcher.polls >= 3
@@ -4,10 +4,14 @@
 # https://opensource.org/licenses/MIT
 
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 
 from ynab.__base import RESTBase
+from ynab.__export import ACCOUNT_COLUMNS, ExportStats, export_rows
+from ynab.__index import NameIndex
+from ynab.__query import Where
 from ynab.__transactions import Transaction
+from ynab.__utils import field_names
 
 
 @dataclass
@@ -25,8 +29,10 @@ class Account:
         known_args = {}
         unknown_args = {}
 
+        names = field_names(cls)
+
         for key, value in data.items():
-            if key in cls.__annotations__:
+            if key in names:
                 known_args[key] = value
             else:
                 unknown_args[key] = value
@@ -39,11 +45,40 @@ class Account:
     def get_transactions_by_payee(
         self, payee_name: str, since_date: Optional[str] = None
     ) -> List[Transaction]:
-        transactions = self.api.parent.transactions.get_by_account(  # type: ignore
-            account_id=self.id, since_date=since_date
+        storage = getattr(self.api.parent, "storage", None)
+
+        if storage is not None:
+            # Pull the latest delta, then answer from the indexed local mirror
+            self.api.parent.sync.sync_transactions()  # type: ignore
+            return storage.get_transactions(
+                account_id=self.id, payee_name=payee_name, since_date=since_date
+            )
+
+        # Filter the streamed rows so only this payee's transactions are built
+        return list(self.iter_transactions(Where.payee(payee_name), since_date=since_date))
+
+    def iter_transactions(
+        self,
+        where: Optional[Where] = None,
+        since_date: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[Transaction]:
+        """
+        Lazily yield this account's transactions that match where - see TransactionAPI.query
+        """
+        return self.api.parent.transactions.query(  # type: ignore
+            where, account_id=self.id, since_date=since_date, limit=limit
         )
 
-        return list(filter(lambda x: x.payee_name == payee_name, transactions))
+    def latest_transactions(
+        self, n: int, where: Optional[Where] = None, since_date: Optional[str] = None
+    ) -> List[Transaction]:
+        """
+        This account's n most recent transactions matching where, newest first
+        """
+        return self.api.parent.transactions.latest(  # type: ignore
+            n, where, account_id=self.id, since_date=since_date
+        )
 
     def __repr__(self):
         return f"Account(" f"name='{self.name}', " f"type='{self.type}'" f")"
@@ -54,9 +89,12 @@ class AccountsAPI(RESTBase):
         super().__init__(**kwargs)
         self._budget_id = budget_id
         self._budget_uri = f"/budgets/{budget_id}/"
+        self._model = kwargs.get("models", {}).get("accounts", Account)
 
     def __load_accounts_from_json(self, data: dict):
-        return [Account.from_dict(data=a, api=self) for a in data["data"]["accounts"]]
+        return self._build(
+            "accounts", lambda: [self._model.from_dict(data=a, api=self) for a in data["data"]["accounts"]]
+        )
 
     def get_all(self):
         method = "GET"
@@ -64,16 +102,66 @@ class AccountsAPI(RESTBase):
 
         resp = self._rest_call[method](api_path)
 
-        return self.__load_accounts_from_json(resp.json())
-
-    def get_by_name(self, name: str):
-        all_accounts = self.get_all()
-
-        for c in all_accounts:
-            if c.name == name:
-                ret_val = c
-                break
-        else:
-            ret_val = None
-
-        return ret_val
+        return self.__load_accounts_from_json(self._decode(resp))
+
+    def export(
+        self, path: str, format: Optional[str] = None, include_meta: bool = False, batch_size: int = 10000
+    ) -> ExportStats:
+        """
+        Stream accounts into a Parquet, Arrow IPC or CSV file - see TransactionAPI.export
+        """
+        rows = self._iter_array(self._budget_uri + f"accounts", ("data", "accounts"))
+
+        return export_rows(rows, path, ACCOUNT_COLUMNS, format, include_meta, batch_size)
+
+    def get_changes(
+        self, last_knowledge_of_server: Optional[int] = None
+    ) -> Tuple[List[Account], int]:
+        """
+        Get the accounts changed since the given server knowledge - including deleted ones
+        :param last_knowledge_of_server: int : Knowledge returned by the previous call - None for everything
+        :return: (accounts, server_knowledge)
+        """
+        method = "GET"
+        api_path = self._budget_uri + f"accounts"
+        params = {}
+
+        if last_knowledge_of_server is not None:
+            params["last_knowledge_of_server"] = last_knowledge_of_server
+
+        data = self._decode(self._rest_call[method](api_path, params, cacheable=last_knowledge_of_server is None))
+
+        return self.__load_accounts_from_json(data), data["data"]["server_knowledge"]
+
+    def get_by_name(self, name: str, case_sensitive: bool = True, refresh: bool = False):
+        """
+        Find an account by name. The budget index answers without a request - a delta
+        is pulled on a miss, once the index is older than sync.max_age, or on refresh.
+        :param name: string : Account name
+        :param case_sensitive: bool : Compare names case-insensitively when False
+        :param refresh: bool : Pull the latest delta before looking the name up
+        :return: Account or None
+        :raises AmbiguousNameError: More than one account has the name
+        """
+        if self.parent is None:
+            index = NameIndex()
+            index.update(self.get_all())
+            return index.get_by_name(name, case_sensitive=case_sensitive)
+
+        sync = self.parent.sync
+        storage = getattr(self.parent, "storage", None)
+
+        def lookup():
+            if storage is not None:
+                return storage.get_account_by_name(name, api=self, case_sensitive=case_sensitive)
+            return sync.index.accounts.get_by_name(name, case_sensitive=case_sensitive)
+
+        refreshed = sync.warm("accounts", refresh=refresh)
+        account = lookup()
+
+        # The account may have been added since the last delta
+        if account is None and not refreshed:
+            sync.warm("accounts", refresh=True)
+            account = lookup()
+
+        return account
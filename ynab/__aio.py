@@ -0,0 +1,148 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import asyncio
+import functools
+import inspect
+from concurrent.futures import Executor, ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from ynab.__transactions import Transaction
+from ynab.api import YNABBudgetClient
+
+
+class AsyncIterator(object):
+    """
+    Async iterator over a blocking generator - the generator is advanced on the executor,
+    a few items at a time, so its streamed reads never run on the event loop
+    """
+
+    def __init__(self, generator: Iterator, executor: Executor, batch_size: int = 256):
+        self._generator = generator
+        self._executor = executor
+        self._batch_size = batch_size
+        self._buffer: List = []
+
+    def __aiter__(self) -> "AsyncIterator":
+        return self
+
+    async def __anext__(self):
+        if not self._buffer:
+            loop = asyncio.get_running_loop()
+            self._buffer = await loop.run_in_executor(self._executor, self.__take)
+            self._buffer.reverse()
+
+            if not self._buffer:
+                raise StopAsyncIteration
+
+        return self._buffer.pop()
+
+    def __take(self) -> list:
+        return list(islice(self._generator, self._batch_size))
+
+    async def aclose(self) -> None:
+        # Closing runs the generator's cleanup, which releases its connection
+        self._buffer = []
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._generator.close)
+
+
+class AsyncAPI(object):
+    """
+    Awaitable view of a synchronous sub-API. Every public method of the wrapped API
+    is run on the client's executor, so calls share the pooled session and return
+    the same model objects as the blocking client. Generator methods such as iter_all
+    and query return an AsyncIterator instead - use them with 'async for'.
+    """
+
+    def __init__(self, api, executor: Executor):
+        self._api = api
+        self._executor = executor
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._api, name)
+
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        if inspect.isgeneratorfunction(attr):
+            @functools.wraps(attr)
+            def iterate(*args, **kwargs) -> AsyncIterator:
+                # Creating the generator runs none of its body - that happens on the executor
+                return AsyncIterator(attr(*args, **kwargs), self._executor)
+
+            return iterate
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await self._run(attr, *args, **kwargs)
+
+        return call
+
+
+class AsyncTransactionAPI(AsyncAPI):
+    async def gather_by_account(
+        self, account_ids: Iterable[str], since_date: Optional[str] = None
+    ) -> Dict[str, List[Transaction]]:
+        """
+        Fetch the transactions of several accounts with one budget-wide request
+        :param account_ids: Account ids to fetch
+        :param since_date: string : Only return transactions on or after this date
+        :return: dict : account id -> transactions
+        """
+        return await self._run(self._api.get_by_accounts, list(account_ids), since_date=since_date)
+
+
+class AsyncYNABBudgetClient(object):
+    """
+    Asyncio counterpart of YNABBudgetClient - transactions, accounts, categories and sync
+    return awaitables. Several clients can share one session and executor to fan out
+    across budgets.
+    """
+
+    def __init__(
+        self,
+        budget_id: str,
+        pat_token: str,
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+        **kwargs,
+    ) -> None:
+        """
+        :param budget_id: string : YNAB budget id
+        :param pat_token: string : YNAB personal access token
+        :param executor: Executor : Shared executor - one sized to the connection pool is created if omitted
+        :param max_workers: int : Size of the created executor - defaults to the pool size
+        :param kwargs: Passed through to YNABBudgetClient (session, session_config, transport, storage...)
+        """
+        self.client = YNABBudgetClient(budget_id=budget_id, pat_token=pat_token, **kwargs)
+        self.budget_id = budget_id
+
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers or self.client.session_config.pool_maxsize,
+            thread_name_prefix="ynab",
+        )
+
+        self.categories = AsyncAPI(self.client.categories, self.executor)
+        self.transactions = AsyncTransactionAPI(self.client.transactions, self.executor)
+        self.accounts = AsyncAPI(self.client.accounts, self.executor)
+        self.sync = AsyncAPI(self.client.sync, self.executor)
+
+    async def close(self) -> None:
+        if self._owns_executor:
+            self.executor.shutdown(wait=False)
+        self.client.close()
+
+    async def __aenter__(self) -> "AsyncYNABBudgetClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
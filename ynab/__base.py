@@ -3,8 +3,22 @@
 # This software is released under the MIT License.
 # https://opensource.org/licenses/MIT
 
+import hashlib
+import time
 import requests
-from typing import Optional
+from typing import Callable, Iterator, Optional, Sequence, TypeVar
+from urllib.parse import urlencode, urlsplit
+
+from ynab.__cache import ResponseCache
+from ynab.__codec import JSONCodec, default_codec
+from ynab.__flight import SingleFlight
+from ynab.__instrument import Instrumentation, ParseEvent, RequestEvent, endpoint_template
+from ynab.__ratelimit import RateLimiter
+from ynab.__session import SessionConfig, create_session
+from ynab.__stream import iter_json_array
+
+
+T = TypeVar("T")
 
 
 class RESTBase(object):
@@ -14,7 +28,17 @@ class RESTBase(object):
         self._uri = f"{self._host}/{self._api_version}/"
         self._token = kwargs.pop("token")
         self.parent = kwargs.get("parent", None)
+        self._session = kwargs.pop("session", None) or create_session()
+        self._timeout = kwargs.pop("timeout", SessionConfig.timeout)
+        self._rate_limiter = kwargs.pop("rate_limiter", None) or RateLimiter.for_token(self._token)
+        self._cache: Optional[ResponseCache] = kwargs.pop("cache", None)
+        self._instrumentation: Optional[Instrumentation] = kwargs.pop("instrumentation", None)
+        self._codec: JSONCodec = kwargs.pop("codec", None) or default_codec()
+        self._single_flight: Optional[SingleFlight] = kwargs.pop("single_flight", None)
         self._headers = {"Authorization": f"Bearer {self._token}"}
+        # Cached responses are only served to the same server and token - a DiskCache
+        # outlives the process, so it gets a digest instead of the token itself
+        self._cache_scope = f"{self._uri}#{hashlib.sha256(self._token.encode()).hexdigest()[:16]}#"
         self._rest_call = {
             "GET": self.__get,
             "POST": self.__post,
@@ -23,20 +47,56 @@ class RESTBase(object):
         }
 
     def __get(
-        self, api_endpoint: str, params: Optional[dict] = None
+        self,
+        api_endpoint: str,
+        params: Optional[dict] = None,
+        stream: bool = False,
+        cacheable: bool = True,
     ) -> requests.Response:
         """
         Send HTTP GET request to REST API endpoint with data as query string
         :param api_endpoint: string : The api endpoint to be called - after version number
         :param data: dict : Data to be passed as query string in url
+        :param stream: bool : Leave the body unread so it can be consumed incrementally - bypasses the cache
+        :param cacheable: bool : Serve and store the response through the cache - False for deltas, which a cached
+            copy would hide until it expires
         :return: Partial function requests.get with URL populated
         """
 
-        uri = self.__prep_uri(api_endpoint)
-        resp = requests.get(url=uri, params=params, headers=self._headers)
-        self.__check_for_errors(resp)
+        if stream:
+            return self.__send("GET", api_endpoint, params=params, headers=self._headers, stream=True)
 
-        return resp
+        if self._cache is None or not cacheable:
+            return self.__coalesce(api_endpoint, params, lambda: self.__send(
+                "GET", api_endpoint, params=params, headers=self._headers
+            ))
+
+        key = self.__cache_key(api_endpoint, params)
+        tag = self.__cache_tag(api_endpoint)
+
+        if (resp := self._cache.get(key, tag)) is not None:
+            return resp
+
+        def fetch() -> requests.Response:
+            # A write that lands while the request is in flight makes the response stale
+            generation = self._cache.generation(tag)  # type: ignore
+            resp = self.__send("GET", api_endpoint, params=params, headers=self._headers)
+            self._cache.set(key, tag, resp, generation)  # type: ignore
+            return resp
+
+        return self.__coalesce(api_endpoint, params, fetch)
+
+    def __coalesce(self, api_endpoint: str, params: Optional[dict], fetch: Callable[[], T]) -> T:
+        """
+        Share one in-flight GET between every caller asking for the same url and params -
+        they all receive the leader's response, or its exception
+        """
+        if self._single_flight is None:
+            return fetch()
+
+        key = ("GET", self.__cache_key(api_endpoint, params))
+
+        return self._single_flight.do(key, fetch)
 
     def __post(self, api_endpoint: str, data: dict) -> requests.Response:
         """
@@ -46,13 +106,7 @@ class RESTBase(object):
         :return:
         """
 
-        uri = self.__prep_uri(api_endpoint)
-
-        resp = requests.post(url=uri, headers=self.json_header, json=data)
-
-        self.__check_for_errors(resp)
-
-        return resp
+        return self.__send("POST", api_endpoint, headers=self.json_header, data=self._codec.dumps(data))
 
     def __patch(self, api_endpoint: str, data: dict) -> requests.Response:
         """
@@ -61,12 +115,8 @@ class RESTBase(object):
         :param data:
         :return:
         """
-        uri = self.__prep_uri(api_endpoint)
 
-        resp = requests.patch(url=uri, headers=self.json_header, json=data)
-        self.__check_for_errors(resp)
-
-        return resp
+        return self.__send("PATCH", api_endpoint, headers=self.json_header, data=self._codec.dumps(data))
 
     def __put(self, api_endpoint: str, data: dict) -> requests.Response:
         """
@@ -75,13 +125,160 @@ class RESTBase(object):
         :param data:
         :return:
         """
+
+        return self.__send("PUT", api_endpoint, headers=self.json_header, data=self._codec.dumps(data))
+
+    def __send(self, method: str, api_endpoint: str, **kwargs) -> requests.Response:
+        """
+        Send HTTP request through the shared, pooled session. Waits for the rate limiter
+        and retries throttled or failed requests according to its retry policy.
+        :param method: string : HTTP method
+        :param api_endpoint: string : The api endpoint to be called - after version number
+        :param kwargs: Passed through to requests.Session.request
+        :return: requests.Response
+        """
         uri = self.__prep_uri(api_endpoint)
+        streamed = kwargs.get("stream", False)
+
+        # Any write may change balances and activity anywhere in the budget - invalidated
+        # before, so no cached read is served while it runs, and after, so no read that
+        # raced it is kept
+        invalidates = method != "GET" and self._cache is not None
+
+        if invalidates:
+            self._cache.invalidate(self.__cache_tag(api_endpoint))  # type: ignore
+
+        try:
+            return self.__send_attempts(method, uri, streamed, **kwargs)
+        finally:
+            if invalidates:
+                self._cache.invalidate(self.__cache_tag(api_endpoint))  # type: ignore
+
+    def __send_attempts(self, method: str, uri: str, streamed: bool, **kwargs) -> requests.Response:
+        attempt = 0
+
+        while True:
+            self._rate_limiter.acquire()
+            event = self.__pre_request(method, uri, attempt)
+            started = time.perf_counter()
+
+            try:
+                resp = self._session.request(method, uri, timeout=self._timeout, **kwargs)
+            except requests.exceptions.RequestException as e:
+                self.__post_response(event, started, streamed, error=e)
+                raise
+
+            self._rate_limiter.record_response(resp)
+            retry = self._rate_limiter.retry_policy.should_retry(method, resp.status_code, attempt)
+            self.__post_response(event, started, streamed, resp=resp, will_retry=retry)
+
+            if not retry:
+                break
+
+            # A streamed body is never read - release its connection before waiting
+            if streamed:
+                resp.close()
+
+            self._rate_limiter.backoff(attempt, resp)
+            attempt += 1
 
-        resp = requests.put(url=uri, headers=self.json_header, json=data)
         self.__check_for_errors(resp)
 
         return resp
 
+    def __pre_request(self, method: str, uri: str, attempt: int) -> Optional[RequestEvent]:
+        if self._instrumentation is None:
+            return None
+
+        event = RequestEvent(method=method, endpoint=endpoint_template(urlsplit(uri).path), url=uri, attempt=attempt)
+        self._instrumentation.pre_request(event)
+
+        return event
+
+    def __post_response(
+        self,
+        event: Optional[RequestEvent],
+        started: float,
+        streamed: bool,
+        resp: Optional[requests.Response] = None,
+        error: Optional[BaseException] = None,
+        will_retry: bool = False,
+    ) -> None:
+        if event is None:
+            return
+
+        event.elapsed = time.perf_counter() - started
+        event.error = error
+        event.will_retry = will_retry
+
+        if resp is not None:
+            event.status = resp.status_code
+            # A streamed body hasn't been read yet - only its announced size is known
+            if not streamed:
+                event.bytes = len(resp.content)
+            elif "Content-Length" in resp.headers:
+                event.bytes = int(resp.headers["Content-Length"])
+
+        self._instrumentation.post_response(event)  # type: ignore
+
+    def _decode(self, resp: requests.Response) -> dict:
+        """
+        Decode a JSON response - timed as the 'decode' stage when instrumented
+        """
+        if self._instrumentation is None:
+            return self._codec.loads(resp.content)
+
+        start_time, started = time.time(), time.perf_counter()
+        data = self._codec.loads(resp.content)
+
+        self._instrumentation.parse_complete(
+            ParseEvent(
+                resource=endpoint_template(urlsplit(resp.url or "").path),
+                stage="decode",
+                seconds=time.perf_counter() - started,
+                bytes=len(resp.content),
+                start_time=start_time,
+            )
+        )
+
+        return data
+
+    def _iter_array(
+        self, api_path: str, keys: Sequence[str], params: Optional[dict] = None, chunk_size: int = 65536
+    ) -> Iterator[dict]:
+        """
+        Stream the items of the JSON array at keys, e.g. ("data", "transactions"), from a GET
+        """
+        resp = self._rest_call["GET"](api_path, params, stream=True)
+
+        # Closing releases the connection even when the caller stops early
+        try:
+            yield from iter_json_array(resp.iter_content(chunk_size), keys)
+        finally:
+            resp.close()
+
+    def _build(self, resource: str, build: Callable[[], T]) -> T:
+        """
+        Build models from decoded data - timed as the 'build' stage when instrumented
+        """
+        if self._instrumentation is None:
+            return build()
+
+        start_time, started = time.time(), time.perf_counter()
+        result = build()
+
+        self._instrumentation.parse_complete(
+            ParseEvent(
+                resource=resource,
+                stage="build",
+                seconds=time.perf_counter() - started,
+                items=len(result) if isinstance(result, list) else 1,
+                start_time=start_time,
+            )
+        )
+
+        return result
+
     def __prep_uri(self, api_endpoint: str) -> str:
         # Check that API_endpoint does not start with a '/', if so, remove it.
         # Because self.uri already contains the necessary '/'
@@ -90,13 +287,50 @@ class RESTBase(object):
 
         return self._uri + api_endpoint
 
+    def __cache_key(self, api_endpoint: str, params: Optional[dict]) -> str:
+        key = self._cache_scope + api_endpoint.strip("/")
+
+        if params:
+            key += "?" + urlencode(sorted(params.items()))
+
+        return key
+
+    @staticmethod
+    def __cache_tag(api_endpoint: str) -> str:
+        # Cached responses are grouped per budget: "budgets/<budget_id>"
+        return "/".join(api_endpoint.strip("/").split("/")[:2])
+
+    @property
+    def cache(self) -> Optional[ResponseCache]:
+        return self._cache
+
+    @property
+    def session(self) -> requests.Session:
+        return self._session
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        return self._rate_limiter
+
+    @property
+    def single_flight(self) -> Optional[SingleFlight]:
+        return self._single_flight
+
+    @property
+    def codec(self) -> JSONCodec:
+        return self._codec
+
+    @property
+    def instrumentation(self) -> Optional[Instrumentation]:
+        return self._instrumentation
+
     @property
     def json_header(self):
-        header = self._headers
+        header = dict(self._headers)
         header["Content-Type"] = "application/json"
         return header
 
     @staticmethod
     def __check_for_errors(resp: requests.Response):
         if resp.status_code not in [200, 201, 202, 204]:
-            raise requests.exceptions.HTTPError(resp.text)
+            raise requests.exceptions.HTTPError(resp.text, response=resp)
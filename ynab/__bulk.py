@@ -0,0 +1,171 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+import requests
+
+# Statuses that blame the payload - the chunk is split to find the rows at fault
+_ROW_ERRORS = (400, 409, 422)
+
+
+@dataclass
+class RowError:
+    transaction: object
+    error: Exception
+
+    def __repr__(self):
+        return f"RowError(transaction={self.transaction!r}, error='{self.error}')"
+
+
+@dataclass
+class ChunkResult:
+    index: int
+    method: str
+    size: int
+    saved: list = field(default_factory=list)
+    errors: List[RowError] = field(default_factory=list)
+    requests: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def __repr__(self):
+        return (
+            f"ChunkResult("
+            f"index={self.index}, "
+            f"method='{self.method}', "
+            f"saved={len(self.saved)}/{self.size}, "
+            f"errors={len(self.errors)}"
+            f")"
+        )
+
+
+@dataclass
+class BulkResult:
+    chunks: List[ChunkResult] = field(default_factory=list)
+    skipped: list = field(default_factory=list)
+    # Duplicates sent as updates of the transaction they duplicate
+    converted: list = field(default_factory=list)
+    unchanged: list = field(default_factory=list)
+
+    @property
+    def saved(self) -> list:
+        return [t for c in self.chunks for t in c.saved]
+
+    @property
+    def errors(self) -> List[RowError]:
+        return [e for c in self.chunks for e in c.errors]
+
+    @property
+    def ok(self) -> bool:
+        return all(c.ok for c in self.chunks)
+
+    def __repr__(self):
+        return (
+            f"BulkResult("
+            f"chunks={len(self.chunks)}, "
+            f"saved={len(self.saved)}, "
+            f"skipped={len(self.skipped)}, "
+            f"converted={len(self.converted)}, "
+            f"unchanged={len(self.unchanged)}, "
+            f"errors={len(self.errors)}"
+            f")"
+        )
+
+
+class BulkWriteError(requests.exceptions.HTTPError):
+    """
+    Raised by save_many when some rows could not be saved - the rows that could are
+    saved, and the full result is attached
+    """
+
+    def __init__(self, result: BulkResult):
+        self.result = result
+        super().__init__(f"{len(result.errors)} transaction(s) failed to save: {result.errors[0].error}")
+
+
+class BulkWriter(object):
+    """
+    Splits large batches into chunks and sends them concurrently. A chunk rejected
+    because of its payload is split in half and retried until the failing rows are
+    isolated, so one bad row doesn't fail the whole batch.
+    """
+
+    def __init__(self, api, chunk_size: int = 500, max_workers: int = 4, minimal_updates: bool = True):
+        """
+        :param api: TransactionAPI
+        :param chunk_size: int : Transactions per request
+        :param max_workers: int : Chunks in flight at once - every request still waits for the rate limiter
+        :param minimal_updates: bool : PATCH only the changed fields of loaded transactions
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+
+        self.api = api
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.minimal_updates = minimal_updates
+
+    def write(self, transactions: list) -> BulkResult:
+        """
+        Update transactions that have an id and create the others
+        :return: BulkResult
+        """
+        updates = [t for t in transactions if t.id]
+        creates = [t for t in transactions if not t.id]
+
+        update = functools.partial(self.api.update_transaction, minimal=self.minimal_updates)
+
+        jobs = [("PATCH", update, c) for c in self.__chunks(updates)]
+        jobs += [("POST", self.api.create_transaction, c) for c in self.__chunks(creates)]
+
+        if not jobs:
+            return BulkResult()
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(jobs)))) as executor:
+            futures = [
+                executor.submit(self.__run_chunk, index, method, send, chunk)
+                for index, (method, send, chunk) in enumerate(jobs)
+            ]
+
+            return BulkResult(chunks=[f.result() for f in futures])
+
+    def __chunks(self, transactions: list) -> List[list]:
+        return [transactions[i:i + self.chunk_size] for i in range(0, len(transactions), self.chunk_size)]
+
+    def __run_chunk(self, index: int, method: str, send: Callable, chunk: list) -> ChunkResult:
+        result = ChunkResult(index=index, method=method, size=len(chunk))
+        self.__send(send, chunk, result)
+        return result
+
+    def __send(self, send: Callable, rows: list, result: ChunkResult) -> None:
+        result.requests += 1
+
+        try:
+            saved = send(rows)
+        except requests.exceptions.HTTPError as e:
+            status = self.__status(e)
+
+            if status in _ROW_ERRORS and len(rows) > 1:
+                middle = len(rows) // 2
+                self.__send(send, rows[:middle], result)
+                self.__send(send, rows[middle:], result)
+            else:
+                result.errors.extend(RowError(transaction=t, error=e) for t in rows)
+            return
+        except requests.exceptions.RequestException as e:
+            result.errors.extend(RowError(transaction=t, error=e) for t in rows)
+            return
+
+        result.saved.extend(saved if isinstance(saved, list) else [saved])
+
+    @staticmethod
+    def __status(error: requests.exceptions.HTTPError) -> Optional[int]:
+        return None if error.response is None else error.response.status_code
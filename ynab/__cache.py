@@ -0,0 +1,211 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class ResponseCache(ABC):
+    """
+    Cache of GET responses. Every entry carries a tag (the budget it belongs to) and the
+    tag's generation when it was stored - a write bumps the generation, which makes all
+    entries of that tag stale at once, much like a changed ETag.
+    """
+
+    def __init__(self, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        """
+        :param ttl: float : Seconds an entry stays fresh
+        :param clock: Clock used for expiry - replaceable for tests
+        """
+        self.ttl = ttl
+        self._clock = clock
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self, tag: str) -> int:
+        with self._lock:
+            return self._generations.get(tag, 0)
+
+    def invalidate(self, tag: str) -> None:
+        with self._lock:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    @abstractmethod
+    def get(self, key: str, tag: str) -> Optional[requests.Response]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: str, tag: str, resp: requests.Response, generation: Optional[int] = None) -> None:
+        """
+        :param generation: int : The tag's generation when the request was sent - a response
+            that raced a write is not stored
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def _record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+class MemoryCache(ResponseCache):
+    """
+    In-memory TTL cache with least-recently-used eviction
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        """
+        :param maxsize: int : Number of responses kept before the least recently used is evicted
+        :param ttl: float : Seconds an entry stays fresh
+        """
+        super().__init__(ttl=ttl, clock=clock)
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str, tag: str) -> Optional[requests.Response]:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                stored_at, generation, resp = entry
+
+                if self._clock() - stored_at <= self.ttl and generation == self.generation(tag):
+                    self._entries.move_to_end(key)
+                    self._record(True)
+                    return resp
+
+                del self._entries[key]
+
+            self._record(False)
+            return None
+
+    def set(self, key: str, tag: str, resp: requests.Response, generation: Optional[int] = None) -> None:
+        with self._lock:
+            current = self.generation(tag)
+
+            if generation is not None and generation != current:
+                return
+
+            self._entries[key] = (self._clock(), current, resp)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCache(ResponseCache):
+    """
+    SQLite backed TTL/LRU cache - survives restarts of the process
+    """
+
+    def __init__(self, path: str, maxsize: int = 1024, ttl: float = 300.0, clock: Callable[[], float] = time.time):
+        """
+        :param path: string : SQLite database file
+        :param maxsize: int : Number of responses kept before the least recently used is evicted
+        :param ttl: float : Seconds an entry stays fresh
+        """
+        super().__init__(ttl=ttl, clock=clock)
+        self.maxsize = maxsize
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, tag TEXT, generation INTEGER, stored_at REAL, "
+                "used_at REAL, status INTEGER, url TEXT, headers TEXT, content BLOB)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_used_at ON responses (used_at)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS generations (tag TEXT PRIMARY KEY, generation INTEGER)"
+            )
+            self._generations.update(self._conn.execute("SELECT tag, generation FROM generations"))
+
+    def invalidate(self, tag: str) -> None:
+        with self._lock, self._conn:
+            super().invalidate(tag)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO generations (tag, generation) VALUES (?, ?)",
+                (tag, self._generations[tag]),
+            )
+            self._conn.execute("DELETE FROM responses WHERE tag = ?", (tag,))
+
+    def get(self, key: str, tag: str) -> Optional[requests.Response]:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT generation, stored_at, status, url, headers, content FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+            if row is None:
+                self._record(False)
+                return None
+
+            generation, stored_at, status, url, headers, content = row
+            now = self._clock()
+
+            if now - stored_at > self.ttl or generation != self.generation(tag):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._record(False)
+                return None
+
+            self._conn.execute("UPDATE responses SET used_at = ? WHERE key = ?", (now, key))
+
+        self._record(True)
+
+        resp = requests.Response()
+        resp.status_code = status
+        resp.url = url
+        resp.headers = CaseInsensitiveDict(json.loads(headers))
+        resp._content = content
+        return resp
+
+    def set(self, key: str, tag: str, resp: requests.Response, generation: Optional[int] = None) -> None:
+        now = self._clock()
+
+        with self._lock, self._conn:
+            current = self.generation(tag)
+
+            if generation is not None and generation != current:
+                return
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, tag, generation, stored_at, used_at, status, url, headers, content) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, tag, current, now, now, resp.status_code, resp.url,
+                 json.dumps(dict(resp.headers)), resp.content),
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
@@ -4,9 +4,12 @@
 # https://opensource.org/licenses/MIT
 
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from ynab.__base import RESTBase
+from ynab.__export import CATEGORY_COLUMNS, ExportStats, export_rows, flatten_category_groups
+from ynab.__index import NameIndex
+from ynab.__utils import field_names
 
 
 @dataclass
@@ -25,13 +28,15 @@ class Category:
         known_args = {}
         unknown_args = {}
 
+        names = field_names(cls)
+
         for key, value in data.items():
-            if key in cls.__annotations__:
+            if key in names:
                 known_args[key] = value
             else:
                 unknown_args[key] = value
 
-        if not known_args["category_group_name"]:
+        if not known_args.get("category_group_name"):
             known_args["category_group_name"] = category_name
 
         return cls(**known_args, meta=unknown_args)
@@ -50,17 +55,25 @@ class CategoriesAPI(RESTBase):
         super().__init__(**kwargs)
         self._budget_id = budget_id
         self._budget_uri = f"/budgets/{budget_id}/"
+        self._model = kwargs.get("models", {}).get("categories", Category)
+
+    def __load_categories_from_json(self, data: dict):
+        return self._build("categories", lambda: self.__build_categories(data))
 
-    @staticmethod
-    def __load_categories_from_json(data: dict):
+    def __build_categories(self, data: dict):
         ret_list = []
         for group in data["data"]["category_groups"]:
-            ret_list.extend(
-                [
-                    Category.from_dict(c, category_name=group["name"])
-                    for c in group["categories"]
-                ]
-            )
+            categories = [
+                self._model.from_dict(c, category_name=group["name"])
+                for c in group["categories"]
+            ]
+
+            # Categories of a deleted group are gone as well
+            if group.get("deleted"):
+                for c in categories:
+                    c.deleted = True
+
+            ret_list.extend(categories)
 
         return ret_list
 
@@ -70,19 +83,80 @@ class CategoriesAPI(RESTBase):
 
         resp = self._rest_call[method](api_path)
 
-        return self.__load_categories_from_json(resp.json())
+        return self.__load_categories_from_json(self._decode(resp))
+
+    def export(
+        self, path: str, format: Optional[str] = None, include_meta: bool = False, batch_size: int = 10000
+    ) -> ExportStats:
+        """
+        Stream categories, one row per category with its group, into a Parquet, Arrow IPC
+        or CSV file - see TransactionAPI.export
+        """
+        groups = self._iter_array(self._budget_uri + f"categories/", ("data", "category_groups"))
+
+        return export_rows(flatten_category_groups(groups), path, CATEGORY_COLUMNS, format, include_meta, batch_size)
+
+    def get_changes(
+        self, last_knowledge_of_server: Optional[int] = None
+    ) -> Tuple[List[Category], int]:
+        """
+        Get the categories changed since the given server knowledge - including deleted ones
+        :param last_knowledge_of_server: int : Knowledge returned by the previous call - None for everything
+        :return: (categories, server_knowledge)
+        """
+        method = "GET"
+        api_path = self._budget_uri + f"categories/"
+        params = {}
+
+        if last_knowledge_of_server is not None:
+            params["last_knowledge_of_server"] = last_knowledge_of_server
+
+        data = self._decode(self._rest_call[method](api_path, params, cacheable=last_knowledge_of_server is None))
+
+        return self.__load_categories_from_json(data), data["data"]["server_knowledge"]
+
+    def get_by_name(
+        self,
+        name: str,
+        group_name: Optional[str] = None,
+        case_sensitive: bool = True,
+        refresh: bool = False,
+    ):
+        """
+        Find a category by name. Names are only unique within a category group.
+        The budget index answers without a request - a delta is pulled on a miss, once
+        the index is older than sync.max_age, or on refresh.
+        :param name: string : Category name
+        :param group_name: string : Category group name - required when the name exists in several groups
+        :param case_sensitive: bool : Compare names case-insensitively when False
+        :param refresh: bool : Pull the latest delta before looking the name up
+        :return: Category or None
+        :raises AmbiguousNameError: More than one category matches
+        """
+        if self.parent is None:
+            index = NameIndex(group_attr="category_group_name")
+            index.update(self.get_all())
+            return index.get_by_name(name, group=group_name, case_sensitive=case_sensitive)
+
+        sync = self.parent.sync
+        storage = getattr(self.parent, "storage", None)
+
+        def lookup():
+            if storage is not None:
+                return storage.get_category_by_name(
+                    name, group_name=group_name, case_sensitive=case_sensitive
+                )
+            return sync.index.categories.get_by_name(name, group=group_name, case_sensitive=case_sensitive)
 
-    def get_by_name(self, name: str):
-        all_categories = self.get_all()
+        refreshed = sync.warm("categories", refresh=refresh)
+        category = lookup()
 
-        for c in all_categories:
-            if c.name == name:
-                ret_val = c
-                break
-        else:
-            ret_val = None
+        # The category may have been added since the last delta
+        if category is None and not refreshed:
+            sync.warm("categories", refresh=True)
+            category = lookup()
 
-        return ret_val
+        return category
 
     def to_dict(self) -> list[dict[str, str]]:
         categories = self.get_all()
@@ -0,0 +1,87 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import json
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+
+class JSONCodec(object):
+    """
+    Encodes request payloads and decodes response bodies. The default uses the
+    standard library - subclasses plug in faster backends.
+    """
+
+    name = "json"
+
+    def dumps(self, data) -> bytes:
+        return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def loads(self, content: bytes):
+        return json.loads(content)
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+class OrjsonCodec(JSONCodec):
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("OrjsonCodec requires orjson - install it with 'pip install ynab[fast]'")
+
+    def dumps(self, data) -> bytes:
+        return orjson.dumps(data)
+
+    def loads(self, content: bytes):
+        return orjson.loads(content)
+
+
+class MsgspecCodec(JSONCodec):
+    name = "msgspec"
+
+    def __init__(self):
+        if msgspec is None:
+            raise ImportError("MsgspecCodec requires msgspec - install it with 'pip install msgspec'")
+
+        # Encoder and decoder objects are reusable and skip per-call setup
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, data) -> bytes:
+        return self._encoder.encode(data)
+
+    def loads(self, content: bytes):
+        return self._decoder.decode(content)
+
+
+def default_codec(name: Optional[str] = None) -> JSONCodec:
+    """
+    The fastest installed codec - orjson, then msgspec, then the standard library
+    :param name: string : Force 'orjson', 'msgspec' or 'json'
+    """
+    codecs = {"orjson": OrjsonCodec, "msgspec": MsgspecCodec, "json": JSONCodec}
+
+    if name is not None:
+        if name not in codecs:
+            raise ValueError(f"Unknown codec '{name}' - use one of {', '.join(codecs)}")
+        return codecs[name]()
+
+    if orjson is not None:
+        return OrjsonCodec()
+    if msgspec is not None:
+        return MsgspecCodec()
+
+    return JSONCodec()
@@ -0,0 +1,173 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import dataclasses
+from dataclasses import MISSING, field, fields, make_dataclass
+from operator import itemgetter
+from typing import Dict, Optional, Tuple
+
+from ynab.__accounts import Account
+from ynab.__categories import Category
+from ynab.__transactions import SAVE_FIELDS, Subtransaction, Transaction, _sub_save_state
+
+# Attributes dataclass() generates - everything else (properties, methods, __repr__) is shared
+_GENERATED = {
+    "__init__", "__eq__", "__hash__", "__match_args__", "__annotations__", "__dict__",
+    "__weakref__", "__doc__", "__module__", "__qualname__", "__dataclass_fields__",
+    "__dataclass_params__", "from_dict", "meta",
+}
+
+# Unknown-key tuples are interned, so objects with the same extra keys share one tuple
+_SHAPES: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _meta(self) -> dict:
+    """
+    Keys of the API data that are not model fields - built on access
+    """
+    return dict(zip(self._meta_keys, self._meta_values))
+
+
+def _compact(cls, nested: Optional[dict] = None):
+    """
+    Build a __slots__ variant of a model dataclass with the same fields and behaviour.
+    Unknown keys are kept as an interned key tuple plus a value tuple instead of a dict.
+    :param nested: dict : field name -> compact class its list items are parsed into
+    """
+    model_fields = [
+        (
+            f.name,
+            f.type,
+            field(default=f.default, default_factory=f.default_factory, init=f.init,
+                  repr=f.repr, compare=f.compare),
+        )
+        for f in fields(cls)
+        if f.name != "meta"
+    ]
+    model_fields += [
+        ("_meta_keys", tuple, field(default=(), init=False, repr=False, compare=False)),
+        ("_meta_values", tuple, field(default=(), init=False, repr=False, compare=False)),
+    ]
+
+    names = {f[0] for f in model_fields}
+    namespace = {
+        name: attr
+        for name, attr in vars(cls).items()
+        if name not in _GENERATED and name not in names
+    }
+    namespace["meta"] = property(_meta)
+
+    compact = make_dataclass(f"Compact{cls.__name__}", model_fields, namespace=namespace, slots=True)
+    compact.__module__ = __name__
+    compact.__doc__ = f"Memory efficient, __slots__ based variant of {cls.__name__}"
+
+    compact._field_names = frozenset(f.name for f in fields(cls) if f.init and f.name != "meta")
+    compact._shapes = {}
+    compact._build = _make_builder(compact, nested or {})
+
+    return compact
+
+
+def _make_builder(cls, nested: dict):
+    """
+    Generate a constructor that assigns every slot directly - like dataclasses does for __init__,
+    the field set is resolved once here instead of once per object
+    """
+    env = {"__new": object.__new__, "__cls": cls, "__shapes": cls._shapes, "__shape": _shape,
+           "__sub_state": _sub_save_state}
+    lines = ["def __build(data):", "    obj = __new(__cls)", "    get = data.get"]
+
+    names = {f.name for f in dataclasses.fields(cls)}
+
+    for i, f in enumerate(dataclasses.fields(cls)):
+        env[f"__d{i}"] = f.default
+        env[f"__f{i}"] = f.default_factory
+
+        if not f.init:
+            value = f"__d{i}"
+        elif f.name in nested:
+            env[f"__n{i}"] = nested[f.name]._build
+            value = f"[__n{i}(x) for x in get({f.name!r}) or ()]"
+        elif f.default_factory is not MISSING:
+            value = f"data[{f.name!r}] if {f.name!r} in data else __f{i}()"
+        else:
+            value = f"get({f.name!r}, __d{i})"
+
+        lines.append(f"    obj.{f.name} = {value}")
+
+    if "_snapshot" in names:
+        # Same tuple as Transaction._save_state, taken inline instead of through mark_clean()
+        state = ", ".join(f"obj.{name}" for name in SAVE_FIELDS)
+        lines.append(
+            f"    obj._snapshot = ({state}, tuple(map(__sub_state, obj.subtransactions)) if obj.subtransactions else ())"
+        )
+
+    lines += [
+        "    unknown, values = __shapes.get(tuple(data)) or __shape(__cls, data)",
+        "    if unknown:",
+        "        obj._meta_keys = unknown",
+        "        obj._meta_values = values(data)",
+        "    return obj",
+    ]
+
+    exec("\n".join(lines), env)
+    return env["__build"]
+
+
+def _shape(cls, data: dict):
+    # API rows share their key order, so the full key tuple identifies the unknown keys
+    keys = tuple(data)
+    shape = cls._shapes.get(keys)
+
+    if shape is None:
+        unknown = tuple(k for k in keys if k not in cls._field_names)
+        unknown = _SHAPES.setdefault(unknown, unknown)
+
+        if len(unknown) == 1:
+            values = lambda d, k=unknown[0]: (d[k],)  # noqa: E731
+        else:
+            values = itemgetter(*unknown) if unknown else None
+
+        shape = cls._shapes[keys] = (unknown, values)
+
+    return shape
+
+
+CompactSubtransaction = _compact(Subtransaction)
+CompactTransaction = _compact(Transaction, nested={"subtransactions": CompactSubtransaction})
+CompactAccount = _compact(Account)
+CompactCategory = _compact(Category)
+
+
+def _from_dict(cls, data: dict):
+    return cls._build(data)
+
+
+def _account_from_dict(cls, api, data: dict):
+    obj = cls._build(data)
+    obj.api = api
+    return obj
+
+
+def _category_from_dict(cls, data: dict, category_name: Optional[str] = None):
+    obj = cls._build(data)
+
+    if not obj.category_group_name:
+        obj.category_group_name = category_name
+
+    return obj
+
+
+CompactSubtransaction.from_dict = classmethod(_from_dict)
+CompactTransaction.from_dict = classmethod(_from_dict)
+CompactAccount.from_dict = classmethod(_account_from_dict)
+CompactCategory.from_dict = classmethod(_category_from_dict)
+
+# Model classes used by the sub-APIs when a client is created with compact_models=True
+COMPACT_MODELS = {
+    "transactions": CompactTransaction,
+    "accounts": CompactAccount,
+    "categories": CompactCategory,
+}
@@ -0,0 +1,188 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import copy
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+Fingerprint = Tuple[Optional[str], Optional[str], int, str]
+
+# Fields a bank import fills in - category, flag and cleared status are left as the user set them
+IMPORT_FIELDS = ("date", "amount", "memo", "payee_id", "payee_name")
+
+
+class DedupIndex(object):
+    """
+    Local index of existing transactions by import_id and by an
+    (account_id, date, amount, payee) fingerprint, used to spot rows that were
+    already imported without asking the API about each one.
+    """
+
+    def __init__(self, transactions: Iterable = ()):
+        self._by_id: Dict[str, object] = {}
+        self._by_import_id: Dict[str, object] = {}
+        self._by_fingerprint: Dict[Fingerprint, Dict[str, object]] = {}
+        self._lock = threading.RLock()
+        self.update(transactions)
+
+    @classmethod
+    def from_api(cls, api, since_date: Optional[str] = None) -> "DedupIndex":
+        """
+        Build the index from the budget's transactions and keep it current from every
+        transaction the API returns afterwards
+        :param api: TransactionAPI
+        :param since_date: string : Only index transactions on or after this date
+        """
+        index = cls(api.get_all(since_date=since_date))
+        index.attach(api)
+        return index
+
+    def attach(self, api) -> None:
+        api.subscribe(self.update)
+
+    def detach(self, api) -> None:
+        api.unsubscribe(self.update)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    @staticmethod
+    def fingerprint(transaction) -> Fingerprint:
+        payee = transaction.payee_name or transaction.payee_id or ""
+        return transaction.account_id, transaction.date, transaction.amount, payee.casefold()
+
+    def update(self, transactions: Iterable) -> None:
+        """
+        Add or replace transactions - deleted ones are removed
+        """
+        with self._lock:
+            for t in transactions:
+                if not t.id:
+                    continue
+
+                self.__discard(t.id)
+
+                if not t.deleted:
+                    self.__add(t)
+
+    def remove(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            for id in ids:
+                self.__discard(id)
+
+    def find(self, transaction):
+        """
+        :return: The existing transaction the row duplicates, or None
+        """
+        with self._lock:
+            return self.__claim(transaction, set())
+
+    def resolve(self, transactions: Iterable, on_duplicate: str = "skip") -> Tuple[list, list, list]:
+        """
+        Split a batch into rows to send and duplicates of existing transactions.
+        Each existing transaction absorbs at most one row of the batch, so two identical
+        purchases on the same day are only skipped if both already exist.
+        :param on_duplicate: string : 'skip' drops duplicates, 'update' turns them into updates of the existing row
+        :return: (rows to save, skipped duplicates, updates made from duplicates - also in rows to save)
+        """
+        if on_duplicate not in ("skip", "update"):
+            raise ValueError("on_duplicate must be 'skip' or 'update'")
+
+        to_save, skipped, updates = [], [], []
+        claimed = set()
+        seen_import_ids = set()
+
+        with self._lock:
+            for t in transactions:
+                if t.id:
+                    to_save.append(t)
+                    continue
+
+                existing = self.__claim(t, claimed)
+                repeated = t.import_id is not None and t.import_id in seen_import_ids
+
+                if t.import_id:
+                    seen_import_ids.add(t.import_id)
+
+                if existing is None and not repeated:
+                    to_save.append(t)
+                elif on_duplicate == "update" and existing is not None:
+                    update = self.as_update(existing, t)
+                    to_save.append(update)
+                    updates.append(update)
+                else:
+                    skipped.append(t)
+
+        return to_save, skipped, updates
+
+    @staticmethod
+    def as_update(existing, row):
+        """
+        A copy of the existing transaction with the fields the imported row sets - only
+        those are sent, so the rest of the existing transaction is kept
+        """
+        update = copy.copy(existing)
+
+        if update._snapshot is None:
+            update.mark_clean()
+
+        for name in IMPORT_FIELDS:
+            value = getattr(row, name)
+
+            if value is None:
+                continue
+            # A fingerprint match ignores the payee's case - don't rename the payee for it
+            if name == "payee_name" and (existing.payee_name or "").casefold() == value.casefold():
+                continue
+
+            setattr(update, name, value)
+
+        return update
+
+    def __claim(self, transaction, claimed: set):
+        if transaction.import_id and transaction.import_id in self._by_import_id:
+            existing = self._by_import_id[transaction.import_id]
+
+            if existing.id in claimed:
+                return None
+
+            claimed.add(existing.id)
+            return existing
+
+        for existing in self._by_fingerprint.get(self.fingerprint(transaction), {}).values():
+            # Two different import ids are two different bank rows, however alike they look
+            if transaction.import_id and existing.import_id:
+                continue
+
+            if existing.id not in claimed:
+                claimed.add(existing.id)
+                return existing
+
+        return None
+
+    def __add(self, transaction) -> None:
+        self._by_id[transaction.id] = transaction
+
+        if transaction.import_id:
+            self._by_import_id[transaction.import_id] = transaction
+
+        self._by_fingerprint.setdefault(self.fingerprint(transaction), {})[transaction.id] = transaction
+
+    def __discard(self, id: str) -> None:
+        transaction = self._by_id.pop(id, None)
+
+        if transaction is None:
+            return
+
+        if transaction.import_id and self._by_import_id.get(transaction.import_id) is transaction:
+            del self._by_import_id[transaction.import_id]
+
+        key = self.fingerprint(transaction)
+        matches = self._by_fingerprint.get(key)
+
+        if matches is not None:
+            matches.pop(id, None)
+            if not matches:
+                del self._by_fingerprint[key]
@@ -0,0 +1,277 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import csv
+import json
+import os
+from dataclasses import dataclass
+from datetime import date
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+Columns = Sequence[Tuple[str, str]]
+
+TRANSACTION_COLUMNS: Columns = (
+    ("id", "string"),
+    ("subtransaction_id", "string"),
+    ("date", "date"),
+    ("amount", "int64"),
+    ("memo", "string"),
+    ("cleared", "string"),
+    ("approved", "bool"),
+    ("flag_color", "string"),
+    ("account_id", "string"),
+    ("account_name", "string"),
+    ("payee_id", "string"),
+    ("payee_name", "string"),
+    ("category_id", "string"),
+    ("category_name", "string"),
+    ("transfer_account_id", "string"),
+    ("transfer_transaction_id", "string"),
+    ("matched_transaction_id", "string"),
+    ("import_id", "string"),
+    ("deleted", "bool"),
+)
+
+ACCOUNT_COLUMNS: Columns = (
+    ("id", "string"),
+    ("name", "string"),
+    ("type", "string"),
+    ("on_budget", "bool"),
+    ("closed", "bool"),
+    ("note", "string"),
+    ("balance", "int64"),
+    ("cleared_balance", "int64"),
+    ("uncleared_balance", "int64"),
+    ("transfer_payee_id", "string"),
+    ("deleted", "bool"),
+)
+
+CATEGORY_COLUMNS: Columns = (
+    ("id", "string"),
+    ("category_group_id", "string"),
+    ("category_group_name", "string"),
+    ("name", "string"),
+    ("hidden", "bool"),
+    ("note", "string"),
+    ("budgeted", "int64"),
+    ("activity", "int64"),
+    ("balance", "int64"),
+    ("goal_type", "string"),
+    ("deleted", "bool"),
+)
+
+FORMATS = {
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+    ".csv": "csv",
+}
+
+# A split's own values replace the parent's - the others only when the split has one
+_SUB_FIELDS = ("amount", "category_id", "category_name")
+_SUB_FALLBACK_FIELDS = ("memo", "payee_id", "payee_name", "transfer_account_id", "transfer_transaction_id")
+
+
+@dataclass
+class ExportStats:
+    path: str
+    format: str
+    rows: int = 0
+    batches: int = 0
+
+
+def _require_pyarrow(format: str) -> None:
+    if pa is None:
+        raise ImportError(f"Exporting to {format} requires pyarrow - install it with 'pip install ynab[arrow]'")
+
+
+def resolve_format(path: str, format: Optional[str] = None) -> str:
+    """
+    The export format for path - explicit, else from the extension, else Parquet
+    when pyarrow is installed and CSV when it isn't
+    :param format: string : 'parquet', 'arrow' (also 'ipc' or 'feather') or 'csv'
+    """
+    if format is None:
+        format = FORMATS.get(os.path.splitext(str(path))[1].lower())
+
+        if format is None:
+            return "parquet" if pa is not None else "csv"
+
+    format = {"ipc": "arrow", "feather": "arrow"}.get(format, format)
+
+    if format not in ("parquet", "arrow", "csv"):
+        raise ValueError(f"Unknown export format '{format}' - use parquet, arrow or csv")
+    if format != "csv":
+        _require_pyarrow(format)
+
+    return format
+
+
+def flatten_transactions(rows: Iterable[dict], expand_splits: bool = True) -> Iterator[dict]:
+    """
+    One row per transaction, or per subtransaction of a split, with the parent's date,
+    account and status repeated on each split row. Deleted subtransactions are dropped.
+    :param rows: Transaction dicts as returned by the API
+    """
+    for row in rows:
+        subtransactions = row.get("subtransactions")
+
+        if not expand_splits or not subtransactions:
+            yield row
+            continue
+
+        for sub in subtransactions:
+            if sub.get("deleted"):
+                continue
+
+            flat = dict(row)
+            flat["subtransaction_id"] = sub.get("id")
+
+            for name in _SUB_FIELDS:
+                flat[name] = sub.get(name)
+            for name in _SUB_FALLBACK_FIELDS:
+                if sub.get(name) is not None:
+                    flat[name] = sub[name]
+
+            yield flat
+
+
+def flatten_category_groups(groups: Iterable[dict]) -> Iterator[dict]:
+    """
+    One row per category with its group's id and name - categories of a deleted group are deleted
+    """
+    for group in groups:
+        for category in group.get("categories") or ():
+            flat = dict(category)
+            flat.setdefault("category_group_id", group.get("id"))
+            flat["category_group_name"] = flat.get("category_group_name") or group.get("name")
+
+            if group.get("deleted"):
+                flat["deleted"] = True
+
+            yield flat
+
+
+class _CSVWriter(object):
+    def __init__(self, path: str, names: List[str]):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(names)
+
+    def write(self, columns: List[list]) -> None:
+        self._writer.writerows(zip(*columns))
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ArrowWriter(object):
+    def __init__(self, path: str, columns: Columns, format: str):
+        types = {"string": pa.string(), "int64": pa.int64(), "bool": pa.bool_(), "date": pa.date32()}
+        self._schema = pa.schema([(name, types[kind]) for name, kind in columns])
+        self._format = format
+
+        if format == "parquet":
+            self._sink = None
+            self._writer = pq.ParquetWriter(path, self._schema)
+        else:
+            # The IPC file format, not the stream format, so it can be memory-mapped
+            self._sink = pa.OSFile(path, "wb")
+            self._writer = pa.ipc.new_file(self._sink, self._schema)
+
+    def write(self, columns: List[list]) -> None:
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(values, type=f.type) for values, f in zip(columns, self._schema)], schema=self._schema
+        )
+
+        if self._format == "parquet":
+            self._writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._writer.write_batch(batch)
+
+    def close(self) -> None:
+        self._writer.close()
+
+        if self._sink is not None:
+            self._sink.close()
+
+
+def export_rows(
+    rows: Iterable[dict],
+    path: str,
+    columns: Columns,
+    format: Optional[str] = None,
+    include_meta: bool = False,
+    batch_size: int = 10000,
+) -> ExportStats:
+    """
+    Write flat dict rows to a Parquet, Arrow IPC or CSV file, batch_size rows at a
+    time - memory stays bounded by one batch however many rows there are
+    :param columns: (name, type) pairs - types are string, int64, bool or date
+    :param include_meta: bool : Add a 'meta' column with the remaining keys of each row as JSON
+    :return: ExportStats
+    """
+    format = resolve_format(path, format)
+    names = [name for name, _ in columns]
+    known = set(names) | {"subtransactions"}
+    kinds = [kind for _, kind in columns]
+
+    if include_meta:
+        columns = (*columns, ("meta", "string"))
+
+    writer = _CSVWriter(str(path), [name for name, _ in columns]) if format == "csv" else _ArrowWriter(str(path), columns, format)
+    stats = ExportStats(path=str(path), format=format)
+    rows = iter(rows)
+
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+
+            if not batch:
+                break
+
+            data = [[row.get(name) for row in batch] for name in names]
+
+            # Arrow wants date objects, CSV keeps the ISO strings
+            if format != "csv":
+                for values, kind in zip(data, kinds):
+                    if kind == "date":
+                        values[:] = [date.fromisoformat(v) if v else None for v in values]
+
+            if include_meta:
+                data.append([
+                    json.dumps({k: v for k, v in row.items() if k not in known}, separators=(",", ":"))
+                    for row in batch
+                ])
+
+            writer.write(data)
+            stats.rows += len(batch)
+            stats.batches += 1
+    finally:
+        writer.close()
+
+    return stats
+
+
+def read_arrow(path: str, memory_map: bool = True):
+    """
+    Load an Arrow IPC export - memory-mapped, its columns are read from the page cache
+    without copying
+    :return: pyarrow.Table
+    """
+    _require_pyarrow("arrow")
+    source = pa.memory_map(str(path), "r") if memory_map else pa.OSFile(str(path), "rb")
+
+    return pa.ipc.open_file(source).read_all()
@@ -0,0 +1,75 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import threading
+from typing import Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call(object):
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent calls with the same key - the first caller runs the call and
+    everyone who asks for the same key while it is in flight gets its result, or its
+    exception. Nothing is kept once the call finishes, so it is not a cache.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        """
+        :param key: Identifies equivalent calls, e.g. (method, url, params)
+        :param func: Run only if no call with the key is in flight
+        """
+        with self._lock:
+            call = self._calls.get(key)
+
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+
+            if call.error is not None:
+                raise call.error
+
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+            call.done.set()
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
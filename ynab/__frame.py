@@ -0,0 +1,253 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+from array import array
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+_EPOCH = date(1970, 1, 1).toordinal()
+
+_GROUP_KEYS = ("month", "account", "category", "payee")
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("TransactionFrame requires numpy - install it with 'pip install ynab[frame]'")
+
+
+class _Dictionary(object):
+    """
+    Dictionary encoding - maps each distinct value to a small integer code
+    """
+
+    def __init__(self):
+        self.values: List = []
+        self.codes: Dict = {}
+        self.names: Dict = {}
+
+    def encode(self, value, name=None) -> int:
+        code = self.codes.get(value)
+
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+
+        if name is not None:
+            self.names[value] = name
+
+        return code
+
+
+class _Builder(object):
+    """
+    Collects rows into compact typed arrays before they are handed to numpy
+    """
+
+    def __init__(self, expand_splits: bool):
+        self.expand_splits = expand_splits
+        self.ids: List[str] = []
+        self.amount = array("q")
+        self.day = array("i")
+        self.account = array("i")
+        self.category = array("i")
+        self.payee = array("i")
+        self.dictionaries = {"account": _Dictionary(), "category": _Dictionary(), "payee": _Dictionary()}
+
+    def add(self, row: dict) -> None:
+        if row.get("deleted"):
+            return
+
+        subtransactions = [s for s in row.get("subtransactions") or [] if not s.get("deleted")]
+
+        if self.expand_splits and subtransactions:
+            for sub in subtransactions:
+                self.__append(row, sub)
+        else:
+            self.__append(row, row)
+
+    def add_transaction(self, transaction) -> None:
+        if transaction.deleted:
+            return
+
+        row = {
+            "id": transaction.id,
+            "date": transaction.date,
+            "amount": transaction.amount,
+            "account_id": transaction.account_id,
+            "account_name": transaction.account_name,
+            "category_id": transaction.category_id,
+            "category_name": transaction.category_name,
+            "payee_id": transaction.payee_id,
+            "payee_name": transaction.payee_name,
+            "subtransactions": [
+                {
+                    "id": s.id,
+                    "amount": s.amount,
+                    "category_id": s.category_id,
+                    "category_name": s.category_name,
+                    "payee_id": s.payee_id,
+                    "payee_name": s.payee_name,
+                    "deleted": s.deleted,
+                }
+                for s in transaction.subtransactions
+            ],
+        }
+        self.add(row)
+
+    def __append(self, parent: dict, row: dict) -> None:
+        account, category, payee = (
+            self.dictionaries["account"],
+            self.dictionaries["category"],
+            self.dictionaries["payee"],
+        )
+        # Splits inherit the parent's payee when they don't name their own
+        payee_id = row.get("payee_id") or parent.get("payee_id")
+        payee_name = row.get("payee_name") or parent.get("payee_name")
+
+        self.ids.append(row.get("id"))
+        self.amount.append(row.get("amount") or 0)
+        self.day.append(date.fromisoformat(parent["date"]).toordinal() - _EPOCH)
+        self.account.append(account.encode(parent.get("account_id"), parent.get("account_name")))
+        self.category.append(category.encode(row.get("category_id"), row.get("category_name")))
+        self.payee.append(payee.encode(payee_id, payee_name))
+
+    def build(self) -> "TransactionFrame":
+        _require_numpy()
+
+        return TransactionFrame(
+            ids=np.array(self.ids, dtype=object),
+            amount=np.frombuffer(self.amount, dtype=np.int64).copy(),
+            date=np.frombuffer(self.day, dtype=np.int32).astype("datetime64[D]"),
+            codes={
+                "account": np.frombuffer(self.account, dtype=np.int32).copy(),
+                "category": np.frombuffer(self.category, dtype=np.int32).copy(),
+                "payee": np.frombuffer(self.payee, dtype=np.int32).copy(),
+            },
+            dictionaries=self.dictionaries,
+        )
+
+
+class TransactionFrame(object):
+    """
+    Columnar view of transactions for vectorized aggregation. Amounts are int64
+    milliunits, dates datetime64[D], and account/category/payee ids are dictionary
+    encoded int32 codes. Split transactions are expanded into one row per subtransaction
+    by default.
+    """
+
+    def __init__(self, ids, amount, date, codes: dict, dictionaries: dict):
+        self.ids = ids
+        self.amount = amount
+        self.date = date
+        self.codes = codes
+        self.dictionaries = dictionaries
+
+    @classmethod
+    def from_transactions(cls, transactions: Iterable, expand_splits: bool = True) -> "TransactionFrame":
+        """
+        :param transactions: Transaction objects, e.g. the result of TransactionAPI.get_all()
+        :param expand_splits: bool : One row per subtransaction instead of one per split parent
+        """
+        builder = _Builder(expand_splits)
+
+        for t in transactions:
+            builder.add_transaction(t)
+
+        return builder.build()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict], expand_splits: bool = True) -> "TransactionFrame":
+        """
+        Build straight from API dicts - e.g. a streamed response - without creating Transaction objects
+        """
+        builder = _Builder(expand_splits)
+
+        for row in rows:
+            builder.add(row)
+
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+    def __repr__(self):
+        return f"TransactionFrame(rows={len(self)}, total='{self.total() / 1000:.2f}')"
+
+    def column(self, name: str):
+        """
+        Decoded values of account, category or payee ids as an object array
+        """
+        return np.array(self.dictionaries[name].values, dtype=object)[self.codes[name]]
+
+    @property
+    def month(self):
+        return self.date.astype("datetime64[M]")
+
+    def total(self) -> int:
+        return int(self.amount.sum())
+
+    def filter(self, mask) -> "TransactionFrame":
+        return TransactionFrame(
+            ids=self.ids[mask],
+            amount=self.amount[mask],
+            date=self.date[mask],
+            codes={k: v[mask] for k, v in self.codes.items()},
+            dictionaries=self.dictionaries,
+        )
+
+    def between(self, start: Optional[str] = None, end: Optional[str] = None) -> "TransactionFrame":
+        """
+        Rows dated within [start, end] - either bound may be omitted
+        """
+        mask = np.ones(len(self), dtype=bool)
+
+        if start is not None:
+            mask &= self.date >= np.datetime64(start, "D")
+        if end is not None:
+            mask &= self.date <= np.datetime64(end, "D")
+
+        return self.filter(mask)
+
+    def sum_by(self, *keys: str) -> Dict[Tuple, int]:
+        """
+        Sum amounts per group, e.g. sum_by("month", "category")
+        :param keys: Any of 'month', 'account', 'category' and 'payee'
+        :return: dict : (key values...) -> summed milliunits
+        """
+        if not keys or any(k not in _GROUP_KEYS for k in keys):
+            raise ValueError(f"Group by one or more of {', '.join(_GROUP_KEYS)}")
+
+        if len(self) == 0:
+            return {}
+
+        columns, decoders = [], []
+        for key in keys:
+            if key == "month":
+                months = self.month.astype(np.int64)
+                columns.append(months - months.min())
+                decoders.append(lambda c, base=months.min(): str(np.datetime64(int(c + base), "M")))
+            else:
+                columns.append(self.codes[key].astype(np.int64))
+                decoders.append(lambda c, values=self.dictionaries[key].values: values[c])
+
+        # Combine the codes into one int64 group key, then sum each run of the sorted keys
+        shape = tuple(int(c.max()) + 1 for c in columns)
+        group = np.ravel_multi_index(columns, shape)
+        order = np.argsort(group, kind="stable")
+        group = group[order]
+        starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+        sums = np.add.reduceat(self.amount[order], starts)
+
+        result = {}
+        for flat, total in zip(group[starts].tolist(), sums.tolist()):
+            codes = np.unravel_index(flat, shape)
+            result[tuple(d(int(c)) for d, c in zip(decoders, codes))] = total
+
+        return result
@@ -0,0 +1,182 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class AmbiguousNameError(LookupError):
+    """
+    Raised when a name lookup matches more than one item
+    """
+
+
+@dataclass(frozen=True)
+class Payee:
+    id: Optional[str] = None
+    name: Optional[str] = None
+    deleted: Optional[bool] = None
+
+
+class NameIndex(object):
+    """
+    Dict based lookups by id, by name and by (group, name) - each with a case-insensitive
+    variant. Updating an item replaces its previous entries, so the index can be kept
+    current from deltas.
+    """
+
+    def __init__(self, group_attr: Optional[str] = None):
+        """
+        :param group_attr: string : Attribute that scopes names, e.g. category_group_name
+        """
+        self.group_attr = group_attr
+        self._by_id: Dict[str, object] = {}
+        self._by_name: Dict[str, Dict[str, object]] = {}
+        self._by_name_folded: Dict[str, Dict[str, object]] = {}
+        self._by_group: Dict[Tuple[str, str], Dict[str, object]] = {}
+        self._by_group_folded: Dict[Tuple[str, str], Dict[str, object]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._by_id
+
+    def __iter__(self):
+        return iter(list(self._by_id.values()))
+
+    def get(self, id: str):
+        return self._by_id.get(id)
+
+    def update(self, items: Iterable) -> None:
+        """
+        Add or replace items - items flagged deleted are removed
+        """
+        with self._lock:
+            for item in items:
+                self.__discard(item.id)
+
+                if not item.deleted:
+                    self.__add(item)
+
+    def remove(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            for id in ids:
+                self.__discard(id)
+
+    def clear(self) -> None:
+        with self._lock:
+            for bucket in self.__buckets():
+                bucket.clear()
+
+    def find_by_name(
+        self, name: str, group: Optional[str] = None, case_sensitive: bool = True
+    ) -> List:
+        """
+        Every item with the given name, optionally scoped to a group
+        """
+        if group is not None:
+            key = (group, name) if case_sensitive else (group.casefold(), name.casefold())
+            bucket = (self._by_group if case_sensitive else self._by_group_folded).get(key, {})
+        else:
+            key = name if case_sensitive else name.casefold()
+            bucket = (self._by_name if case_sensitive else self._by_name_folded).get(key, {})
+
+        return list(bucket.values())
+
+    def get_by_name(
+        self, name: str, group: Optional[str] = None, case_sensitive: bool = True
+    ):
+        """
+        :return: The single matching item, or None
+        :raises AmbiguousNameError: More than one item matches
+        """
+        matches = self.find_by_name(name, group=group, case_sensitive=case_sensitive)
+
+        if len(matches) > 1:
+            raise AmbiguousNameError(
+                f"{len(matches)} items are named '{name}'"
+                + ("" if self.group_attr is None else f" - pass a {self.group_attr} to choose one")
+            )
+
+        return matches[0] if matches else None
+
+    def __buckets(self):
+        return self._by_id, self._by_name, self._by_name_folded, self._by_group, self._by_group_folded
+
+    def __keys(self, item) -> Iterable[Tuple[dict, object]]:
+        name = item.name or ""
+        yield self._by_name, name
+        yield self._by_name_folded, name.casefold()
+
+        if self.group_attr is not None:
+            group = getattr(item, self.group_attr) or ""
+            yield self._by_group, (group, name)
+            yield self._by_group_folded, (group.casefold(), name.casefold())
+
+    def __add(self, item) -> None:
+        self._by_id[item.id] = item
+
+        for bucket, key in self.__keys(item):
+            bucket.setdefault(key, {})[item.id] = item
+
+    def __discard(self, id: str) -> None:
+        item = self._by_id.pop(id, None)
+
+        if item is None:
+            return
+
+        for bucket, key in self.__keys(item):
+            entries = bucket.get(key)
+            if entries is not None:
+                entries.pop(id, None)
+                if not entries:
+                    del bucket[key]
+
+
+class BudgetIndex(object):
+    """
+    Lookup indexes for the accounts, categories and payees of one budget
+    """
+
+    def __init__(self):
+        self.accounts = NameIndex()
+        self.categories = NameIndex(group_attr="category_group_name")
+        self.payees = NameIndex()
+
+    def update(self, endpoint: str, items: Iterable) -> None:
+        items = list(items)
+
+        if endpoint == "accounts":
+            self.accounts.update(items)
+        elif endpoint == "categories":
+            self.categories.update(items)
+        elif endpoint == "transactions":
+            self.payees.update(self.__payees(items))
+
+    def remove(self, endpoint: str, ids: Iterable[str]) -> None:
+        if endpoint == "accounts":
+            self.accounts.remove(ids)
+        elif endpoint == "categories":
+            self.categories.remove(ids)
+
+    def clear(self) -> None:
+        self.accounts.clear()
+        self.categories.clear()
+        self.payees.clear()
+
+    @staticmethod
+    def __payees(transactions: Iterable) -> List[Payee]:
+        # Payees are only known through the transactions that reference them
+        payees = {}
+
+        for t in transactions:
+            for row in [t, *t.subtransactions]:
+                if row.payee_id and not row.deleted:
+                    payees[row.payee_id] = Payee(id=row.payee_id, name=row.payee_name)
+
+        return list(payees.values())
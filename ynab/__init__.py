@@ -7,3 +7,27 @@ from ynab.api import YNABBudgetClient
 from ynab.__transactions import Transaction, Subtransaction
 from ynab.__accounts import Account
 from ynab.__categories import Category
+from ynab.__session import SessionConfig, create_session
+from ynab.__sync import BudgetSync, ChangeSet
+from ynab.__storage import SQLiteStore
+from ynab.__aio import AsyncYNABBudgetClient
+from ynab.__ratelimit import RateLimiter, RetryPolicy, TokenBucket
+from ynab.__cache import DiskCache, MemoryCache, ResponseCache
+from ynab.__index import AmbiguousNameError, BudgetIndex, NameIndex, Payee
+from ynab.__compact import CompactAccount, CompactCategory, CompactSubtransaction, CompactTransaction
+from ynab.__frame import TransactionFrame
+from ynab.__bulk import BulkResult, BulkWriteError, ChunkResult, RowError
+from ynab.__dedup import DedupIndex
+from ynab.__query import Where
+from ynab.__mock import MockYNABServer, SyntheticBudget
+from ynab.__instrument import (
+    Hook, Instrumentation, LoggingHook, MetricsCollector, ParseEvent, RequestEvent, SpanRecorder
+)
+from ynab.__manager import YNABClientManager
+from ynab.__rollup import BudgetRollup
+from ynab.__codec import JSONCodec, MsgspecCodec, OrjsonCodec, default_codec
+from ynab.__watch import BudgetWatcher, WatchEvent
+from ynab.__flight import SingleFlight
+from ynab.__rules import Rule, RuleSet
+from ynab.__reconcile import Match, ReconcileResult, Reconciler, StatementRow
+from ynab.__export import ExportStats, read_arrow
@@ -0,0 +1,356 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("ynab")
+
+# Path segments that name a resource - every other segment is an id
+_RESOURCES = frozenset({"budgets", "accounts", "categories", "transactions", "import", "payees", "months"})
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def endpoint_template(path: str) -> str:
+    """
+    Replace the ids in an API path, so metrics group by endpoint rather than by URL:
+    /v1/budgets/abc/accounts/def/transactions -> budgets/{id}/accounts/{id}/transactions
+    """
+    segments = [s for s in path.split("/") if s]
+
+    if segments and segments[0] not in _RESOURCES:
+        segments = segments[1:]  # api version
+
+    return "/".join(s if s in _RESOURCES else "{id}" for s in segments)
+
+
+@dataclass
+class RequestEvent:
+    method: str
+    endpoint: str
+    url: str
+    attempt: int = 0
+    start_time: float = field(default_factory=time.time)
+    status: Optional[int] = None
+    elapsed: Optional[float] = None
+    bytes: Optional[int] = None
+    error: Optional[BaseException] = None
+    will_retry: bool = False
+
+
+@dataclass
+class ParseEvent:
+    resource: str
+    stage: str
+    seconds: float
+    items: Optional[int] = None
+    bytes: Optional[int] = None
+    start_time: float = field(default_factory=time.time)
+
+
+class Hook(object):
+    """
+    Base class for instrumentation hooks - override the callbacks of interest.
+    pre_request and post_response receive the same RequestEvent for one attempt.
+    """
+
+    def pre_request(self, event: RequestEvent) -> None:
+        pass
+
+    def post_response(self, event: RequestEvent) -> None:
+        pass
+
+    def parse_complete(self, event: ParseEvent) -> None:
+        pass
+
+
+class Instrumentation(object):
+    """
+    Dispatches request and parse events to hooks. A failing hook is logged and never
+    fails the request.
+    """
+
+    def __init__(self, *hooks: Hook):
+        self._hooks: List[Hook] = list(hooks)
+
+    @property
+    def hooks(self) -> List[Hook]:
+        return list(self._hooks)
+
+    def add(self, hook: Hook) -> None:
+        self._hooks.append(hook)
+
+    def remove(self, hook: Hook) -> None:
+        self._hooks.remove(hook)
+
+    def pre_request(self, event: RequestEvent) -> None:
+        self.__dispatch("pre_request", event)
+
+    def post_response(self, event: RequestEvent) -> None:
+        self.__dispatch("post_response", event)
+
+    def parse_complete(self, event: ParseEvent) -> None:
+        self.__dispatch("parse_complete", event)
+
+    def __dispatch(self, callback: str, event) -> None:
+        for hook in self._hooks:
+            try:
+                getattr(hook, callback)(event)
+            except Exception:
+                logger.exception("Instrumentation hook %r failed in %s", hook, callback)
+
+
+class Histogram(object):
+    """
+    Cumulative bucket histogram, as in the Prometheus data model
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """
+        :return: [(upper bound, observations <= bound)] ending with (inf, count)
+        """
+        total, result = 0, []
+
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Upper bound of the bucket holding the q-th quantile
+        """
+        if not self.count:
+            return None
+
+        for bound, total in self.cumulative():
+            if total >= q * self.count:
+                return bound
+
+    def snapshot(self) -> dict:
+        return {"count": self.count, "sum": self.sum, "p50": self.quantile(0.5), "p95": self.quantile(0.95)}
+
+
+class MetricsCollector(Hook):
+    """
+    Aggregates per-endpoint latency histograms, response sizes, status counts and retries,
+    plus decode and model build time per resource
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.latency: Dict[Tuple[str, str], Histogram] = defaultdict(lambda: Histogram(self._buckets))
+            self.responses: Dict[Tuple[str, str, str], int] = defaultdict(int)
+            self.response_bytes: Dict[Tuple[str, str], int] = defaultdict(int)
+            self.retries: Dict[Tuple[str, str], int] = defaultdict(int)
+            self.parse_time: Dict[Tuple[str, str], Histogram] = defaultdict(lambda: Histogram(self._buckets))
+            self.parsed_items: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def post_response(self, event: RequestEvent) -> None:
+        key = (event.method, event.endpoint)
+        status = str(event.status) if event.status is not None else type(event.error).__name__
+
+        with self._lock:
+            self.latency[key].observe(event.elapsed or 0.0)
+            self.responses[key + (status,)] += 1
+            self.response_bytes[key] += event.bytes or 0
+
+            if event.will_retry:
+                self.retries[key] += 1
+
+    def parse_complete(self, event: ParseEvent) -> None:
+        key = (event.resource, event.stage)
+
+        with self._lock:
+            self.parse_time[key].observe(event.seconds)
+            self.parsed_items[key] += event.items or 0
+
+    def snapshot(self) -> dict:
+        """
+        Plain dict summary, e.g. for logging or a status endpoint
+        """
+        with self._lock:
+            return {
+                "requests": {
+                    f"{method} {endpoint}": {
+                        **histogram.snapshot(),
+                        "bytes": self.response_bytes[(method, endpoint)],
+                        "retries": self.retries[(method, endpoint)],
+                    }
+                    for (method, endpoint), histogram in self.latency.items()
+                },
+                "parse": {
+                    f"{resource} {stage}": {**histogram.snapshot(), "items": self.parsed_items[(resource, stage)]}
+                    for (resource, stage), histogram in self.parse_time.items()
+                },
+            }
+
+    def to_prometheus(self, prefix: str = "ynab") -> str:
+        """
+        Render the metrics in the Prometheus text exposition format
+        """
+        lines: List[str] = []
+
+        with self._lock:
+            _histogram(lines, f"{prefix}_request_duration_seconds", "HTTP request latency per attempt",
+                       ("method", "endpoint"), self.latency)
+            _counter(lines, f"{prefix}_responses_total", "Responses by status, or exception name",
+                     ("method", "endpoint", "status"), self.responses)
+            _counter(lines, f"{prefix}_response_bytes_total", "Response body bytes",
+                     ("method", "endpoint"), self.response_bytes)
+            _counter(lines, f"{prefix}_retries_total", "Attempts that were retried",
+                     ("method", "endpoint"), self.retries)
+            _histogram(lines, f"{prefix}_parse_duration_seconds", "JSON decode and model build time",
+                       ("resource", "stage"), self.parse_time)
+            _counter(lines, f"{prefix}_parsed_items_total", "Models built from API data",
+                     ("resource", "stage"), self.parsed_items)
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+
+    if extra:
+        pairs.append(extra)
+
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _counter(lines: List[str], name: str, help: str, labels: Tuple[str, ...], values: dict) -> None:
+    lines += [f"# HELP {name} {help}", f"# TYPE {name} counter"]
+    lines += [f"{name}{_labels(labels, key)} {value}" for key, value in sorted(values.items())]
+
+
+def _histogram(lines: List[str], name: str, help: str, labels: Tuple[str, ...], values: dict) -> None:
+    lines += [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+
+    for key, histogram in sorted(values.items()):
+        for bound, total in histogram.cumulative():
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            bucket = f'le="{le}"'
+            lines.append(f"{name}_bucket{_labels(labels, key, bucket)} {total}")
+
+        lines.append(f"{name}_sum{_labels(labels, key)} {histogram.sum}")
+        lines.append(f"{name}_count{_labels(labels, key)} {histogram.count}")
+
+
+class LoggingHook(Hook):
+    """
+    Log every response and parse step - one line each
+    """
+
+    def __init__(self, log: Optional[logging.Logger] = None, level: int = logging.DEBUG):
+        self.log = log or logger
+        self.level = level
+
+    def post_response(self, event: RequestEvent) -> None:
+        outcome = event.status if event.error is None else repr(event.error)
+        size = f"{event.bytes / 1024:.1f} KB" if event.bytes is not None else "streamed"
+
+        self.log.log(
+            self.level,
+            "%s %s -> %s in %.1f ms (%s, attempt %d%s)",
+            event.method, event.endpoint, outcome, (event.elapsed or 0.0) * 1000, size,
+            event.attempt + 1, ", retrying" if event.will_retry else "",
+        )
+
+    def parse_complete(self, event: ParseEvent) -> None:
+        items = f"{event.items} item(s) " if event.items is not None else ""
+
+        self.log.log(self.level, "%s %s: %sin %.1f ms", event.resource, event.stage, items, event.seconds * 1000)
+
+
+class SpanRecorder(Hook):
+    """
+    Record OpenTelemetry-style spans - one per request attempt and parse step. Parse spans
+    are children of the last request made on the same thread. Finished spans are passed
+    to exporter, e.g. a bridge to an OpenTelemetry SDK, and the latest are kept in spans.
+    """
+
+    def __init__(self, exporter: Optional[Callable[[dict], None]] = None, keep: int = 1000):
+        self.exporter = exporter
+        self.spans: deque = deque(maxlen=keep)
+        self._local = threading.local()
+
+    def post_response(self, event: RequestEvent) -> None:
+        attributes = {
+            "http.request.method": event.method,
+            "url.full": event.url,
+            "ynab.endpoint": event.endpoint,
+            "ynab.attempt": event.attempt,
+        }
+
+        if event.status is not None:
+            attributes["http.response.status_code"] = event.status
+        if event.bytes is not None:
+            attributes["http.response.body.size"] = event.bytes
+        if event.error is not None:
+            attributes["exception.type"] = type(event.error).__name__
+
+        error = event.error is not None or (event.status or 0) >= 400
+        span = self.__span(f"{event.method} {event.endpoint}", event.start_time, event.elapsed or 0.0,
+                           attributes, error, parent=None)
+        self._local.trace = (span["trace_id"], span["span_id"])
+
+    def parse_complete(self, event: ParseEvent) -> None:
+        attributes = {"ynab.resource": event.resource, "ynab.stage": event.stage}
+
+        if event.items is not None:
+            attributes["ynab.items"] = event.items
+        if event.bytes is not None:
+            attributes["ynab.bytes"] = event.bytes
+
+        self.__span(f"{event.stage} {event.resource}", event.start_time, event.seconds, attributes,
+                    False, parent=getattr(self._local, "trace", None))
+
+    def __span(self, name: str, start: float, seconds: float, attributes: dict, error: bool, parent) -> dict:
+        trace_id, parent_id = parent if parent else (os.urandom(16).hex(), None)
+        span = {
+            "name": name,
+            "trace_id": trace_id,
+            "span_id": os.urandom(8).hex(),
+            "parent_span_id": parent_id,
+            "kind": "CLIENT" if parent is None else "INTERNAL",
+            "start_time_unix_nano": int(start * 1e9),
+            "end_time_unix_nano": int((start + seconds) * 1e9),
+            "attributes": attributes,
+            "status": "ERROR" if error else "OK",
+        }
+
+        self.spans.append(span)
+
+        if self.exporter is not None:
+            self.exporter(span)
+
+        return span
@@ -0,0 +1,260 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import asyncio
+import dataclasses
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import requests
+from requests.adapters import BaseAdapter
+
+from ynab.__base import RESTBase
+from ynab.__cache import ResponseCache
+from ynab.__flight import SingleFlight
+from ynab.__instrument import Instrumentation
+from ynab.__ratelimit import RateLimiter
+from ynab.__session import SessionConfig, create_session
+from ynab.__storage import SQLiteStore
+from ynab.__transactions import Transaction
+from ynab.api import YNABBudgetClient
+
+
+class BudgetsAPI(RESTBase):
+    def get_all(self) -> List[dict]:
+        """
+        Budgets the access token can read
+        :return: list of budget summaries - id, name, last_modified_on...
+        """
+        method = "GET"
+        api_path = "/budgets"
+
+        return self._decode(self._rest_call[method](api_path))["data"]["budgets"]
+
+
+class YNABClientManager(object):
+    """
+    Clients for many budgets of one access token. Every client shares one connection
+    pool, rate limiter, response cache and instrumentation, and operations can be fanned
+    out over all budgets on a thread pool - or awaited from asyncio with amap.
+    """
+
+    def __init__(
+        self,
+        pat_token: str,
+        budget_ids: Iterable[str] = (),
+        max_workers: int = 8,
+        session: Optional[requests.Session] = None,
+        session_config: Optional[SessionConfig] = None,
+        transport: Optional[BaseAdapter] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        storage_factory: Optional[Callable[[str], SQLiteStore]] = None,
+        **kwargs,
+    ) -> None:
+        """
+        :param pat_token: string : YNAB personal access token
+        :param budget_ids: Budgets to manage - more can be added later, or found with discover()
+        :param max_workers: int : Budgets processed at once by map and amap
+        :param session: requests.Session : Pre-built session to share - takes precedence over session_config
+        :param session_config: SessionConfig : Pool settings - the pool is grown to at least max_workers
+        :param transport: BaseAdapter : Custom transport adapter mounted on the created session
+        :param rate_limiter: RateLimiter : Shared scheduler - the token's shared limiter if omitted
+        :param cache: ResponseCache : Read cache shared by every budget - entries are tagged per budget
+        :param instrumentation: Instrumentation : Hooks shared by every client
+        :param storage_factory: Called with a budget id to create that budget's SQLiteStore
+        :param kwargs: Passed through to every YNABBudgetClient, e.g. compact_models, base_url or coalesce
+        """
+        config = session_config or SessionConfig()
+        self.session_config = dataclasses.replace(config, pool_maxsize=max(config.pool_maxsize, max_workers))
+        self._owns_session = session is None
+        self.session = session or create_session(self.session_config, transport)
+        self.rate_limiter = rate_limiter or RateLimiter.for_token(pat_token)
+        self.cache = cache
+        self.instrumentation = instrumentation
+        self.storage_factory = storage_factory
+        self.max_workers = max_workers
+        # Every client of the token shares in-flight GETs
+        coalesce = kwargs.setdefault("coalesce", True)
+        self.single_flight: Optional[SingleFlight] = kwargs.pop("single_flight", None) or (
+            SingleFlight() if coalesce else None
+        )
+
+        self._token = pat_token
+        self._client_kwargs = kwargs
+        self._clients: Dict[str, YNABBudgetClient] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self.budgets = BudgetsAPI(
+            host=kwargs.get("base_url") or YNABBudgetClient.BASE_URL,
+            api_version=YNABBudgetClient.API_VERSION,
+            token=pat_token,
+            session=self.session,
+            timeout=self.session_config.timeout,
+            rate_limiter=self.rate_limiter,
+            instrumentation=instrumentation,
+            codec=kwargs.get("codec"),
+            single_flight=self.single_flight,
+        )
+
+        for budget_id in budget_ids:
+            self.add(budget_id)
+
+    @property
+    def budget_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._clients)
+
+    def add(self, budget_id: str) -> YNABBudgetClient:
+        """
+        Manage a budget - returns its client, which is only created once
+        """
+        with self._lock:
+            client = self._clients.get(budget_id)
+
+            if client is None:
+                client = self._clients[budget_id] = YNABBudgetClient(
+                    budget_id=budget_id,
+                    pat_token=self._token,
+                    session=self.session,
+                    session_config=self.session_config,
+                    rate_limiter=self.rate_limiter,
+                    cache=self.cache,
+                    instrumentation=self.instrumentation,
+                    storage=self.storage_factory(budget_id) if self.storage_factory else None,
+                    single_flight=self.single_flight,
+                    **self._client_kwargs,
+                )
+
+            return client
+
+    def remove(self, budget_id: str) -> None:
+        with self._lock:
+            self._clients.pop(budget_id, None)
+
+    def discover(self) -> List[str]:
+        """
+        Add every budget the token can read
+        :return: Ids of all managed budgets
+        """
+        for budget in self.budgets.get_all():
+            self.add(budget["id"])
+
+        return self.budget_ids
+
+    def __getitem__(self, budget_id: str) -> YNABBudgetClient:
+        with self._lock:
+            return self._clients[budget_id]
+
+    def __contains__(self, budget_id: str) -> bool:
+        with self._lock:
+            return budget_id in self._clients
+
+    def __iter__(self) -> Iterator[YNABBudgetClient]:
+        with self._lock:
+            return iter(list(self._clients.values()))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ynab-manager")
+
+            return self._executor
+
+    def map(
+        self,
+        func: Callable[[YNABBudgetClient], object],
+        budget_ids: Optional[Iterable[str]] = None,
+        return_exceptions: bool = False,
+    ) -> Dict[str, object]:
+        """
+        Run func(client) for every budget on the thread pool
+        :param func: Called with each budget's YNABBudgetClient
+        :param budget_ids: Only these budgets - defaults to all managed budgets
+        :param return_exceptions: bool : Put a budget's exception in the result instead of raising it
+        :return: dict : budget id -> func's result
+        :raises Exception: The first budget's failure, once every budget has finished, unless return_exceptions
+        """
+        clients = self.__clients(budget_ids)
+        futures = {budget_id: self.executor.submit(func, client) for budget_id, client in clients.items()}
+
+        results, error = {}, None
+        for budget_id, future in futures.items():
+            try:
+                results[budget_id] = future.result()
+            except Exception as e:
+                results[budget_id] = e
+                error = error or e
+
+        if error is not None and not return_exceptions:
+            raise error
+
+        return results
+
+    async def amap(
+        self,
+        func: Callable[[YNABBudgetClient], object],
+        budget_ids: Optional[Iterable[str]] = None,
+        return_exceptions: bool = False,
+    ) -> Dict[str, object]:
+        """
+        Awaitable map - func still runs on the manager's thread pool
+        """
+        loop = asyncio.get_running_loop()
+        clients = self.__clients(budget_ids)
+        results = await asyncio.gather(
+            *[loop.run_in_executor(self.executor, functools.partial(func, c)) for c in clients.values()],
+            return_exceptions=return_exceptions,
+        )
+
+        return dict(zip(clients, results))
+
+    def get_all_transactions(
+        self, since_date: Optional[str] = None, budget_ids: Optional[Iterable[str]] = None
+    ) -> Dict[str, List[Transaction]]:
+        """
+        Fetch the transactions of every budget concurrently
+        :return: dict : budget id -> transactions
+        """
+        return self.map(lambda c: c.transactions.get_all(since_date=since_date), budget_ids)  # type: ignore
+
+    def sync_all(self, budget_ids: Optional[Iterable[str]] = None) -> Dict[str, dict]:
+        """
+        Pull the deltas of every budget - see BudgetSync.sync
+        :return: dict : budget id -> {endpoint: ChangeSet}
+        """
+        return self.map(lambda c: c.sync.sync(), budget_ids)  # type: ignore
+
+    def __clients(self, budget_ids: Optional[Iterable[str]]) -> Dict[str, YNABBudgetClient]:
+        if budget_ids is None:
+            with self._lock:
+                return dict(self._clients)
+
+        return {budget_id: self.add(budget_id) for budget_id in budget_ids}
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self) -> "YNABClientManager":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
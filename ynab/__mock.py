@@ -0,0 +1,387 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+_ROUTE = re.compile(
+    r"^/v1/budgets(?:/(?P<budget>[^/]+)"
+    r"(?:/(?P<resource>transactions|accounts|categories)"
+    r"(?:/(?P<item>[^/]+)(?:/(?P<sub>transactions))?)?)?)?/?$"
+)
+
+_CLEARED = ("cleared", "uncleared", "reconciled")
+
+
+class SyntheticBudget(object):
+    """
+    Deterministic fake budget for offline tests and benchmarks - the same arguments
+    always produce the same accounts, categories and transactions
+    """
+
+    def __init__(
+        self,
+        transactions: int = 1000,
+        accounts: int = 10,
+        category_groups: int = 5,
+        categories_per_group: int = 6,
+        payees: int = 200,
+        split_ratio: float = 0.05,
+        budget_id: str = "mock-budget",
+        start_date: str = "2020-01-01",
+        seed: int = 0,
+    ):
+        """
+        :param transactions: int : Number of transactions
+        :param split_ratio: float : Share of transactions split into 2-4 subtransactions
+        :param budget_id: string : Id the budget is served under
+        """
+        rng = random.Random(seed)
+        self.id = budget_id
+        self.name = f"Synthetic budget {budget_id}"
+        self.server_knowledge = 1
+        self._lock = threading.RLock()
+
+        self.accounts = [
+            {"id": f"account-{i}", "name": f"Account {i}", "type": "checking", "on_budget": True,
+             "closed": False, "balance": 0, "deleted": False}
+            for i in range(accounts)
+        ]
+        self.category_groups = [
+            {
+                "id": f"group-{g}",
+                "name": f"Group {g}",
+                "hidden": False,
+                "deleted": False,
+                "categories": [
+                    {"id": f"category-{g}-{c}", "category_group_id": f"group-{g}", "name": f"Category {g}.{c}",
+                     "hidden": False, "budgeted": 0, "activity": 0, "balance": 0, "deleted": False}
+                    for c in range(categories_per_group)
+                ],
+            }
+            for g in range(category_groups)
+        ]
+
+        self._account_names = {a["id"]: a["name"] for a in self.accounts}
+        self._category_names = {
+            c["id"]: c["name"] for g in self.category_groups for c in g["categories"]
+        }
+        self._payee_names = {f"payee-{p}": f"Payee {p}" for p in range(payees)}
+
+        categories = list(self._category_names)
+        payee_ids = list(self._payee_names)
+        start = date.fromisoformat(start_date)
+        days = max(1, transactions // 20)
+
+        self.transactions: Dict[str, dict] = {}
+        self._knowledge: Dict[str, int] = {}
+
+        for i in range(transactions):
+            row = {
+                "id": f"transaction-{i}",
+                "date": (start + timedelta(days=i * days // max(1, transactions))).isoformat(),
+                "amount": -rng.randrange(100, 500000, 10),
+                "memo": None if rng.random() < 0.7 else f"memo {i}",
+                "cleared": rng.choice(_CLEARED),
+                "approved": rng.random() < 0.9,
+                "flag_color": None,
+                "account_id": rng.choice(self.accounts)["id"] if self.accounts else None,
+                "payee_id": rng.choice(payee_ids) if payee_ids else None,
+                "category_id": rng.choice(categories) if categories else None,
+                "transfer_account_id": None,
+                "transfer_transaction_id": None,
+                "matched_transaction_id": None,
+                "import_id": None,
+                "import_payee_name": None,
+                "deleted": False,
+                "subtransactions": [],
+            }
+
+            if categories and rng.random() < split_ratio:
+                parts = rng.randint(2, 4)
+                amounts = [row["amount"] // parts] * (parts - 1)
+                amounts.append(row["amount"] - sum(amounts))
+                row["category_id"] = None
+                row["subtransactions"] = [
+                    {"id": f"transaction-{i}-{s}", "transaction_id": row["id"], "amount": amount,
+                     "memo": None, "payee_id": None, "category_id": rng.choice(categories),
+                     "transfer_account_id": None, "transfer_transaction_id": None, "deleted": False}
+                    for s, amount in enumerate(amounts)
+                ]
+
+            self.__store(self.__with_names(row), knowledge=1)
+
+    def __with_names(self, row: dict) -> dict:
+        row["account_name"] = self._account_names.get(row.get("account_id"))
+        row["payee_name"] = row.get("payee_name") or self._payee_names.get(row.get("payee_id"))
+        row["category_name"] = (
+            "Split" if row.get("subtransactions") else self._category_names.get(row.get("category_id"))
+        )
+
+        for sub in row.get("subtransactions") or ():
+            sub["payee_name"] = sub.get("payee_name") or self._payee_names.get(sub.get("payee_id"))
+            sub["category_name"] = self._category_names.get(sub.get("category_id"))
+
+        return row
+
+    def __store(self, row: dict, knowledge: int) -> None:
+        self.transactions[row["id"]] = row
+        self._knowledge[row["id"]] = knowledge
+
+    def get_transactions(
+        self,
+        since_date: Optional[str] = None,
+        last_knowledge: Optional[int] = None,
+        account_id: Optional[str] = None,
+    ) -> List[dict]:
+        with self._lock:
+            return [
+                row
+                for id, row in self.transactions.items()
+                if (since_date is None or row["date"] >= since_date)
+                and (last_knowledge is None or self._knowledge[id] > last_knowledge)
+                and (account_id is None or row["account_id"] == account_id)
+                and (last_knowledge is not None or not row["deleted"])
+            ]
+
+    def save(self, payloads: List[dict]) -> List[dict]:
+        """
+        Apply create/update payloads as the API would - rows with an id are updated
+        """
+        with self._lock:
+            self.server_knowledge += 1
+            saved = []
+
+            for payload in payloads:
+                id = payload.get("id") or str(uuid.uuid4())
+                row = dict(self.transactions.get(id, {"deleted": False, "approved": False}))
+                row.update(payload, id=id)
+
+                # Like the API, fields the payload leaves out keep their values
+                if "subtransactions" in payload or "subtransactions" not in row:
+                    row["subtransactions"] = [
+                        dict(sub, id=sub.get("id") or str(uuid.uuid4()), transaction_id=id, deleted=False)
+                        for sub in payload.get("subtransactions") or ()
+                    ]
+
+                self.__store(self.__with_names(row), knowledge=self.server_knowledge)
+                saved.append(row)
+
+            return saved
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "MockYNABServer"
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately - without this, keep-alive requests stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.__dispatch("GET")
+
+    def do_POST(self) -> None:
+        self.__dispatch("POST")
+
+    def do_PATCH(self) -> None:
+        self.__dispatch("PATCH")
+
+    def do_PUT(self) -> None:
+        self.__dispatch("PUT")
+
+    def __dispatch(self, method: str) -> None:
+        url = urlsplit(self.path)
+        match = _ROUTE.match(url.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length)) if length else {}
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        status, body = self.server.respond(method, match, parse_qs(url.query), payload)
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if self.server.rate_limit:
+            self.send_header("X-Rate-Limit", f"{self.server.request_total}/{self.server.rate_limit}")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MockYNABServer(ThreadingHTTPServer):
+    """
+    Local HTTP server speaking the subset of the YNAB API this package uses, backed by
+    SyntheticBudgets. Full GET responses are encoded once and replayed until a write
+    changes the budget, so the server is cheap compared with the client under test.
+
+        with MockYNABServer(SyntheticBudget(transactions=50000)) as server:
+            client = YNABBudgetClient("mock-budget", "token", base_url=server.url)
+    """
+
+    daemon_threads = True
+
+    def __init__(self, *budgets: SyntheticBudget, port: int = 0, latency: float = 0.0,
+                 rate_limit: Optional[int] = None):
+        """
+        :param budgets: SyntheticBudget : Budgets to serve, by their id
+        :param port: int : Port to listen on - 0 picks a free one
+        :param latency: float : Seconds added to every response
+        :param rate_limit: int : Limit reported in an X-Rate-Limit header - not enforced, no header if None
+        """
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.budgets = {b.id: b for b in budgets or (SyntheticBudget(),)}
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.requests: Counter = Counter()
+        self._responses: Dict[Tuple, bytes] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_total(self) -> int:
+        return sum(self.requests.values())
+
+    def start(self) -> "MockYNABServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-ynab", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MockYNABServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def respond(self, method: str, match, query: dict, payload: dict) -> Tuple[int, bytes]:
+        if match is None:
+            return self.__error(404, "not_found")
+
+        route = match["resource"] or "budgets"
+
+        if match["sub"]:
+            route = f"{route}/transactions"
+        elif match["item"]:
+            route = f"{route}/item"
+
+        with self._lock:
+            self.requests[(method, route)] += 1
+
+        if match["budget"] is None:
+            return 200, _encode({"data": {"budgets": [{"id": b.id, "name": b.name} for b in self.budgets.values()]}})
+
+        budget = self.budgets.get(match["budget"])
+
+        if budget is None or (match["resource"] is None and method != "GET"):
+            return self.__error(404, "not_found")
+
+        if method == "GET":
+            return self.__get(budget, match, query)
+
+        if match["resource"] != "transactions" or match["sub"]:
+            return self.__error(404, "not_found")
+
+        return self.__write(budget, method, match, payload)
+
+    def __get(self, budget: SyntheticBudget, match, query: dict) -> Tuple[int, bytes]:
+        params = {k: v[-1] for k, v in query.items()}
+        key = (budget.id, match.group(0), tuple(sorted(params.items())), budget.server_knowledge)
+
+        body = self._responses.get(key)
+        if body is not None:
+            return 200, body
+
+        resource = match["resource"]
+        knowledge = params.get("last_knowledge_of_server")
+        knowledge = int(knowledge) if knowledge is not None else None
+
+        if resource is None:
+            data = {"budget": {"id": budget.id, "name": budget.name}}
+        elif resource == "accounts" and not match["item"]:
+            data = {"accounts": budget.accounts}
+        elif resource == "categories":
+            data = {"category_groups": budget.category_groups}
+        elif resource == "transactions" and match["item"]:
+            row = budget.transactions.get(match["item"])
+            if row is None:
+                return self.__error(404, "not_found")
+            data = {"transaction": row}
+        else:
+            data = {
+                "transactions": budget.get_transactions(
+                    since_date=params.get("since_date"),
+                    last_knowledge=knowledge,
+                    account_id=match["item"] if match["sub"] else None,
+                )
+            }
+
+        data["server_knowledge"] = budget.server_knowledge
+        body = _encode({"data": data})
+
+        with self._lock:
+            # Responses of older knowledge can't be served again
+            if len(self._responses) > 64:
+                self._responses.clear()
+            self._responses[key] = body
+
+        return 200, body
+
+    def __write(self, budget: SyntheticBudget, method: str, match, payload: dict) -> Tuple[int, bytes]:
+        if "transaction" in payload:
+            single = dict(payload["transaction"])
+
+            if method == "PUT":
+                if match["item"] not in budget.transactions:
+                    return self.__error(404, "not_found")
+                single["id"] = match["item"]
+
+            row = budget.save([single])[0]
+            return 200 if method == "PUT" else 201, _encode(
+                {"data": {"transaction_ids": [row["id"]], "transaction": row,
+                          "server_knowledge": budget.server_knowledge}}
+            )
+
+        if "transactions" not in payload or method == "PUT":
+            return self.__error(400, "bad_request")
+
+        if method == "PATCH" and any(not t.get("id") for t in payload["transactions"]):
+            return self.__error(400, "bad_request")
+
+        rows = budget.save(payload["transactions"])
+        return 200 if method == "PATCH" else 201, _encode(
+            {"data": {"transaction_ids": [r["id"] for r in rows], "transactions": rows,
+                      "server_knowledge": budget.server_knowledge}}
+        )
+
+    @staticmethod
+    def __error(status: int, name: str) -> Tuple[int, bytes]:
+        return status, _encode({"error": {"id": str(status), "name": name, "detail": name}})
+
+
+def _encode(data: dict) -> bytes:
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,102 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+from typing import Callable, Optional
+
+
+class Where(object):
+    """
+    Composable filter over raw transaction dicts as returned by the API. Rows are
+    tested before any Transaction object is built, so only matching rows cost a
+    from_dict call. Combine with &, | and ~:
+
+        Where.payee("Grocer") & Where.between("2024-01-01", "2024-03-31") & ~Where.cleared("reconciled")
+    """
+
+    def __init__(self, test: Callable[[dict], bool], description: str = "custom"):
+        self._test = test
+        self._description = description
+
+    def __call__(self, row: dict) -> bool:
+        return self._test(row)
+
+    def __and__(self, other: "Where") -> "Where":
+        return Where(lambda row: self._test(row) and other(row), f"({self} & {other})")
+
+    def __or__(self, other: "Where") -> "Where":
+        return Where(lambda row: self._test(row) or other(row), f"({self} | {other})")
+
+    def __invert__(self) -> "Where":
+        return Where(lambda row: not self._test(row), f"~{self}")
+
+    def __repr__(self):
+        return f"Where({self._description})"
+
+    def __str__(self):
+        return self._description
+
+    @classmethod
+    def payee(cls, name: str, case_sensitive: bool = True) -> "Where":
+        """
+        Rows whose payee has this name
+        """
+        if case_sensitive:
+            test = lambda row: row.get("payee_name") == name  # noqa: E731
+        else:
+            folded = name.casefold()
+            test = lambda row: (row.get("payee_name") or "").casefold() == folded  # noqa: E731
+
+        return cls(test, f"payee={name!r}")
+
+    @classmethod
+    def category(cls, category: str) -> "Where":
+        """
+        Rows categorized - directly or through one of their splits - with this category id or name
+        """
+        def test(row: dict) -> bool:
+            return _category_matches(row, category) or any(
+                _category_matches(s, category) for s in row.get("subtransactions") or ()
+            )
+
+        return cls(test, f"category={category!r}")
+
+    @classmethod
+    def account(cls, account_id: str) -> "Where":
+        return cls(lambda row: row.get("account_id") == account_id, f"account={account_id!r}")
+
+    @classmethod
+    def between(cls, start: Optional[str] = None, end: Optional[str] = None) -> "Where":
+        """
+        Rows dated within [start, end] - either bound may be omitted. ISO dates compare as strings.
+        """
+        def test(row: dict) -> bool:
+            day = row.get("date")
+            return (
+                day is not None
+                and (start is None or day >= start)
+                and (end is None or day <= end)
+            )
+
+        return cls(test, f"between({start!r}, {end!r})")
+
+    @classmethod
+    def cleared(cls, *statuses: str) -> "Where":
+        """
+        :param statuses: Any of 'cleared', 'uncleared' and 'reconciled' - defaults to cleared or reconciled
+        """
+        allowed = frozenset(statuses or ("cleared", "reconciled"))
+        return cls(lambda row: row.get("cleared") in allowed, f"cleared in {sorted(allowed)}")
+
+    @classmethod
+    def approved(cls, approved: bool = True) -> "Where":
+        return cls(lambda row: bool(row.get("approved")) is approved, f"approved={approved}")
+
+    @classmethod
+    def deleted(cls, deleted: bool = True) -> "Where":
+        return cls(lambda row: bool(row.get("deleted")) is deleted, f"deleted={deleted}")
+
+
+def _category_matches(row: dict, category: str) -> bool:
+    return row.get("category_id") == category or row.get("category_name") == category
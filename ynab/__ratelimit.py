@@ -0,0 +1,232 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, Tuple
+
+import requests
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket. Tokens refill continuously at capacity / period per second.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 200,
+        period: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param capacity: int : Maximum number of tokens - YNAB allows 200 requests per token per hour
+        :param period: float : Seconds to refill an empty bucket
+        :param clock: Monotonic clock - replaceable for tests
+        """
+        self.capacity = capacity
+        self.period = period
+        self._rate = capacity / period
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def __refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self.__refill()
+            return self._tokens
+
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available
+        :return: float : 0 if a token was taken, otherwise the seconds until one is available
+        """
+        with self._lock:
+            self.__refill()
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+
+            return (1 - self._tokens) / self._rate
+
+    def limit_to(self, remaining: float) -> None:
+        # Never believe we have more tokens than the server says are left
+        with self._lock:
+            self.__refill()
+            self._tokens = min(self._tokens, max(0.0, remaining))
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hand out no token for the next seconds, then one - the tokens go negative so the
+        refill itself is the wait
+        """
+        with self._lock:
+            self.__refill()
+            self._tokens = min(self._tokens, 1 - seconds * self._rate)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    :param max_retries: int : Retries after the first attempt
+    :param backoff_base: float : Seconds of the first backoff - doubled on every retry
+    :param backoff_max: float : Upper bound of a single backoff
+    :param retry_statuses: HTTP statuses that are retried
+    :param retry_methods: Methods retried on 5xx - 429 is always retried since the request was not processed.
+        PATCH is left out - a bulk PATCH that failed part way may already have been applied
+    """
+
+    max_retries: int = 5
+    backoff_base: float = 0.5
+    backoff_max: float = 60.0
+    retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    retry_methods: Tuple[str, ...] = ("GET", "PUT", "DELETE")
+
+    def should_retry(self, method: str, status_code: int, attempt: int) -> bool:
+        if attempt >= self.max_retries or status_code not in self.retry_statuses:
+            return False
+
+        return status_code == 429 or method in self.retry_methods
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        # Full jitter, but never earlier than the server asked for
+        backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+        if retry_after is not None:
+            return max(retry_after, backoff)
+
+        return backoff
+
+
+def parse_retry_after(resp: requests.Response) -> Optional[float]:
+    value = resp.headers.get("Retry-After")
+
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter(object):
+    """
+    Client-side request scheduler. Calls wait for a token instead of failing, and
+    429/5xx responses are retried with jittered exponential backoff.
+    One limiter is shared by every client using the same access token.
+    """
+
+    __registry: Dict[str, "RateLimiter"] = {}
+    __registry_lock = threading.Lock()
+
+    def __init__(
+        self,
+        bucket: Optional[TokenBucket] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.bucket = bucket or TokenBucket()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+        self.limit: int = self.bucket.capacity
+        self.server_remaining: Optional[int] = None
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+    @classmethod
+    def for_token(cls, token: str) -> "RateLimiter":
+        """
+        Get the limiter shared by every client of an access token
+        """
+        with cls.__registry_lock:
+            if token not in cls.__registry:
+                cls.__registry[token] = cls()
+
+            return cls.__registry[token]
+
+    def acquire(self) -> None:
+        """
+        Block until a request may be sent
+        """
+        while (wait := self.bucket.try_acquire()) > 0:
+            self.__wait(wait)
+
+        with self._lock:
+            self.requests += 1
+
+    def backoff(self, attempt: int, resp: requests.Response) -> None:
+        """
+        Sleep before retrying a failed response. After a 429 the bucket is paused instead,
+        so every client of the token waits - the retry included, which waits in acquire.
+        """
+        with self._lock:
+            self.retries += 1
+
+        delay = self.retry_policy.delay(attempt, parse_retry_after(resp))
+
+        if resp.status_code == 429:
+            self.bucket.pause(delay)
+        else:
+            self.__wait(delay)
+
+    def record_response(self, resp: requests.Response) -> None:
+        # YNAB reports usage as "X-Rate-Limit: <used>/<limit>"
+        if rate_limit := resp.headers.get("X-Rate-Limit"):
+            try:
+                used, limit = (int(v) for v in rate_limit.split("/"))
+            except ValueError:
+                pass
+            else:
+                with self._lock:
+                    self.limit = limit
+                    self.server_remaining = max(0, limit - used)
+                self.bucket.limit_to(limit - used)
+
+        if resp.status_code == 429:
+            with self._lock:
+                self.throttled += 1
+
+    @property
+    def remaining(self) -> int:
+        return int(self.bucket.available)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "remaining": self.remaining,
+                "server_remaining": self.server_remaining,
+                "requests": self.requests,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "waited_seconds": self.waited,
+            }
+
+    def __wait(self, seconds: float) -> None:
+        with self._lock:
+            self.waited += seconds
+
+        self._sleep(seconds)
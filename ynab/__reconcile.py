@@ -0,0 +1,268 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ynab.__transactions import Transaction
+from ynab.__utils import field_names
+
+
+@lru_cache(maxsize=4096)
+def _day(iso_date: str) -> int:
+    return date.fromisoformat(iso_date[:10]).toordinal()
+
+
+@dataclass
+class StatementRow:
+    """
+    One line of a bank statement - amount in milliunits, outflows negative like YNAB
+    """
+
+    account_id: str
+    date: str
+    amount: int
+    payee_name: Optional[str] = None
+    memo: Optional[str] = None
+
+    meta: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StatementRow":
+        known_args = {}
+        unknown_args = {}
+
+        names = field_names(cls)
+
+        for key, value in data.items():
+            if key in names:
+                known_args[key] = value
+            else:
+                unknown_args[key] = value
+
+        return cls(**known_args, meta=unknown_args)
+
+    def __repr__(self):
+        return (
+            f"StatementRow("
+            f"date='{self.date}', "
+            f"payee='{self.payee_name}', "
+            f"amount='{self.amount / 1000:.2f}'"
+            f")"
+        )
+
+
+@dataclass
+class Match:
+    row: StatementRow
+    transaction: Transaction
+    # Statement date minus transaction date
+    days: int = 0
+
+
+@dataclass
+class ReconcileResult:
+    matched: List[Match] = field(default_factory=list)
+    # Statement rows without a transaction
+    missing: List[StatementRow] = field(default_factory=list)
+    # Transactions in the statement's accounts and dates that aren't on the statement
+    extra: List[Transaction] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.missing and not self.extra
+
+    def clear(self, status: str = "cleared") -> List[Transaction]:
+        """
+        Set the cleared status of matched transactions - reconciled ones are left alone
+        :param status: string : 'cleared' or 'reconciled'
+        :return: The changed transactions - pass them to TransactionAPI.save_many
+        """
+        if status not in ("cleared", "reconciled"):
+            raise ValueError("status must be 'cleared' or 'reconciled'")
+
+        changed = []
+
+        for match in self.matched:
+            transaction = match.transaction
+
+            if transaction.cleared != "reconciled" and transaction.cleared != status:
+                transaction.cleared = status
+                changed.append(transaction)
+
+        return changed
+
+    def save(self, api, status: str = "cleared", **kwargs) -> List[Transaction]:
+        """
+        Clear the matched transactions and save them
+        :param api: TransactionAPI
+        :param kwargs: Passed through to TransactionAPI.save_many
+        :return: Saved transactions as returned by the API
+        """
+        return api.save_many(self.clear(status), **kwargs)
+
+    def __repr__(self):
+        return (
+            f"ReconcileResult("
+            f"matched={len(self.matched)}, "
+            f"missing={len(self.missing)}, "
+            f"extra={len(self.extra)}"
+            f")"
+        )
+
+
+class Reconciler(object):
+    """
+    Matches bank statement rows to transactions through a hash index on
+    (account_id, amount) whose buckets are sorted by date - each row only looks at the
+    transactions of its amount within date_tolerance days, instead of at every transaction.
+
+        reconciler = ynab.Reconciler.from_api(client.transactions, account_ids=[checking.id], since_date="2024-01-01")
+        result = reconciler.match(statement_rows)
+        result.save(client.transactions)
+    """
+
+    def __init__(self, transactions: Iterable[Transaction] = (), date_tolerance: int = 3):
+        """
+        :param transactions: Transactions to match against - deleted ones are ignored
+        :param date_tolerance: int : Days a statement date may differ from the transaction date
+        """
+        self.date_tolerance = date_tolerance
+        self._by_id: Dict[str, Transaction] = {}
+        self._index: Optional[Dict[Tuple[str, int], Tuple[int, int]]] = None
+        self._days: List[int] = []
+        self._transactions: List[Transaction] = []
+        self._lock = threading.RLock()
+        self.update(transactions)
+
+    @classmethod
+    def from_api(
+        cls,
+        api,
+        account_ids: Optional[Iterable[str]] = None,
+        since_date: Optional[str] = None,
+        date_tolerance: int = 3,
+    ) -> "Reconciler":
+        """
+        Index the transactions of some or all accounts - one request either way
+        :param api: TransactionAPI
+        :param account_ids: Accounts to reconcile - every account if omitted
+        :param since_date: string : Only index transactions on or after this date
+        """
+        if account_ids is None:
+            transactions = api.get_all(since_date=since_date)
+        else:
+            by_account = api.get_by_accounts(account_ids, since_date=since_date)
+            transactions = [t for partition in by_account.values() for t in partition]
+
+        return cls(transactions, date_tolerance)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def update(self, transactions: Iterable[Transaction]) -> None:
+        """
+        Add or replace transactions - deleted ones are removed
+        """
+        with self._lock:
+            for t in transactions:
+                if not t.id:
+                    continue
+
+                if t.deleted:
+                    self._by_id.pop(t.id, None)
+                else:
+                    self._by_id[t.id] = t
+
+            self._index = None
+
+    def __build(self) -> None:
+        # One flat array sorted by (account, amount, day) - the index maps each
+        # (account, amount) to its slice, which keeps the allocations per transaction low
+        transactions = [t for t in self._by_id.values() if t.date is not None]
+        days = [_day(t.date) for t in transactions]
+        order = sorted(
+            range(len(transactions)),
+            key=lambda i: (transactions[i].account_id or "", transactions[i].amount, days[i]),
+        )
+
+        self._transactions = [transactions[i] for i in order]
+        self._days = [days[i] for i in order]
+        self._index = {}
+
+        for position, t in enumerate(self._transactions):
+            key = (t.account_id, t.amount)
+            bounds = self._index.get(key)
+            self._index[key] = (position, position + 1) if bounds is None else (bounds[0], position + 1)
+
+    def match(
+        self,
+        rows: Iterable,
+        since_date: Optional[str] = None,
+        until_date: Optional[str] = None,
+    ) -> ReconcileResult:
+        """
+        Pair each statement row with the earliest unmatched transaction of the same
+        account and amount within date_tolerance days - rows are matched in date order,
+        so this never leaves a later row without a transaction it could have had
+        :param rows: StatementRow objects or dicts with account_id, date and amount
+        :param since_date: string : Start of the statement period - the earliest row of each account if omitted
+        :param until_date: string : End of the statement period - the latest row of each account if omitted
+        :return: ReconcileResult
+        """
+        rows = [r if isinstance(r, StatementRow) else StatementRow.from_dict(r) for r in rows]
+        tolerance = self.date_tolerance
+        result = ReconcileResult()
+        claimed = set()
+        periods: Dict[str, List[int]] = {}
+
+        with self._lock:
+            if self._index is None:
+                self.__build()
+
+            index, days, transactions = self._index, self._days, self._transactions
+
+            # Earlier rows claim first, so two equal purchases on different days pair in order
+            for row in sorted(rows, key=lambda r: r.date):
+                day = _day(row.date)
+                period = periods.setdefault(row.account_id, [day, day])
+                period[0], period[1] = min(period[0], day), max(period[1], day)
+
+                bounds = index.get((row.account_id, row.amount))
+                best = None
+
+                if bounds is not None:
+                    first, last = bounds
+
+                    # The earliest unclaimed candidate - taking the closest one could take the
+                    # only candidate of a later row, whose window starts later
+                    for i in range(bisect_left(days, day - tolerance, first, last), bisect_right(days, day + tolerance, first, last)):
+                        if i not in claimed:
+                            best = i
+                            break
+
+                if best is None:
+                    result.missing.append(row)
+                    continue
+
+                claimed.add(best)
+                result.matched.append(Match(row=row, transaction=transactions[best], days=day - days[best]))
+
+            start = _day(since_date) if since_date else None
+            end = _day(until_date) if until_date else None
+
+            for i, t in enumerate(transactions):
+                period = periods.get(t.account_id)
+
+                if period is not None and (start or period[0]) <= days[i] <= (end or period[1]) and i not in claimed:
+                    result.extra.append(t)
+
+        result.extra.sort(key=lambda t: (t.account_id or "", t.date or ""))
+
+        return result
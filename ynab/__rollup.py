@@ -0,0 +1,144 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# (month, category_id, account_id, payee, amount) - one per transaction, or one per split
+_Entry = Tuple[str, Optional[str], Optional[str], Optional[str], int]
+
+
+class BudgetRollup(object):
+    """
+    Running totals by (month, category), (month, account) and payee. Each transaction's
+    contribution is remembered, so an update or deletion only touches that transaction's
+    entries instead of rescanning the history. Split transactions count towards the
+    categories of their subtransactions.
+    """
+
+    def __init__(self, transactions: Iterable = ()):
+        self._entries: Dict[str, List[_Entry]] = {}
+        self._month_category: Dict[Tuple[str, Optional[str]], int] = defaultdict(int)
+        self._month_account: Dict[Tuple[str, Optional[str]], int] = defaultdict(int)
+        self._payee: Dict[Optional[str], int] = defaultdict(int)
+        self._counts: Dict[tuple, int] = defaultdict(int)
+        self._lock = threading.RLock()
+        self.update(transactions)
+
+    @classmethod
+    def from_api(cls, api, since_date: Optional[str] = None) -> "BudgetRollup":
+        """
+        Build the totals from the budget's transactions and keep them current from every
+        transaction the API returns afterwards - saves, updates and sync deltas
+        :param api: TransactionAPI
+        :param since_date: string : Only count transactions on or after this date
+        """
+        rollup = cls(api.get_all(since_date=since_date))
+        rollup.attach(api)
+        return rollup
+
+    def attach(self, api) -> None:
+        api.subscribe(self.update)
+
+    def detach(self, api) -> None:
+        api.unsubscribe(self.update)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def update(self, transactions: Iterable) -> None:
+        """
+        Add or replace transactions - deleted ones are taken out of the totals
+        """
+        with self._lock:
+            for t in transactions:
+                if not t.id:
+                    continue
+
+                self.__apply(self._entries.pop(t.id, ()), -1)
+
+                if not t.deleted:
+                    entries = self.__entries(t)
+                    self._entries[t.id] = entries
+                    self.__apply(entries, 1)
+
+    def remove(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            for id in ids:
+                self.__apply(self._entries.pop(id, ()), -1)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._month_category.clear()
+            self._month_account.clear()
+            self._payee.clear()
+            self._counts.clear()
+
+    def by_month_category(self, month: Optional[str] = None) -> Dict[Tuple[str, Optional[str]], int]:
+        """
+        :param month: string : Only this month, e.g. '2024-01'
+        :return: dict : (month, category_id) -> milliunits
+        """
+        with self._lock:
+            return {k: v for k, v in self._month_category.items() if month is None or k[0] == month}
+
+    def by_month_account(self, month: Optional[str] = None) -> Dict[Tuple[str, Optional[str]], int]:
+        """
+        :return: dict : (month, account_id) -> milliunits
+        """
+        with self._lock:
+            return {k: v for k, v in self._month_account.items() if month is None or k[0] == month}
+
+    def by_payee(self) -> Dict[Optional[str], int]:
+        """
+        :return: dict : payee id - or name for payees without an id - -> milliunits
+        """
+        with self._lock:
+            return dict(self._payee)
+
+    def category_total(self, month: str, category_id: Optional[str]) -> int:
+        with self._lock:
+            return self._month_category.get((month, category_id), 0)
+
+    def account_total(self, month: str, account_id: Optional[str]) -> int:
+        with self._lock:
+            return self._month_account.get((month, account_id), 0)
+
+    def months(self) -> List[str]:
+        with self._lock:
+            return sorted({month for month, _ in self._month_account})
+
+    @staticmethod
+    def __entries(transaction) -> List[_Entry]:
+        month = (transaction.date or "")[:7]
+        payee = transaction.payee_id or transaction.payee_name
+        subtransactions = [s for s in transaction.subtransactions if not s.deleted]
+
+        if not subtransactions:
+            return [(month, transaction.category_id, transaction.account_id, payee, transaction.amount)]
+
+        # Splits inherit the parent's payee when they don't name their own
+        return [
+            (month, s.category_id, transaction.account_id, s.payee_id or s.payee_name or payee, s.amount)
+            for s in subtransactions
+        ]
+
+    def __apply(self, entries: Iterable[_Entry], sign: int) -> None:
+        for month, category_id, account_id, payee, amount in entries:
+            self.__add(self._month_category, (month, category_id), sign * amount, sign)
+            self.__add(self._month_account, (month, account_id), sign * amount, sign)
+            self.__add(self._payee, payee, sign * amount, sign)
+
+    def __add(self, totals: dict, key, amount: int, sign: int) -> None:
+        # Count contributions so keys disappear with their last row, not when a sum happens to hit 0
+        count_key = (id(totals), key)
+        self._counts[count_key] += sign
+        totals[key] += amount
+
+        if self._counts[count_key] <= 0:
+            del self._counts[count_key]
+            del totals[key]
@@ -0,0 +1,316 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import re
+from collections import Counter
+from operator import itemgetter
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# The regex indexing reads parse trees from the private modules behind re. They may
+# change between Python versions - any failure only leaves the rule unindexed.
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    try:
+        import sre_constants
+        import sre_parse
+    except ImportError:  # pragma: no cover - removed in a future Python
+        sre_constants = None
+        sre_parse = None
+
+KINDS = ("exact", "prefix", "regex")
+FIELDS = ("payee", "memo")
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    Categorize rows whose payee name or memo matches pattern
+    :param category_id: string : Category assigned to matching rows
+    :param pattern: string : Text or regular expression - a regex matches anywhere in the text, use ^ to anchor it
+    :param kind: string : 'exact', 'prefix' or 'regex'
+    :param field: string : 'payee' or 'memo'
+    :param case_sensitive: bool : Compare case-sensitively
+    """
+
+    category_id: str
+    pattern: str
+    kind: str = "exact"
+    field: str = "payee"
+    case_sensitive: bool = False
+
+    def __post_init__(self):
+        if self.kind not in KINDS:
+            raise ValueError(f"Unknown rule kind '{self.kind}' - use one of {', '.join(KINDS)}")
+        if self.field not in FIELDS:
+            raise ValueError(f"Unknown rule field '{self.field}' - use one of {', '.join(FIELDS)}")
+        if self.kind == "regex":
+            re.compile(self.pattern)
+
+
+def required_literal(pattern: str) -> str:
+    """
+    The longest run of literal characters every match of pattern contains, casefolded -
+    empty if there is none, e.g. for an alternation at the top level, or if the parse
+    tree can't be read
+    """
+    if sre_parse is None:
+        return ""
+
+    best, run = "", []
+
+    def walk(items) -> None:
+        nonlocal best, run
+
+        for op, arg in items:
+            if op is sre_constants.LITERAL:
+                run.append(chr(arg))
+            elif op is sre_constants.SUBPATTERN:
+                # A group is matched exactly once - its literals are still required
+                walk(arg[-1])
+            else:
+                best = max(best, "".join(run), key=len)
+                run = []
+
+    try:
+        walk(sre_parse.parse(pattern))
+    except Exception:
+        return ""
+
+    return max(best, "".join(run), key=len).casefold()
+
+
+class _FieldMatcher(object):
+    """
+    Every rule of one field, compiled: exact rules are one dict lookup and prefix rules
+    one lookup per distinct prefix length. Regex rules are indexed by a trigram of a
+    literal every match must contain, so a value is only tested against the few regexes
+    whose trigram occurs in it.
+    """
+
+    GRAM = 3
+
+    def __init__(self, rules: List[Rule]):
+        # Folded and case-sensitive rules are kept apart so each value is casefolded once
+        self.exact: Tuple[Dict[str, Rule], Dict[str, Rule]] = ({}, {})
+        self.prefix: Tuple[Dict[str, Rule], Dict[str, Rule]] = ({}, {})
+        self.prefix_lengths: Tuple[List[int], List[int]] = ([], [])
+        # trigram -> (rule order, compiled pattern, rule), and regexes without a usable literal
+        self.grams: Dict[str, List[Tuple[int, re.Pattern, Rule]]] = {}
+        self.unindexed: List[Tuple[int, re.Pattern, Rule]] = []
+
+        for order, rule in enumerate(rules):
+            sensitive = int(rule.case_sensitive)
+            key = rule.pattern if rule.case_sensitive else rule.pattern.casefold()
+
+            # The first rule added for a key wins
+            if rule.kind == "exact":
+                self.exact[sensitive].setdefault(key, rule)
+            elif rule.kind == "prefix":
+                self.prefix[sensitive].setdefault(key, rule)
+            else:
+                self.__index(order, rule)
+
+        for sensitive in (0, 1):
+            self.prefix_lengths[sensitive].extend(
+                sorted({len(k) for k in self.prefix[sensitive]}, reverse=True)
+            )
+
+    def __index(self, order: int, rule: Rule) -> None:
+        entry = (order, re.compile(rule.pattern, 0 if rule.case_sensitive else re.IGNORECASE), rule)
+        literal = required_literal(rule.pattern)
+
+        if len(literal) < self.GRAM:
+            self.unindexed.append(entry)
+            return
+
+        # The least shared trigram of the literal keeps the buckets small
+        grams = [literal[i:i + self.GRAM] for i in range(len(literal) - self.GRAM + 1)]
+        gram = min(grams, key=lambda g: len(self.grams.get(g, ())))
+        self.grams.setdefault(gram, []).append(entry)
+
+    def match(self, value: Optional[str]) -> Optional[Rule]:
+        if not value:
+            return None
+
+        candidates = (value.casefold(), value)
+
+        for sensitive in (1, 0):
+            rule = self.exact[sensitive].get(candidates[sensitive])
+            if rule is not None:
+                return rule
+
+        # Longest prefix wins - the case-sensitive rule on a tie
+        best = None
+        for sensitive in (1, 0):
+            text = candidates[sensitive]
+            prefixes = self.prefix[sensitive]
+
+            for length in self.prefix_lengths[sensitive]:
+                if best is not None and length <= len(best.pattern):
+                    break
+                if length <= len(text) and (rule := prefixes.get(text[:length])) is not None:
+                    best = rule
+                    break
+
+        if best is not None:
+            return best
+
+        return self.__match_regex(value, candidates[0])
+
+    def __match_regex(self, value: str, folded: str) -> Optional[Rule]:
+        regexes = list(self.unindexed)
+
+        if self.grams:
+            size = self.GRAM
+            for gram in {folded[i:i + size] for i in range(len(folded) - size + 1)}:
+                bucket = self.grams.get(gram)
+                if bucket is not None:
+                    regexes.extend(bucket)
+
+        # The first regex added wins
+        for _, regex, rule in sorted(regexes, key=itemgetter(0)):
+            if regex.search(value) is not None:
+                return rule
+
+        return None
+
+
+class RuleSet(object):
+    """
+    Payee and memo rules compiled into lookup tables, so categorizing a row costs a
+    few lookups however many rules there are:
+
+        rules = RuleSet()
+        rules.add("groceries-id", "Whole Foods", kind="prefix")
+        rules.add("coffee-id", r"starbucks|peet'?s", kind="regex")
+        client.transactions.save_many(rules.apply(client.transactions.iter_all()))
+
+    The most specific rule wins - an exact rule, then the longest prefix, then the first
+    regex added. Payee rules are tried before memo rules.
+    """
+
+    def __init__(self, rules: Iterable[Rule] = ()):
+        self._rules: List[Rule] = []
+        self._matchers: Optional[Dict[str, _FieldMatcher]] = None
+        self.hits: Counter = Counter()
+
+        for rule in rules:
+            self.add_rule(rule)
+
+    def add(
+        self,
+        category_id: str,
+        pattern: str,
+        kind: str = "exact",
+        field: str = "payee",
+        case_sensitive: bool = False,
+    ) -> Rule:
+        """
+        Add a rule - see Rule for the parameters
+        """
+        return self.add_rule(Rule(category_id, pattern, kind, field, case_sensitive))
+
+    def add_rule(self, rule: Rule) -> Rule:
+        self._rules.append(rule)
+        self._matchers = None
+        return rule
+
+    @property
+    def rules(self) -> List[Rule]:
+        return list(self._rules)
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def compile(self) -> "RuleSet":
+        """
+        Build the lookup tables - done lazily by the first match after a change
+        """
+        by_field: Dict[str, List[Rule]] = {f: [] for f in FIELDS}
+
+        for rule in self._rules:
+            by_field[rule.field].append(rule)
+
+        self._matchers = {f: _FieldMatcher(rules) for f, rules in by_field.items()}
+
+        return self
+
+    def match(self, payee_name: Optional[str] = None, memo: Optional[str] = None) -> Optional[Rule]:
+        """
+        The rule for a payee name and memo
+        :return: Rule or None
+        """
+        matchers = self._matchers or self.compile()._matchers
+
+        return matchers["payee"].match(payee_name) or matchers["memo"].match(memo)  # type: ignore
+
+    def apply(self, transactions: Iterable, overwrite: bool = False) -> List:
+        """
+        Categorize transactions in place - see iter_apply
+        :return: The changed transactions - pass them to TransactionAPI.save_many
+        """
+        return list(self.iter_apply(transactions, overwrite))
+
+    def iter_apply(self, transactions: Iterable, overwrite: bool = False) -> Iterator:
+        """
+        Lazily categorize transactions - a streamed iterator such as TransactionAPI.iter_all
+        is consumed one row at a time. The splits of a new split transaction are categorized
+        on their own, falling back to the parent's payee, and the parent is yielded if any
+        changed. Saved splits are skipped, since the API can't update subtransactions, as
+        are deleted rows and transfers.
+        :param transactions: Transaction or Subtransaction objects
+        :param overwrite: bool : Also recategorize rows that already have a category
+        :return: Generator of the changed rows
+        """
+        for transaction in transactions:
+            if transaction.deleted:
+                continue
+
+            subtransactions = getattr(transaction, "subtransactions", None)
+
+            if subtransactions:
+                if transaction.id:
+                    continue
+
+                changed = False
+
+                for sub in subtransactions:
+                    changed |= self.__categorize(sub, sub.payee_name or transaction.payee_name, overwrite)
+
+                if changed:
+                    yield transaction
+            elif self.__categorize(transaction, transaction.payee_name, overwrite):
+                yield transaction
+
+    def __categorize(self, row, payee_name: Optional[str], overwrite: bool) -> bool:
+        if row.deleted or row.transfer_account_id or (row.category_id and not overwrite):
+            return False
+
+        rule = self.match(payee_name, row.memo)
+
+        if rule is None or rule.category_id == row.category_id:
+            return False
+
+        self.hits[rule] += 1
+        row.category_id = rule.category_id
+
+        return True
+
+    def categorize(self, api, since_date: Optional[str] = None, overwrite: bool = False, **kwargs):
+        """
+        Stream the budget's transactions through the rules and save the changed ones
+        :param api: TransactionAPI
+        :param since_date: string : Only categorize transactions on or after this date
+        :param overwrite: bool : Also recategorize rows that already have a category
+        :param kwargs: Passed through to TransactionAPI.save_many
+        :return: Saved transactions as returned by the API
+        """
+        return api.save_many(self.apply(api.iter_all(since_date=since_date), overwrite), **kwargs)
+
+    def __repr__(self):
+        kinds = Counter(r.kind for r in self._rules)
+        return f"RuleSet({', '.join(f'{k}={kinds[k]}' for k in KINDS)})"
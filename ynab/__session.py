@@ -0,0 +1,63 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+Timeout = Union[None, float, Tuple[float, float]]
+
+
+@dataclass
+class SessionConfig:
+    """
+    Connection pool settings shared by every sub-API of a client
+    :param pool_connections: Number of host pools to cache
+    :param pool_maxsize: Maximum number of connections kept alive per host
+    :param pool_block: Block when the pool is exhausted instead of opening extra connections
+    :param keep_alive: Reuse connections between requests
+    :param timeout: (connect, read) timeout in seconds passed to every request
+    :param compression: Ask the server for gzip/deflate compressed responses
+    """
+
+    pool_connections: int = 10
+    pool_maxsize: int = 10
+    pool_block: bool = False
+    keep_alive: bool = True
+    timeout: Timeout = (10.0, 60.0)
+    compression: bool = True
+
+
+def create_session(
+    config: Optional[SessionConfig] = None, transport: Optional[BaseAdapter] = None
+) -> requests.Session:
+    """
+    Create a pooled requests.Session
+    :param config: SessionConfig : Pool settings - defaults are used if omitted
+    :param transport: BaseAdapter : Custom transport adapter mounted instead of the default HTTPAdapter
+    :return: requests.Session
+    """
+    config = config or SessionConfig()
+    session = requests.Session()
+
+    if transport is None:
+        transport = HTTPAdapter(
+            pool_connections=config.pool_connections,
+            pool_maxsize=config.pool_maxsize,
+            pool_block=config.pool_block,
+        )
+
+    session.mount("https://", transport)
+    session.mount("http://", transport)
+
+    if not config.keep_alive:
+        session.headers["Connection"] = "close"
+
+    if not config.compression:
+        session.headers["Accept-Encoding"] = "identity"
+
+    return session
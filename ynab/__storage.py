@@ -0,0 +1,338 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import json
+import sqlite3
+import threading
+from dataclasses import fields
+from typing import Dict, Iterable, List, Optional
+
+from ynab.__accounts import Account
+from ynab.__categories import Category
+from ynab.__index import AmbiguousNameError, Payee
+from ynab.__sync import ChangeSet
+from ynab.__transactions import Subtransaction, Transaction
+
+# Attributes that are not stored as plain columns
+_NON_COLUMNS = ("meta", "subtransactions", "api")
+
+
+def _columns(cls) -> List[str]:
+    return [f.name for f in fields(cls) if f.init and f.name not in _NON_COLUMNS]
+
+
+def _bool_columns(cls) -> List[str]:
+    return [f.name for f in fields(cls) if f.type == Optional[bool]]
+
+
+class SQLiteStore(object):
+    """
+    On-disk mirror of a budget. Transactions, subtransactions, accounts and categories
+    are kept in indexed tables together with the server_knowledge of each endpoint,
+    so lookups and cold starts don't need the network. A store holds one budget - it
+    records the id of the first budget bound to it and refuses any other.
+    """
+
+    TABLES = {
+        "transactions": Transaction,
+        "subtransactions": Subtransaction,
+        "accounts": Account,
+        "categories": Category,
+    }
+
+    INDEXES = {
+        "transactions": [("account_id", "date"), ("payee_name",), ("category_id",), ("date",)],
+        "subtransactions": [("transaction_id",), ("payee_name",), ("category_id",)],
+        "accounts": [("name",)],
+        "categories": [("name",), ("category_group_name", "name")],
+    }
+
+    def __init__(self, path: str = ":memory:", budget_id: Optional[str] = None):
+        """
+        :param path: string : SQLite database file - ':memory:' keeps it in memory
+        :param budget_id: string : Budget the file mirrors - bound by the client if omitted
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self.__create_schema()
+
+        if budget_id is not None:
+            self.bind(budget_id)
+
+    def __create_schema(self) -> None:
+        with self._lock, self._conn:
+            for table, cls in self.TABLES.items():
+                columns = ", ".join(
+                    f"{c} TEXT PRIMARY KEY" if c == "id" else c for c in _columns(cls)
+                )
+                self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns}, meta TEXT)")
+
+                for index in self.INDEXES[table]:
+                    name = f"ix_{table}_{'_'.join(index)}"
+                    self._conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(index)})"
+                    )
+
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS server_knowledge "
+                "(endpoint TEXT PRIMARY KEY, knowledge INTEGER)"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS budget (budget_id TEXT PRIMARY KEY)")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @property
+    def budget_id(self) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT budget_id FROM budget").fetchone()
+
+        return None if row is None else row["budget_id"]
+
+    def bind(self, budget_id: str) -> None:
+        """
+        Record the budget the store mirrors - a store of another budget is refused, since
+        its rows and server_knowledge would be merged with this budget's deltas
+        :raises ValueError: The store already holds another budget
+        """
+        with self._lock, self._conn:
+            bound = self.budget_id
+
+            if bound is None:
+                self._conn.execute("INSERT INTO budget (budget_id) VALUES (?)", (budget_id,))
+            elif bound != budget_id:
+                raise ValueError(
+                    f"{self.path} mirrors budget '{bound}', not '{budget_id}' - use one store per budget"
+                )
+
+    # Server knowledge
+
+    def get_knowledge(self, endpoint: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT knowledge FROM server_knowledge WHERE endpoint = ?", (endpoint,)
+            ).fetchone()
+
+        return None if row is None else row["knowledge"]
+
+    def _set_knowledge(self, endpoint: str, knowledge: int) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO server_knowledge (endpoint, knowledge) VALUES (?, ?)",
+            (endpoint, knowledge),
+        )
+
+    # Writes
+
+    def merge(self, endpoint: str, items: Iterable, knowledge: Optional[int] = None) -> ChangeSet:
+        """
+        Apply a delta from the API in a single database transaction
+        :param endpoint: string : 'transactions', 'accounts' or 'categories'
+        :param items: Models returned by the API - rows flagged deleted are removed
+        :param knowledge: int : server_knowledge to record for the endpoint
+        :return: ChangeSet
+        """
+        items = list(items)
+        changes = ChangeSet()
+
+        with self._lock, self._conn:
+            existing = self._existing_ids(endpoint, [i.id for i in items])
+
+            for item in items:
+                if item.deleted:
+                    if item.id in existing:
+                        changes.deleted.append(item)
+                elif item.id in existing:
+                    changes.updated.append(item)
+                else:
+                    changes.created.append(item)
+
+            self._delete(endpoint, [i.id for i in changes.deleted])
+            self._upsert(endpoint, changes.created + changes.updated)
+
+            if knowledge is not None:
+                self._set_knowledge(endpoint, knowledge)
+
+        return changes
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            for table in self.TABLES:
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.execute("DELETE FROM server_knowledge")
+
+    def _existing_ids(self, table: str, ids: List[str]) -> set:
+        existing = set()
+
+        # Stay below SQLite's bound parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT id FROM {table} WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            existing.update(r["id"] for r in rows)
+
+        return existing
+
+    def _upsert(self, table: str, items: List) -> None:
+        if not items:
+            return
+
+        columns = _columns(self.TABLES[table]) + ["meta"]
+        sql = (
+            f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})"
+        )
+        self._conn.executemany(sql, [self.__row(item, columns) for item in items])
+
+        if table == "transactions":
+            # Subtransactions are always replaced as a whole with their parent
+            self._delete_children([t.id for t in items])
+            self._upsert("subtransactions", [s for t in items for s in t.subtransactions if not s.deleted])
+
+    def _delete(self, table: str, ids: List[str]) -> None:
+        if not ids:
+            return
+
+        self._conn.executemany(f"DELETE FROM {table} WHERE id = ?", [(i,) for i in ids])
+
+        if table == "transactions":
+            self._delete_children(ids)
+
+    def _delete_children(self, transaction_ids: List[str]) -> None:
+        self._conn.executemany(
+            "DELETE FROM subtransactions WHERE transaction_id = ?", [(i,) for i in transaction_ids]
+        )
+
+    @staticmethod
+    def __row(item, columns: List[str]) -> tuple:
+        return tuple(
+            json.dumps(item.meta) if c == "meta" else getattr(item, c) for c in columns
+        )
+
+    # Reads
+
+    def load(self, endpoint: str, api=None) -> Dict[str, object]:
+        """
+        Load every stored row of an endpoint
+        :return: dict : id -> model
+        """
+        if endpoint == "transactions":
+            items = self.get_transactions()
+        else:
+            items = self._select(endpoint, "", (), api=api)
+
+        return {i.id: i for i in items}
+
+    def get_transactions(
+        self,
+        account_id: Optional[str] = None,
+        payee_name: Optional[str] = None,
+        category_id: Optional[str] = None,
+        since_date: Optional[str] = None,
+    ) -> List[Transaction]:
+        """
+        Query stored transactions through the table indexes - ordered by date
+        """
+        clauses, params = [], []
+
+        for column, value in (("account_id", account_id), ("payee_name", payee_name), ("category_id", category_id)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+
+        if since_date is not None:
+            clauses.append("date >= ?")
+            params.append(since_date)
+
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        transactions = self._select("transactions", where + "ORDER BY date, id", params)
+
+        by_id = {t.id: t for t in transactions}
+        for sub in self._subtransactions_for(list(by_id)):
+            by_id[sub.transaction_id].subtransactions.append(sub)
+
+        # The saved state from from_dict() predates the subtransactions
+        for t in transactions:
+            if t.subtransactions:
+                t.mark_clean()
+
+        return transactions
+
+    def get_account_by_name(self, name: str, api=None, case_sensitive: bool = True) -> Optional[Account]:
+        collate = "" if case_sensitive else " COLLATE NOCASE"
+        accounts = self._select("accounts", f"WHERE name = ?{collate} LIMIT 2", (name,), api=api)
+        return self.__single(accounts, name)
+
+    def get_category_by_name(
+        self, name: str, group_name: Optional[str] = None, case_sensitive: bool = True
+    ) -> Optional[Category]:
+        collate = "" if case_sensitive else " COLLATE NOCASE"
+        clause, params = f"WHERE name = ?{collate}", [name]
+
+        if group_name is not None:
+            clause += f" AND category_group_name = ?{collate}"
+            params.append(group_name)
+
+        categories = self._select("categories", clause + " LIMIT 2", params)
+        return self.__single(categories, name)
+
+    def get_payees(self) -> List[Payee]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payee_id, payee_name FROM transactions WHERE payee_id IS NOT NULL "
+                "UNION SELECT payee_id, payee_name FROM subtransactions WHERE payee_id IS NOT NULL"
+            ).fetchall()
+
+        return list({r["payee_id"]: Payee(id=r["payee_id"], name=r["payee_name"]) for r in rows}.values())
+
+    @staticmethod
+    def __single(items: list, name: str):
+        if len(items) > 1:
+            raise AmbiguousNameError(f"More than one item is named '{name}'")
+
+        return items[0] if items else None
+
+    def _subtransactions_for(self, transaction_ids: List[str]) -> List[Subtransaction]:
+        subtransactions = []
+
+        for start in range(0, len(transaction_ids), 500):
+            chunk = transaction_ids[start:start + 500]
+            subtransactions.extend(
+                self._select(
+                    "subtransactions",
+                    f"WHERE transaction_id IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+            )
+
+        return subtransactions
+
+    def _select(self, table: str, clause: str, params, api=None) -> list:
+        cls = self.TABLES[table]
+        bool_columns = _bool_columns(cls)
+
+        with self._lock:
+            rows = self._conn.execute(f"SELECT * FROM {table} {clause}", tuple(params)).fetchall()
+
+        items = []
+        for row in rows:
+            data = dict(row)
+            meta = json.loads(data.pop("meta") or "{}")
+
+            for column in bool_columns:
+                if data[column] is not None:
+                    data[column] = bool(data[column])
+
+            # Unknown keys go back into meta through from_dict
+            data.update(meta)
+
+            if cls is Account:
+                items.append(Account.from_dict(api=api, data=data))
+            else:
+                items.append(cls.from_dict(data))
+
+        return items
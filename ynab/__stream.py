@@ -0,0 +1,139 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import codecs
+import json
+from typing import Iterable, Iterator, Optional, Sequence
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]}"
+_DECODER = json.JSONDecoder()
+
+# Drop the consumed part of the buffer once it grows beyond this many characters
+_COMPACT_AT = 1 << 16
+
+
+class _Reader(object):
+    """
+    Pull based JSON tokenizer over an iterable of byte chunks. Values are decoded with
+    JSONDecoder.raw_decode, so only one array item needs to be in memory at a time.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def __fill(self) -> bool:
+        if self._eof:
+            return False
+
+        if self._pos > _COMPACT_AT:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+
+        for chunk in self._chunks:
+            if chunk:
+                self._buf += self._decoder.decode(chunk)
+                return True
+
+        self._buf += self._decoder.decode(b"", final=True)
+        self._eof = True
+        return False
+
+    def peek(self) -> str:
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+
+            if not self.__fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at position {self._pos} of JSON stream")
+        self._pos += 1
+
+    def value(self):
+        self.peek()
+
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self.__fill():
+                    raise
+                continue
+
+            # A number cut off by the end of a chunk decodes without error - only trust it
+            # once the character after it is known
+            if (
+                isinstance(value, (int, float))
+                and (end == len(self._buf) or self._buf[end] not in _DELIMITERS)
+                and self.__fill()
+            ):
+                continue
+
+            self._pos = end
+            return value
+
+
+def iter_json_array(
+    chunks: Iterable[bytes], path: Sequence[str], extras: Optional[dict] = None
+) -> Iterator:
+    """
+    Incrementally yield the items of the array found at path, e.g. ("data", "transactions")
+    :param chunks: Iterable of bytes - e.g. requests.Response.iter_content()
+    :param path: Object keys leading to the array
+    :param extras: dict : Filled with the other keys found next to the array, e.g. server_knowledge
+    :return: Generator of decoded array items
+    """
+    reader = _Reader(chunks)
+    yield from _iter_object(reader, list(path), extras if extras is not None else {})
+
+
+def _iter_object(reader: _Reader, path: list, extras: dict) -> Iterator:
+    reader.expect("{")
+
+    if reader.peek() == "}":
+        reader.expect("}")
+        return
+
+    while True:
+        key = reader.value()
+        reader.expect(":")
+
+        if key != path[0]:
+            extras[key] = reader.value()
+        elif len(path) > 1:
+            yield from _iter_object(reader, path[1:], extras)
+        elif reader.peek() == "[":
+            reader.expect("[")
+
+            if reader.peek() == "]":
+                reader.expect("]")
+            else:
+                while True:
+                    yield reader.value()
+
+                    if reader.peek() == "]":
+                        reader.expect("]")
+                        break
+
+                    reader.expect(",")
+        else:
+            # null or a single object instead of an array
+            extras[key] = reader.value()
+
+        if reader.peek() == "}":
+            reader.expect("}")
+            return
+
+        reader.expect(",")
@@ -0,0 +1,189 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from ynab.__index import BudgetIndex
+
+
+@dataclass
+class ChangeSet:
+    created: list = field(default_factory=list)
+    updated: list = field(default_factory=list)
+    deleted: list = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.created or self.updated or self.deleted)
+
+    def __len__(self) -> int:
+        return len(self.created) + len(self.updated) + len(self.deleted)
+
+    def __repr__(self):
+        return (
+            f"ChangeSet("
+            f"created={len(self.created)}, "
+            f"updated={len(self.updated)}, "
+            f"deleted={len(self.deleted)}"
+            f")"
+        )
+
+
+class BudgetSync(object):
+    """
+    Keeps a local model of a budget current by requesting only the changes since
+    the last server_knowledge seen on each endpoint. With a store the model and the
+    knowledge live in the store, so a new process resumes from the last delta.
+    """
+
+    ENDPOINTS = ("accounts", "categories", "transactions")
+
+    def __init__(
+        self,
+        client,
+        store=None,
+        max_age: Optional[float] = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param store: SQLiteStore to keep the model in - in memory if omitted
+        :param max_age: float : Seconds a name lookup trusts the index before pulling a delta - None for never
+        :param clock: Monotonic clock - replaceable for tests
+        """
+        self.client = client
+        self.store = store
+        self.max_age = max_age
+        self.models: Dict[str, dict] = {e: {} for e in self.ENDPOINTS}
+        self.index = BudgetIndex()
+        self._seeded = set()
+        self._synced_at: Dict[str, float] = {}
+        self._clock = clock
+        self._lock = threading.RLock()
+
+        if store is None:
+            self.server_knowledge: Dict[str, Optional[int]] = {e: None for e in self.ENDPOINTS}
+        else:
+            self.server_knowledge = {e: store.get_knowledge(e) for e in self.ENDPOINTS}
+
+    @property
+    def accounts(self) -> dict:
+        return self._model("accounts")
+
+    @property
+    def categories(self) -> dict:
+        return self._model("categories")
+
+    @property
+    def transactions(self) -> dict:
+        return self._model("transactions")
+
+    def _model(self, endpoint: str) -> dict:
+        if self.store is None:
+            return self.models[endpoint]
+
+        return self.store.load(endpoint, api=getattr(self.client, endpoint))
+
+    def sync_accounts(self) -> ChangeSet:
+        return self._sync("accounts")
+
+    def sync_categories(self) -> ChangeSet:
+        return self._sync("categories")
+
+    def sync_transactions(self) -> ChangeSet:
+        return self._sync("transactions")
+
+    def sync(self) -> Dict[str, ChangeSet]:
+        """
+        Pull the changes of every endpoint
+        :return: dict : endpoint name -> ChangeSet
+        """
+        return {endpoint: self._sync(endpoint) for endpoint in self.ENDPOINTS}
+
+    def warm(self, endpoint: str, refresh: bool = False) -> bool:
+        """
+        Pull a delta only if the endpoint wasn't synced in this process yet, was synced
+        more than max_age seconds ago, or refresh is set - lookups in between are local
+        :return: bool : Whether a delta was requested
+        """
+        with self._lock:
+            synced_at = self._synced_at.get(endpoint)
+            stale = synced_at is None or (
+                self.max_age is not None and self._clock() - synced_at > self.max_age
+            )
+
+            if not refresh and not stale:
+                return False
+
+            self._sync(endpoint)
+
+        return True
+
+    def reset(self) -> None:
+        with self._lock:
+            for endpoint in self.ENDPOINTS:
+                self.server_knowledge[endpoint] = None
+                self.models[endpoint].clear()
+
+            self.index.clear()
+            self._seeded.clear()
+            self._synced_at.clear()
+
+            if self.store is not None:
+                self.store.clear()
+
+    def _sync(self, endpoint: str) -> ChangeSet:
+        api = getattr(self.client, endpoint)
+
+        # Hold the lock across the request so two callers don't fetch and merge the same delta
+        with self._lock:
+            self.__seed_index(endpoint)
+            items, knowledge = api.get_changes(self.server_knowledge[endpoint])
+
+            if self.store is None:
+                changes = self._merge(self.models[endpoint], items)
+            else:
+                changes = self.store.merge(endpoint, items, knowledge)
+
+            self.index.update(endpoint, changes.created + changes.updated)
+            self.index.remove(endpoint, [i.id for i in changes.deleted])
+            self.server_knowledge[endpoint] = knowledge
+            self._synced_at[endpoint] = self._clock()
+
+        return changes
+
+    def __seed_index(self, endpoint: str) -> None:
+        # A store may already hold rows that no delta will ever report again
+        if endpoint in self._seeded:
+            return
+
+        self._seeded.add(endpoint)
+
+        if self.store is None:
+            return
+
+        if endpoint == "transactions":
+            self.index.payees.update(self.store.get_payees())
+        else:
+            self.index.update(endpoint, self._model(endpoint).values())
+
+    @staticmethod
+    def _merge(model: dict, items: List) -> ChangeSet:
+        changes = ChangeSet()
+
+        for item in items:
+            if item.deleted:
+                previous = model.pop(item.id, None)
+                if previous is not None:
+                    changes.deleted.append(item)
+            elif item.id in model:
+                model[item.id] = item
+                changes.updated.append(item)
+            else:
+                model[item.id] = item
+                changes.created.append(item)
+
+        return changes
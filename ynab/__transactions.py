@@ -3,10 +3,30 @@
 # This software is released under the MIT License.
 # https://opensource.org/licenses/MIT
 
+import heapq
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import List, Union, Optional
+from operator import attrgetter
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Tuple, Union, Optional
 
 from ynab.__base import RESTBase
+from ynab.__bulk import BulkResult, BulkWriteError, BulkWriter
+from ynab.__dedup import DedupIndex
+from ynab.__export import TRANSACTION_COLUMNS, ExportStats, export_rows, flatten_transactions
+from ynab.__frame import TransactionFrame
+from ynab.__query import Where
+from ynab.__utils import field_names
+
+# Fields sent by save_transaction - a loaded transaction remembers their values to detect changes
+SAVE_FIELDS = (
+    "account_id", "date", "amount", "memo", "cleared", "flag_color", "payee_id", "payee_name", "category_id",
+)
+_SUB_SAVE_FIELDS = ("amount", "payee_id", "category_id", "memo")
+_TRACKED = SAVE_FIELDS + ("subtransactions",)
+
+_save_state = attrgetter(*SAVE_FIELDS)
+_sub_save_state = attrgetter(*_SUB_SAVE_FIELDS)
 
 
 @dataclass
@@ -30,8 +50,10 @@ class Subtransaction:
         known_args = {}
         unknown_args = {}
 
+        names = field_names(cls)
+
         for key, value in data.items():
-            if key in cls.__annotations__:
+            if key in names:
                 known_args[key] = value
             else:
                 unknown_args[key] = value
@@ -81,38 +103,101 @@ class Transaction:
     subtransactions: List[Subtransaction] = field(default_factory=list)
     meta: dict = field(default_factory=dict)
 
+    _snapshot: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+
     @classmethod
     def from_dict(cls, data: dict) -> "Transaction":
         known_args = {}
         unknown_args = {}
-        subtransactions = []
 
         # Create subtransactions
-        if "subtransactions" in data:
-            subtransactions_list = data.pop("subtransactions")
+        subtransactions = [
+            Subtransaction.from_dict(st) for st in data.get("subtransactions") or []
+        ]
 
-            subtransactions = [
-                Subtransaction.from_dict(st) for st in subtransactions_list
-            ]
+        names = field_names(cls)
 
         for key, value in data.items():
-            if key in cls.__annotations__:
+            if key == "subtransactions":
+                continue
+            elif key in names:
                 known_args[key] = value
             else:
                 unknown_args[key] = value
 
-        return cls(**known_args, meta=unknown_args, subtransactions=subtransactions)
+        transaction = cls(**known_args, meta=unknown_args, subtransactions=subtransactions)
+        transaction.mark_clean()
+
+        return transaction
+
+    def _save_state(self) -> tuple:
+        subtransactions = self.subtransactions
+        return (*_save_state(self), tuple(map(_sub_save_state, subtransactions)) if subtransactions else ())
+
+    def mark_clean(self) -> None:
+        """
+        Remember the saved state - called for every transaction built from API data
+        """
+        self._snapshot = self._save_state()
+
+    @property
+    def is_dirty(self) -> bool:
+        """
+        True if a saved field changed since the transaction was loaded, or if it wasn't loaded at all
+        """
+        return self._snapshot is None or self._save_state() != self._snapshot
+
+    @property
+    def dirty_fields(self) -> FrozenSet[str]:
+        """
+        Saved fields changed since the transaction was loaded - all of them for new transactions
+        """
+        if self._snapshot is None:
+            return frozenset(_TRACKED)
+
+        return frozenset(
+            name for name, old, new in zip(_TRACKED, self._snapshot, self._save_state()) if old != new
+        )
+
+    @property
+    def update_payload(self) -> dict:
+        """
+        Only the changed fields, plus the id - the full save_transaction if the transaction wasn't loaded
+        """
+        full = self.save_transaction
+
+        if self._snapshot is None or not self.id:
+            return full
+
+        dirty = self.dirty_fields
+        data = {"id": self.id}
+
+        # A split's amount and category follow from its subtransactions
+        if "subtransactions" in dirty:
+            dirty = dirty | {"amount", "category_id"}
+            data["subtransactions"] = full["subtransactions"]
+
+        for name in ("account_id", "date", "amount", "memo", "cleared", "flag_color", "category_id"):
+            if name in dirty:
+                data[name] = full[name]
+
+        if "payee_id" in dirty and self.payee_id:
+            data["payee_id"] = self.payee_id
+        elif "payee_id" in dirty or "payee_name" in dirty:
+            data["payee_name"] = self.payee_name
+
+        return data
 
     @property
     def save_transaction(self) -> dict:
+        subtransactions = [s.save_sub_transaction for s in self.subtransactions]
+
         data = {
             "account_id": self.account_id,
             "date": self.date,
-            "amount": self.amount
-            if len(self.subtransactions) == 0
-            else sum([s.amount for s in self.subtransactions]),
-            "category_id": self.category_id if len(self.subtransactions) == 0 else None,
-            "subtransactions": [s.save_sub_transaction for s in self.subtransactions],
+            "amount": sum(s["amount"] for s in subtransactions) if subtransactions else self.amount,
+            "category_id": None if subtransactions else self.category_id,
+            "subtransactions": subtransactions,
             "memo": self.memo,
             "flag_color": self.flag_color,
             "cleared": self.cleared,
@@ -141,19 +226,47 @@ class Transaction:
 
 
 class TransactionAPI(RESTBase):
+    BULK_CHUNK_SIZE = 500
+    BULK_WORKERS = 4
+
     def __init__(self, budget_id: str, **kwargs):
         super().__init__(**kwargs)
         self._budget_id = budget_id
         self._budget_uri = f"/budgets/{budget_id}/"
+        self._model = kwargs.get("models", {}).get("transactions", Transaction)
+        self._subscribers: List[Callable[[List[Transaction]], None]] = []
+        # Per thread: the batched() depth and since_date -> account id -> transactions,
+        # filled by get_by_account inside the block. Writes bump the generation.
+        self._batch_local = threading.local()
+        self._batch_generation = 0
+        self._batch_lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[List[Transaction]], None]) -> None:
+        """
+        Call callback with every list of transactions the API returns - reads, deltas and writes
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[List[Transaction]], None]) -> None:
+        self._subscribers.remove(callback)
 
-    @staticmethod
     def __load_transactions_from_json(
-        data: dict,
+        self, data: dict
     ) -> Union[List[Transaction], Transaction]:
-        if transactions := data["data"].get("transactions"):
-            return [Transaction.from_dict(t) for t in transactions]
+        if "transactions" in data["data"]:
+            transactions = self._build(
+                "transactions", lambda: [self._model.from_dict(t) for t in data["data"]["transactions"]]
+            )
+            self.__notify(transactions)
+            return transactions
         else:
-            return Transaction.from_dict(data["data"]["transaction"])
+            transaction = self._build("transactions", lambda: self._model.from_dict(data["data"]["transaction"]))
+            self.__notify([transaction])
+            return transaction
+
+    def __notify(self, transactions: List[Transaction]) -> None:
+        for callback in list(self._subscribers):
+            callback(transactions)
 
     def get_all(
         self, since_date: Optional[str] = None
@@ -167,11 +280,33 @@ class TransactionAPI(RESTBase):
 
         resp = self._rest_call[method](api_path, params)
 
-        return self.__load_transactions_from_json(resp.json())
+        return self.__load_transactions_from_json(self._decode(resp))
+
+    def get_changes(
+        self, last_knowledge_of_server: Optional[int] = None
+    ) -> Tuple[List[Transaction], int]:
+        """
+        Get the transactions changed since the given server knowledge - including deleted ones
+        :param last_knowledge_of_server: int : Knowledge returned by the previous call - None for everything
+        :return: (transactions, server_knowledge)
+        """
+        method = "GET"
+        api_path = self._budget_uri + f"transactions/"
+        params = {}
+
+        if last_knowledge_of_server is not None:
+            params["last_knowledge_of_server"] = last_knowledge_of_server
+
+        data = self._decode(self._rest_call[method](api_path, params, cacheable=last_knowledge_of_server is None))
+
+        return self.__load_transactions_from_json(data), data["data"]["server_knowledge"]
 
     def get_by_account(
         self, account_id: str, since_date: Optional[str] = None
     ) -> Union[List[Transaction], Transaction]:
+        if getattr(self._batch_local, "depth", 0):
+            return list(self.__batched(since_date).get(account_id, ()))
+
         method = "GET"
         api_path = self._budget_uri + f"accounts/{account_id}/transactions"
         params = {}
@@ -181,7 +316,236 @@ class TransactionAPI(RESTBase):
 
         resp = self._rest_call[method](api_path, params)
 
-        return self.__load_transactions_from_json(resp.json())
+        return self.__load_transactions_from_json(self._decode(resp))
+
+    def get_by_accounts(
+        self, account_ids: Optional[Iterable[str]] = None, since_date: Optional[str] = None
+    ) -> Dict[str, List[Transaction]]:
+        """
+        Transactions of several accounts from one budget-wide request, instead of one
+        request per account. Only the requested accounts' transactions are built.
+        :param account_ids: Accounts to return - every account with transactions if omitted
+        :param since_date: string : Only return transactions on or after this date
+        :return: dict : account id -> transactions - requested accounts without any map to an empty list
+        """
+        method = "GET"
+        api_path = self._budget_uri + f"transactions/"
+        params = {}
+
+        if since_date:
+            params["since_date"] = since_date
+
+        rows = self._decode(self._rest_call[method](api_path, params))["data"]["transactions"]
+
+        if account_ids is not None:
+            partitions: Dict[str, List[Transaction]] = {a: [] for a in account_ids}
+            rows = [r for r in rows if r["account_id"] in partitions]
+        else:
+            partitions = {}
+
+        transactions = self._build("transactions", lambda: [self._model.from_dict(r) for r in rows])
+
+        for transaction in transactions:
+            partition = partitions.get(transaction.account_id)
+
+            if partition is None:
+                partition = partitions[transaction.account_id] = []
+
+            partition.append(transaction)
+
+        self.__notify(transactions)
+
+        return partitions
+
+    @contextmanager
+    def batched(self) -> Iterator["TransactionAPI"]:
+        """
+        Serve get_by_account - and so Account.get_transactions - from one budget-wide
+        fetch per since_date while the block runs:
+
+            with client.transactions.batched():
+                for account in client.accounts.get_all():
+                    account.get_transactions()
+
+        Reads inside the block see the budget as of the first fetch, until a write
+        through this API. Unknown account ids return an empty list. The block only applies
+        to the thread that entered it.
+        """
+        local = self._batch_local
+
+        if not getattr(local, "depth", 0):
+            local.depth, local.batch, local.generation = 0, {}, None
+
+        local.depth += 1
+
+        try:
+            yield self
+        finally:
+            local.depth -= 1
+
+            if not local.depth:
+                local.batch = {}
+
+    def __batched(self, since_date: Optional[str]) -> Dict[str, List[Transaction]]:
+        local = self._batch_local
+
+        with self._batch_lock:
+            generation = self._batch_generation
+
+        if local.generation != generation:
+            local.batch, local.generation = {}, generation
+
+        # Concurrent threads share the one fetch through the single-flight of get_by_accounts
+        if since_date not in local.batch:
+            local.batch[since_date] = self.get_by_accounts(since_date=since_date)
+
+        return local.batch[since_date]
+
+    def __drop_batches(self) -> None:
+        # Every thread's batch predates the write - each refetches on its next read
+        with self._batch_lock:
+            self._batch_generation += 1
+
+    def iter_all(
+        self, since_date: Optional[str] = None, chunk_size: int = 65536
+    ) -> Iterator[Transaction]:
+        """
+        Stream all transactions - the response is parsed incrementally and each
+        Transaction is built only when the generator reaches it
+        :param since_date: string : Only return transactions on or after this date
+        :param chunk_size: int : Bytes read from the socket at a time
+        :return: Generator of Transaction
+        """
+        api_path = self._budget_uri + f"transactions/"
+
+        for data in self._iter_rows(api_path, since_date, chunk_size):
+            yield self._model.from_dict(data)
+
+    def iter_by_account(
+        self, account_id: str, since_date: Optional[str] = None, chunk_size: int = 65536
+    ) -> Iterator[Transaction]:
+        """
+        Stream the transactions of one account - see iter_all
+        """
+        api_path = self._budget_uri + f"accounts/{account_id}/transactions"
+
+        for data in self._iter_rows(api_path, since_date, chunk_size):
+            yield self._model.from_dict(data)
+
+    def query(
+        self,
+        where: Optional[Where] = None,
+        account_id: Optional[str] = None,
+        since_date: Optional[str] = None,
+        limit: Optional[int] = None,
+        chunk_size: int = 65536,
+    ) -> Iterator[Transaction]:
+        """
+        Lazily yield the transactions matching where. Rows are filtered as raw dicts while
+        the response streams in, so only matches are built, and the download stops once
+        limit matches were found or the caller stops iterating.
+        :param where: Where : Filter, e.g. Where.payee("Grocer") & Where.approved(False) - None for all
+        :param account_id: string : Only read this account's transactions
+        :param since_date: string : Only read transactions on or after this date
+        :param limit: int : Stop after this many matches
+        :return: Generator of Transaction
+        """
+        if limit is not None and limit <= 0:
+            return
+
+        rows = self._iter_rows(self.__rows_path(account_id), since_date, chunk_size)
+        found = 0
+
+        try:
+            for row in rows:
+                if where is None or where(row):
+                    yield self._model.from_dict(row)
+                    found += 1
+
+                    if found == limit:
+                        return
+        finally:
+            rows.close()
+
+    def latest(
+        self,
+        n: int,
+        where: Optional[Where] = None,
+        account_id: Optional[str] = None,
+        since_date: Optional[str] = None,
+    ) -> List[Transaction]:
+        """
+        The n most recent transactions matching where, newest first. Every row is read,
+        but only n raw rows are kept and only those are built into Transactions.
+        :param since_date: string : Narrow the download when the matches are known to be recent
+        """
+        rows = self._iter_rows(self.__rows_path(account_id), since_date)
+
+        try:
+            matches = (row for row in rows if where is None or where(row))
+            newest = heapq.nlargest(n, matches, key=lambda row: row.get("date") or "")
+        finally:
+            rows.close()
+
+        return [self._model.from_dict(row) for row in newest]
+
+    def __rows_path(self, account_id: Optional[str]) -> str:
+        if account_id:
+            return self._budget_uri + f"accounts/{account_id}/transactions"
+        return self._budget_uri + f"transactions/"
+
+    def to_frame(
+        self, since_date: Optional[str] = None, expand_splits: bool = True
+    ) -> TransactionFrame:
+        """
+        Stream all transactions straight into a columnar TransactionFrame (requires numpy)
+        :param since_date: string : Only include transactions on or after this date
+        :param expand_splits: bool : One row per subtransaction instead of one per split parent
+        :return: TransactionFrame
+        """
+        api_path = self._budget_uri + f"transactions/"
+
+        return TransactionFrame.from_rows(
+            self._iter_rows(api_path, since_date), expand_splits=expand_splits
+        )
+
+    def export(
+        self,
+        path: str,
+        format: Optional[str] = None,
+        since_date: Optional[str] = None,
+        account_id: Optional[str] = None,
+        expand_splits: bool = True,
+        include_meta: bool = False,
+        batch_size: int = 10000,
+    ) -> ExportStats:
+        """
+        Stream transactions straight into a Parquet, Arrow IPC or CSV file - no models are
+        built and only one batch of rows is held in memory
+        :param path: string : Output file - the format follows the extension unless given
+        :param format: string : 'parquet', 'arrow' or 'csv' - Parquet and Arrow require pyarrow
+        :param since_date: string : Only export transactions on or after this date
+        :param account_id: string : Only export this account's transactions
+        :param expand_splits: bool : One row per subtransaction instead of one per split parent
+        :param include_meta: bool : Add the fields without a column as a JSON 'meta' column
+        :param batch_size: int : Rows per written batch, or Parquet row group
+        :return: ExportStats
+        """
+        rows = self._iter_rows(self.__rows_path(account_id), since_date)
+
+        return export_rows(
+            flatten_transactions(rows, expand_splits), path, TRANSACTION_COLUMNS, format, include_meta, batch_size
+        )
+
+    def _iter_rows(
+        self, api_path: str, since_date: Optional[str] = None, chunk_size: int = 65536
+    ) -> Iterator[dict]:
+        params = {}
+
+        if since_date:
+            params["since_date"] = since_date
+
+        return self._iter_array(api_path, ("data", "transactions"), params, chunk_size)
 
     def save(self, transactions: Transaction) -> Union[List[Transaction], Transaction]:
         if isinstance(transactions, list):
@@ -191,32 +555,84 @@ class TransactionAPI(RESTBase):
         else:
             return self.create_transaction(transactions)
 
-    def save_many(self, transactions: List[Transaction]) -> List[Transaction]:
-        # For each transaction, determine if the transaction already exists
-        # if so, then update it
+    def save_many(
+        self,
+        transactions: List[Transaction],
+        chunk_size: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        dedup: Optional[DedupIndex] = None,
+        on_duplicate: str = "skip",
+        only_dirty: bool = True,
+    ) -> List[Transaction]:
+        """
+        Update the transactions that have an id and create the others, in concurrent chunks
+        :param chunk_size: int : Transactions per request - defaults to BULK_CHUNK_SIZE
+        :param max_workers: int : Chunks in flight at once - defaults to BULK_WORKERS
+        :param dedup: DedupIndex : Check new rows against existing transactions before sending
+        :param on_duplicate: string : 'skip' duplicates or 'update' the transaction they duplicate
+        :param only_dirty: bool : Skip loaded transactions that didn't change, and send only the changed fields
+        :return: Saved transactions as returned by the API
+        :raises BulkWriteError: Some rows failed - every other row is still saved
+        """
+        result = self.bulk_save(
+            transactions,
+            chunk_size=chunk_size,
+            max_workers=max_workers,
+            dedup=dedup,
+            on_duplicate=on_duplicate,
+            only_dirty=only_dirty,
+        )
 
-        update_queue: List[Transaction] = []
-        create_queue: List[Transaction] = []
-        completed_trans: List[Transaction] = []
+        if not result.ok:
+            raise BulkWriteError(result)
+
+        return result.saved
+
+    def bulk_save(
+        self,
+        transactions: List[Transaction],
+        chunk_size: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        dedup: Optional[DedupIndex] = None,
+        on_duplicate: str = "skip",
+        only_dirty: bool = True,
+    ) -> BulkResult:
+        """
+        Like save_many, but reports per-chunk results and per-row errors instead of raising
+        :return: BulkResult - duplicates found by dedup are listed in skipped, or in converted when they
+            were turned into updates, and unchanged rows in unchanged
+        """
+        writer = BulkWriter(
+            self,
+            chunk_size=chunk_size or self.BULK_CHUNK_SIZE,
+            max_workers=max_workers or self.BULK_WORKERS,
+            minimal_updates=only_dirty,
+        )
+        skipped, converted, unchanged = [], [], []
 
-        for t in transactions:
-            if t.id:
-                update_queue.append(t)
-            else:
-                create_queue.append(t)
+        if dedup is not None:
+            transactions, skipped, converted = dedup.resolve(transactions, on_duplicate=on_duplicate)
 
-        if len(update_queue) >= 1:
-            completed_trans.extend(self.update_transaction(update_queue))  # type: ignore
+        if only_dirty:
+            unchanged = [t for t in transactions if t.id and not t.is_dirty]
+            transactions = [t for t in transactions if not t.id or t.is_dirty]
 
-        if len(create_queue) >= 1:
-            completed_trans.extend(self.create_transaction(create_queue))  # type: ignore
+        result = writer.write(transactions)
+        result.skipped = skipped
+        result.converted = converted
+        result.unchanged = unchanged
 
-        return completed_trans
+        return result
+
+    def update_transaction(self, transactions: Union[List[Transaction], Transaction], minimal: bool = True):
+        """
+        :param minimal: bool : Send only the changed fields of loaded transactions - lists only
+        """
+        self.__drop_batches()
 
-    def update_transaction(self, transactions: Union[List[Transaction], Transaction]):
         # Since there are different methods and endpoints, create two seperate functions
         if isinstance(transactions, list):
-            return self._update_many_transactions(transactions)
+            return self._update_many_transactions(transactions, minimal)
         else:
             return self._update_single_transaction(transactions)
 
@@ -227,18 +643,25 @@ class TransactionAPI(RESTBase):
         data = {"transaction": transaction.save_transaction}
         resp = self._rest_call[method](api_path, data)
 
-        return self.__load_transactions_from_json(resp.json())
+        return self.__load_transactions_from_json(self._decode(resp))
 
-    def _update_many_transactions(self, transactions: List[Transaction]):
+    def _update_many_transactions(self, transactions: List[Transaction], minimal: bool = True):
         method = "PATCH"
         api_path = self._budget_uri + f"transactions"
 
-        data = {"transactions": [t.save_transaction for t in transactions]}
+        if minimal:
+            data = {"transactions": [t.update_payload for t in transactions]}
+        else:
+            data = {"transactions": [t.save_transaction for t in transactions]}
         resp = self._rest_call[method](api_path, data)
 
-        return self.__load_transactions_from_json(resp.json())
+        for t in transactions:
+            t.mark_clean()
+
+        return self.__load_transactions_from_json(self._decode(resp))
 
     def create_transaction(self, transactions: Union[Transaction, List[Transaction]]):
+        self.__drop_batches()
         method = "POST"
         api_path = self._budget_uri + f"transactions/"
 
@@ -249,12 +672,13 @@ class TransactionAPI(RESTBase):
 
         resp = self._rest_call[method](api_path, data)
 
-        return self.__load_transactions_from_json(resp.json())
+        return self.__load_transactions_from_json(self._decode(resp))
 
     def import_all(self):
+        self.__drop_batches()
         method = "POST"
         api_path = self._budget_uri + f"transactions/import"
         data = {}
         resp = self._rest_call[method](api_path, data)
 
-        return resp.json()
+        return self._decode(resp)
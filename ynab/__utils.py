@@ -3,6 +3,10 @@
 # This software is released under the MIT License.
 # https://opensource.org/licenses/MIT
 
+from dataclasses import fields
+from functools import lru_cache
+from typing import FrozenSet
+
 from requests import Response
 from requests.exceptions import HTTPError
 
@@ -10,3 +14,11 @@ from requests.exceptions import HTTPError
 def raise_exceptions(resp: Response) -> None:
     if resp.status_code != 200:
         raise HTTPError(resp.text)
+
+
+@lru_cache(maxsize=None)
+def field_names(cls) -> FrozenSet[str]:
+    """
+    Names of the fields a model accepts from API data - computed once per class
+    """
+    return frozenset(f.name for f in fields(cls) if f.init and f.name != "meta")
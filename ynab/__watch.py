@@ -0,0 +1,237 @@
+# Copyright (c) 2021 Erik Zwiefel
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+
+import asyncio
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from ynab.__sync import BudgetSync, ChangeSet
+
+logger = logging.getLogger("ynab")
+
+KINDS = ("created", "updated", "deleted")
+
+
+@dataclass
+class WatchEvent:
+    budget_id: str
+    endpoint: str
+    kind: str
+    items: list
+
+    def __repr__(self):
+        return (
+            f"WatchEvent("
+            f"budget='{self.budget_id}', "
+            f"endpoint='{self.endpoint}', "
+            f"kind='{self.kind}', "
+            f"items={len(self.items)}"
+            f")"
+        )
+
+
+class BudgetWatcher(object):
+    """
+    Polls budgets for deltas on a schedule and calls the callbacks registered for the
+    changes. Each client's BudgetSync keeps the in-memory model warm, so every poll
+    only fetches what changed since the last one.
+
+        watcher = BudgetWatcher(client, interval=60)
+        watcher.on("transactions.created", lambda event: print(event.items))
+        watcher.start()
+    """
+
+    def __init__(
+        self,
+        *clients,
+        interval: float = 60.0,
+        jitter: float = 0.1,
+        endpoints: Sequence[str] = BudgetSync.ENDPOINTS,
+        notify_initial: bool = False,
+        max_workers: int = 4,
+    ):
+        """
+        :param clients: YNABBudgetClient : Budgets to watch - a YNABClientManager can be unpacked, BudgetWatcher(*manager)
+        :param interval: float : Seconds between polls
+        :param jitter: float : Random share of interval added to each wait, so many watchers don't poll in lockstep
+        :param endpoints: Endpoints to poll - any of accounts, categories and transactions
+        :param notify_initial: bool : Report everything loaded by the first, full sync as created
+        :param max_workers: int : Budgets polled at once
+        """
+        unknown = set(endpoints) - set(BudgetSync.ENDPOINTS)
+        if unknown:
+            raise ValueError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+        self.clients = list(clients)
+        self.interval = interval
+        self.jitter = jitter
+        self.endpoints = tuple(endpoints)
+        self.notify_initial = notify_initial
+        self.max_workers = max_workers
+        self.polls = 0
+        self.errors = 0
+
+        self._callbacks: List[Tuple[str, Callable[[WatchEvent], None]]] = []
+        self._error_callbacks: List[Callable[[str, Exception], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def on(self, event: str, callback: Callable[[WatchEvent], None]) -> Callable[[WatchEvent], None]:
+        """
+        Register callback for events matching event: 'transactions.created', 'accounts.*',
+        '*.deleted' or '*'
+        :return: callback
+        """
+        endpoint, _, kind = event.partition(".")
+        kind = kind or "*"
+
+        if endpoint not in self.endpoints + ("*",) or kind not in KINDS + ("*",):
+            raise ValueError(f"Unknown event '{event}'")
+
+        with self._lock:
+            self._callbacks.append((f"{endpoint}.{kind}", callback))
+
+        return callback
+
+    def off(self, callback: Callable[[WatchEvent], None]) -> None:
+        with self._lock:
+            self._callbacks = [(p, c) for p, c in self._callbacks if c is not callback]
+
+    def on_error(self, callback: Callable[[str, Exception], None]) -> None:
+        """
+        Called with the budget id and exception when polling a budget fails
+        """
+        self._error_callbacks.append(callback)
+
+    def poll(self) -> Dict[str, Dict[str, ChangeSet]]:
+        """
+        Fetch the deltas of every budget once and dispatch them
+        :return: dict : budget id -> endpoint -> ChangeSet, for the endpoints that were polled successfully
+        """
+        if len(self.clients) == 1:
+            outcomes = [self.__poll_budget(self.clients[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(self.clients)))) as executor:
+                outcomes = list(executor.map(self.__poll_budget, self.clients))
+
+        self.polls += 1
+        results = {}
+
+        # Callbacks run on the polling thread, one budget at a time
+        for client, changes in zip(self.clients, outcomes):
+            if not changes:
+                continue
+
+            results[client.budget_id] = changes
+            self.__dispatch(client.budget_id, changes)
+
+        return results
+
+    def __poll_budget(self, client) -> Dict[str, ChangeSet]:
+        changes = {}
+
+        # Endpoints are synced independently - a failing one doesn't drop the others' changes
+        for endpoint in self.endpoints:
+            initial = client.sync.server_knowledge[endpoint] is None
+
+            try:
+                change_set = getattr(client.sync, f"sync_{endpoint}")()
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+
+                logger.warning("Polling %s of budget %s failed: %r", endpoint, client.budget_id, e)
+
+                for callback in list(self._error_callbacks):
+                    self.__call(callback, client.budget_id, e)
+
+                continue
+
+            changes[endpoint] = change_set if self.notify_initial or not initial else ChangeSet()
+
+        return changes
+
+    def __dispatch(self, budget_id: str, changes: Dict[str, ChangeSet]) -> None:
+        with self._lock:
+            callbacks = list(self._callbacks)
+
+        for endpoint, change_set in changes.items():
+            for kind in KINDS:
+                items = getattr(change_set, kind)
+
+                if not items:
+                    continue
+
+                event = WatchEvent(budget_id=budget_id, endpoint=endpoint, kind=kind, items=items)
+
+                for pattern, callback in callbacks:
+                    if self.__matches(pattern, endpoint, kind):
+                        self.__call(callback, event)
+
+    @staticmethod
+    def __matches(pattern: str, endpoint: str, kind: str) -> bool:
+        want_endpoint, want_kind = pattern.split(".")
+        return want_endpoint in ("*", endpoint) and want_kind in ("*", kind)
+
+    @staticmethod
+    def __call(callback: Callable, *args) -> None:
+        try:
+            callback(*args)
+        except Exception:
+            logger.exception("Watcher callback %r failed", callback)
+
+    def _delay(self) -> float:
+        return self.interval * (1 + random.uniform(0, self.jitter))
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "BudgetWatcher":
+        """
+        Poll in a background daemon thread until stop() - the first poll runs immediately
+        """
+        if self.running:
+            return self
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.__run, name="ynab-watcher", daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def __run(self) -> None:
+        while not self._stop.is_set():
+            self.poll()
+            self._stop.wait(self._delay())
+
+    async def run(self) -> None:
+        """
+        Poll from an asyncio task until cancelled or stop() - requests run in the default executor
+        """
+        self._stop.clear()
+        loop = asyncio.get_running_loop()
+
+        while not self._stop.is_set():
+            await loop.run_in_executor(None, self.poll)
+            await asyncio.sleep(self._delay())
+
+    def __enter__(self) -> "BudgetWatcher":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
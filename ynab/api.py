@@ -3,8 +3,22 @@
 # This software is released under the MIT License.
 # https://opensource.org/licenses/MIT
 
+from typing import Optional
+
+import requests
+from requests.adapters import BaseAdapter
+
 from ynab.__accounts import AccountsAPI
+from ynab.__cache import ResponseCache
+from ynab.__codec import JSONCodec, default_codec
 from ynab.__categories import CategoriesAPI
+from ynab.__compact import COMPACT_MODELS
+from ynab.__flight import SingleFlight
+from ynab.__instrument import Instrumentation
+from ynab.__ratelimit import RateLimiter
+from ynab.__session import SessionConfig, create_session
+from ynab.__storage import SQLiteStore
+from ynab.__sync import BudgetSync
 from ynab.__transactions import TransactionAPI
 
 
@@ -12,18 +26,87 @@ class YNABBudgetClient(object):
     BASE_URL = "https://api.ynab.com"
     API_VERSION = "v1"
 
-    def __init__(self, budget_id: str, pat_token: str, **kwargs) -> None:
+    def __init__(
+        self,
+        budget_id: str,
+        pat_token: str,
+        session: Optional[requests.Session] = None,
+        session_config: Optional[SessionConfig] = None,
+        transport: Optional[BaseAdapter] = None,
+        storage: Optional[SQLiteStore] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+        compact_models: bool = False,
+        base_url: Optional[str] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        codec: Optional[JSONCodec] = None,
+        single_flight: Optional[SingleFlight] = None,
+        coalesce: bool = True,
+        **kwargs,
+    ) -> None:
+        """
+        Client for a single YNAB budget. The categories, transactions and accounts
+        APIs share one pooled session.
+        :param budget_id: string : YNAB budget id
+        :param pat_token: string : YNAB personal access token
+        :param session: requests.Session : Pre-built session to share - takes precedence over session_config
+        :param session_config: SessionConfig : Pool size, keep-alive, timeout and compression settings
+        :param transport: BaseAdapter : Custom transport adapter mounted on the created session
+        :param storage: SQLiteStore : Local mirror used for lookups and to resume delta syncs
+        :param rate_limiter: RateLimiter : Request scheduler - shared per access token if omitted
+        :param cache: ResponseCache : Read cache for GET responses - invalidated by writes to the budget
+        :param compact_models: bool : Parse into the __slots__ based Compact* models to save memory
+        :param base_url: string : API host - defaults to BASE_URL, e.g. a MockYNABServer url in tests
+        :param instrumentation: Instrumentation : Hooks called around every request and parse step
+        :param codec: JSONCodec : Payload encoder and response decoder - the fastest installed one if omitted
+        :param single_flight: SingleFlight : Coalesces concurrent identical GETs - pass one to share it between clients
+        :param coalesce: bool : Coalesce concurrent identical GETs - a SingleFlight is created if none is passed
+        """
         super().__init__()
+
+        if storage is not None:
+            storage.bind(budget_id)
+
         self.budget_id = budget_id
+        self.session_config = session_config or SessionConfig()
+        self._owns_session = session is None
+        self.session = session or create_session(self.session_config, transport)
+        self.storage = storage
+        self.rate_limiter = rate_limiter or RateLimiter.for_token(pat_token)
+        self.cache = cache
+        self.instrumentation = instrumentation
+        self.codec = codec or default_codec()
+        self.single_flight = (single_flight or SingleFlight()) if coalesce else None
 
         api_kwargs = {
-            "host": self.BASE_URL,
+            "host": base_url or self.BASE_URL,
             "api_version": self.API_VERSION,
             "budget_id": self.budget_id,
             "token": pat_token,
             "parent": self,
+            "session": self.session,
+            "timeout": self.session_config.timeout,
+            "rate_limiter": self.rate_limiter,
+            "cache": self.cache,
+            "instrumentation": self.instrumentation,
+            "codec": self.codec,
+            "single_flight": self.single_flight,
+            "models": COMPACT_MODELS if compact_models else {},
         }
 
         self.categories = CategoriesAPI(**api_kwargs)
         self.transactions = TransactionAPI(**api_kwargs)
         self.accounts = AccountsAPI(**api_kwargs)
+
+        self.sync = BudgetSync(self, store=storage)
+
+    def close(self) -> None:
+        # Only close the pool if this client created it
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self) -> "YNABBudgetClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()